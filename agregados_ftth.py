@@ -0,0 +1,259 @@
+"""Agregados precalculados sobre las hojas normalizadas de REPORTE FTTH.xlsx
+
+Cada hoja se agrupa una sola vez por sus columnas categóricas (un "cubo" con
+la cantidad de registros por combinación). Las métricas del dashboard se
+obtienen sumando el cubo, que tiene unas pocas centenas de filas, en lugar de
+volver a filtrar la hoja completa para cada métrica y cada mes."""
+import numpy as np
+import pandas as pd
+
+# Los cubos se agrupan por PERIODO (AAAAMM, ver datos_ftth), no por el nombre
+# del mes. ID_ASESOR depende solo del nombre: no agrega combinaciones al cubo
+DIMENSIONES_MANTRA = ['PERIODO', 'Agente', 'ID_ASESOR', 'NIVEL 1', 'NIVEL 2', 'NIVEL 3']
+DIMENSIONES_DRIVE = ['PERIODO', 'ASESOR', 'ID_ASESOR', 'CODIGO DE CARGA', 'ESTADO', 'PAGO', 'MOTIVO CANCELACIÓN']
+
+# Métricas: nombre -> filtro {dimensión: valor} sobre el cubo (vacío = todos)
+METRICAS_MANTRA = {
+    'LEADS': {},
+    'CON_COBERTURA': {'NIVEL 2': 'Con Cobertura'},
+    'CONTRATO_OK': {'NIVEL 2': 'Con Cobertura', 'NIVEL 3': 'Contrato OK'},
+    'NO_RESPONDE': {'NIVEL 1': 'No Responde'},
+    'NO_ESPECIFICA': {'NIVEL 2': 'No Especifica'},
+    'SIN_COBERTURA': {'NIVEL 2': 'Sin Cobertura'},
+}
+METRICAS_DRIVE = {
+    'VENTAS': {},
+    'INSTALADAS': {'ESTADO': 'INSTALADO'},
+    'CANCELADAS': {'ESTADO': 'CANCELADO'},
+    'PENDIENTES': {'ESTADO': 'PENDIENTE'},
+    'NO_PAGO': {'MOTIVO CANCELACIÓN': 'NO PAGO'},
+}
+
+
+def construir_cubo(df, dimensiones):
+    """Cantidad de registros por combinación de dimensiones (incluye vacíos)"""
+    dimensiones = [dim for dim in dimensiones if dim in df.columns]
+    return df.groupby(dimensiones, observed=True, dropna=False).size()
+
+
+def sumar_cubo(cubo, niveles, metricas):
+    """Suma el cubo por los niveles indicados, una columna por métrica"""
+    columnas = {}
+    for nombre, filtro in metricas.items():
+        mascara = np.ones(len(cubo), dtype=bool)
+        for dimension, valor in filtro.items():
+            mascara &= cubo.index.get_level_values(dimension) == valor
+        columnas[nombre] = cubo[mascara].groupby(level=niveles, observed=True).sum()
+
+    resultado = pd.DataFrame(columnas).fillna(0).astype(int)
+    # Índice de texto (no categórico) para poder unir cubos de distintas hojas
+    if isinstance(resultado.index, pd.MultiIndex):
+        resultado.index = resultado.index.set_levels(
+            [_nivel_texto(nivel) for nivel in resultado.index.levels]
+        )
+    else:
+        resultado.index = _nivel_texto(resultado.index)
+    return resultado
+
+
+def _nivel_texto(nivel):
+    return nivel.astype(str) if isinstance(nivel, pd.CategoricalIndex) else nivel
+
+
+def _metricas_hoja(cubo, niveles, metricas):
+    if cubo is None or cubo.empty:
+        resultado = pd.DataFrame(columns=list(metricas), dtype=int)
+        if isinstance(niveles, list):
+            resultado.index = pd.MultiIndex.from_arrays([[]] * len(niveles), names=niveles)
+        return resultado
+    return sumar_cubo(cubo, niveles, metricas)
+
+
+def resumen_mensual(cubo_mantra, cubo_drive):
+    """Métricas de MANTRA y DRIVE por mes (una fila por mes, índice = PERIODO)
+    a partir de sus cubos (DIMENSIONES_MANTRA y DIMENSIONES_DRIVE, ver
+    historico_ftth.cubos_libro). Columnas: LEADS, CON_COBERTURA, CONTRATO_OK,
+    NO_RESPONDE, NO_ESPECIFICA, SIN_COBERTURA, VENTAS, INSTALADAS, CANCELADAS,
+    PENDIENTES, NO_PAGO"""
+    mantra = _metricas_hoja(cubo_mantra, 'PERIODO', METRICAS_MANTRA)
+    drive = _metricas_hoja(cubo_drive, 'PERIODO', METRICAS_DRIVE)
+    return mantra.join(drive, how='outer').fillna(0).astype(int)
+
+
+def metricas_por_agente(cubo_mantra, cubo_drive):
+    """Métricas de MANTRA y DRIVE por (PERIODO, NOMBRE, ID_ASESOR), donde NOMBRE
+    es el Agente de MANTRA o el ASESOR de DRIVE. Mismas columnas que resumen_mensual."""
+    niveles = ['PERIODO', 'NOMBRE', 'ID_ASESOR']
+    mantra = _metricas_hoja(cubo_mantra, ['PERIODO', 'Agente', 'ID_ASESOR'], METRICAS_MANTRA)
+    drive = _metricas_hoja(cubo_drive, ['PERIODO', 'ASESOR', 'ID_ASESOR'], METRICAS_DRIVE)
+    mantra.index.names = drive.index.names = niveles
+    return mantra.join(drive, how='outer').fillna(0).astype(int)
+
+
+def matriz_instaladas_dia(cubo_instaladas, periodos):
+    """Instaladas por día (filas, DIA) y período (columnas, en orden cronológico)
+    de los períodos indicados, a partir del cubo INSTALADAS_DIA (ver
+    historico_ftth.cubos_libro). Solo incluye los días con instaladas."""
+    periodos_cubo = cubo_instaladas.index.get_level_values('PERIODO')
+    dias = cubo_instaladas.index.get_level_values('DIA')
+    cubo = cubo_instaladas[periodos_cubo.isin(list(periodos)) & dias.notna()]
+    matriz = cubo.groupby(level=['DIA', 'PERIODO']).sum().unstack('PERIODO', fill_value=0)
+    return matriz.sort_index().sort_index(axis=1)
+
+
+# Semanas del mes según el día: 1-7, 8-14, 15-21 y 22-31 (los días 29-31 van en la 4)
+ETIQUETAS_SEMANAS = ['Semana 1 (1-7)', 'Semana 2 (8-14)', 'Semana 3 (15-21)', 'Semana 4 (22-31)']
+
+
+def semana_del_mes(dias):
+    """Semana del mes de cada día (1 a 31) en una sola operación vectorizada:
+    Categorical ordenado con ETIQUETAS_SEMANAS como categorías"""
+    codigos = np.minimum((np.asarray(dias, dtype=np.int64) - 1) // 7, len(ETIQUETAS_SEMANAS) - 1)
+    return pd.Categorical.from_codes(codigos, categories=ETIQUETAS_SEMANAS, ordered=True)
+
+
+def cubo_diario_asesores(df_drive):
+    """Cantidad de ventas de DRIVE por (ASESOR, FECHA, ESTADO), con FECHA
+    truncada al día. Incluye las filas sin fecha o sin estado: cuentan en los
+    totales del asesor aunque no en las series por día."""
+    return df_drive.groupby(
+        ['ASESOR', df_drive['FECHA'].dt.normalize(), 'ESTADO'], observed=True, dropna=False
+    ).size()
+
+
+def ventas_por_dia_estado(ventas_asesor):
+    """Tabla de ventas por día (índice FECHA con fechas date) y ESTADO
+    (columnas) a partir de las ventas de un asesor en el cubo diario
+    (cubo_diario_asesores sin el nivel ASESOR). Sin filas sin fecha o estado."""
+    if ventas_asesor.empty:
+        return pd.DataFrame()
+    fechas = ventas_asesor.index.get_level_values('FECHA')
+    estados = ventas_asesor.index.get_level_values('ESTADO')
+    ventas_asesor = ventas_asesor[fechas.notna() & estados.notna()]
+    if ventas_asesor.empty:
+        return pd.DataFrame()
+    # Columnas en el orden de las categorías de ESTADO (como un groupby por estado)
+    tabla = ventas_asesor.unstack('ESTADO', fill_value=0).sort_index(axis=1)
+    tabla.index = pd.Index(tabla.index.date, name='FECHA')
+    return tabla
+
+
+def _redondear(serie, decimales):
+    # round() de Python (redondeo decimal exacto), igual que el cálculo por asesor;
+    # Series.round escala por 10**decimales y puede diferir en los casos .x5
+    return serie.map(lambda valor: round(valor, decimales))
+
+
+def kpis_asesores(cubo_diario):
+    """KPIs de DRIVE de todos los asesores del cubo diario (cubo_diario_asesores)
+    en una sola pasada, una fila por asesor: total_ventas, instaladas,
+    pendientes, canceladas, tasa_conversion, tasa_cancelacion,
+    tiempo_promedio_dias, velocidad_venta, dias_activos, estabilidad_ventas,
+    fecha_primera_venta y fecha_ultima_venta"""
+    columnas = [
+        'total_ventas', 'instaladas', 'pendientes', 'canceladas', 'tasa_conversion',
+        'tasa_cancelacion', 'tiempo_promedio_dias', 'velocidad_venta', 'dias_activos',
+        'estabilidad_ventas', 'fecha_primera_venta', 'fecha_ultima_venta',
+    ]
+    if cubo_diario is None or cubo_diario.empty:
+        return pd.DataFrame(columns=columnas, index=pd.Index([], name='ASESOR', dtype=object))
+
+    por_asesor = cubo_diario.groupby(level='ASESOR', observed=True)
+    kpis = pd.DataFrame({'total_ventas': por_asesor.sum()})
+    kpis.index = kpis.index.astype(str)
+    por_estado = cubo_diario.groupby(level=['ASESOR', 'ESTADO'], observed=True).sum().unstack(fill_value=0)
+    por_estado.index = por_estado.index.astype(str)
+    for columna, estado in [('instaladas', 'INSTALADO'), ('pendientes', 'PENDIENTE'), ('canceladas', 'CANCELADO')]:
+        serie = por_estado[estado] if estado in por_estado.columns else None
+        kpis[columna] = serie.reindex(kpis.index, fill_value=0) if serie is not None else 0
+
+    total = kpis['total_ventas']
+    kpis['tasa_conversion'] = _redondear(kpis['instaladas'] / total * 100, 1)
+    kpis['tasa_cancelacion'] = _redondear(kpis['canceladas'] / total * 100, 1)
+
+    # Ventas por día de cada asesor (las ventas sin fecha no entran)
+    ventas_por_dia = cubo_diario.groupby(level=['ASESOR', 'FECHA'], observed=True).sum()
+    asesores_dia = ventas_por_dia.index.get_level_values('ASESOR').astype(str)
+    fechas = pd.Series(ventas_por_dia.index.get_level_values('FECHA'), index=asesores_dia)
+    por_dia = pd.Series(ventas_por_dia.to_numpy(), index=asesores_dia).groupby(level=0)
+    con_fecha = por_dia.sum().reindex(kpis.index, fill_value=0)
+    dias = por_dia.size().reindex(kpis.index, fill_value=0)
+    primera = fechas.groupby(level=0).min().reindex(kpis.index)
+    ultima = fechas.groupby(level=0).max().reindex(kpis.index)
+
+    # Tiempo promedio entre ventas (en días)
+    kpis['tiempo_promedio_dias'] = _redondear(((ultima - primera).dt.days / (con_fecha - 1)).where(con_fecha > 1, 0), 1)
+
+    # Velocidad de venta: las ventas sin fecha suman un día activo
+    sin_fecha = cubo_diario.index.get_level_values('FECHA').isna()
+    con_ventas_sin_fecha = pd.Index(cubo_diario.index.get_level_values('ASESOR')[sin_fecha].astype(str))
+    kpis['dias_activos'] = (dias + kpis.index.isin(con_ventas_sin_fecha)).where(con_fecha > 0, 1)
+    kpis['velocidad_venta'] = _redondear(total / kpis['dias_activos'], 2)
+
+    # Estabilidad (desviación estándar de ventas por día)
+    kpis['estabilidad_ventas'] = _redondear(por_dia.std().reindex(kpis.index).where(dias > 1, 0), 2)
+    kpis['fecha_primera_venta'] = primera
+    kpis['fecha_ultima_venta'] = ultima
+    kpis.index.name = 'ASESOR'
+    return kpis[columnas]
+
+
+def variantes_asesor(indice, asesor):
+    """Nombres que corresponden al mismo asesor según el índice de asesores:
+    primero el nombre recibido, luego el canónico y luego las demás variantes
+    (ej: ST2_VTP -> [ST2_VTP, ST_VTP]; ST_VTP -> [ST_VTP, ST2_VTP])"""
+    asesor = asesor.strip()
+    if asesor not in indice.index:
+        return [asesor]
+    fila = indice.loc[asesor]
+    mismos = indice.index[indice['ID_ASESOR'] == fila['ID_ASESOR']]
+    otros = sorted(n for n in mismos if n not in (asesor, fila['CANONICO']))
+    return list(dict.fromkeys([asesor, fila['CANONICO']] + otros))
+
+
+def metricas_asesores(metricas_agente, indice, periodo, asesores):
+    """Métricas de los asesores en el período, en una sola operación vectorizada.
+
+    Las variantes de un mismo nombre (ST_VTP / ST2_VTP) se resuelven con el ID
+    entero del índice de asesores:
+    - LEADS, CON_COBERTURA y PENDIENTES suman todas las variantes (mismo ID)
+    - CONVERSION (Contrato OK / Con Cobertura) usa la primera variante con
+      registros en MANTRA ese mes (el propio nombre, luego el canónico)
+    - INSTALADAS y CANCELADAS usan el nombre exacto del asesor
+    Devuelve un DataFrame indexado por asesor (en el orden recibido)."""
+    asesores = pd.Index(list(dict.fromkeys(asesores)), name='ASESOR', dtype=object)
+    ids = indice['ID_ASESOR'].reindex(asesores).fillna(-2).astype(int)
+    canonicos = indice['CANONICO'].reindex(asesores)
+
+    if periodo in metricas_agente.index.get_level_values('PERIODO'):
+        del_mes = metricas_agente.xs(periodo, level='PERIODO').reset_index()
+    else:
+        del_mes = pd.DataFrame(columns=['NOMBRE', 'ID_ASESOR'] + list(metricas_agente.columns), dtype=int)
+    del_mes = del_mes[del_mes['ID_ASESOR'] >= 0]
+
+    # Suma de todas las variantes: agrupación por el ID entero
+    por_id = del_mes.groupby('ID_ASESOR')[['LEADS', 'CON_COBERTURA', 'PENDIENTES']].sum()
+    resultado = por_id.reindex(ids.to_numpy()).fillna(0)
+    resultado.index = asesores
+
+    # Conversión de la primera variante con registros en el mes
+    candidatos = del_mes[del_mes['LEADS'] > 0].merge(
+        pd.DataFrame({'ASESOR': asesores, 'ID_ASESOR': ids.to_numpy(), 'CANONICO': canonicos.to_numpy()}),
+        on='ID_ASESOR'
+    )
+    candidatos['PRIORIDAD'] = np.select(
+        [candidatos['NOMBRE'] == candidatos['ASESOR'], candidatos['NOMBRE'] == candidatos['CANONICO']],
+        [0, 1], default=2
+    )
+    primera = (
+        candidatos.sort_values(['PRIORIDAD', 'NOMBRE'], kind='stable')
+        .drop_duplicates('ASESOR')
+        .set_index('ASESOR')
+    )
+    conversion = (primera['CONTRATO_OK'] / primera['CON_COBERTURA'].where(primera['CON_COBERTURA'] > 0) * 100).round()
+    resultado['CONVERSION'] = conversion.reindex(asesores).fillna(0)
+
+    # Nombre exacto
+    exactas = del_mes.set_index('NOMBRE')[['INSTALADAS', 'CANCELADAS']].reindex(asesores).fillna(0)
+    resultado[['INSTALADAS', 'CANCELADAS']] = exactas
+    return resultado.astype(int)
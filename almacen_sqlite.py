@@ -0,0 +1,176 @@
+"""Almacén SQLite opcional con las hojas de REPORTE FTTH.xlsx
+
+Alternativa a mantener las hojas completas en cada proceso de Streamlit: las
+hojas normalizadas (ver datos_ftth.cargar_libro) y el índice de asesores se
+importan a un archivo SQLite junto al Excel, con índices por período, asesor y
+código de carga, y las consultas piden solo el agregado, los valores o las
+filas que necesitan. Con este backend el dashboard no conserva las hojas en
+memoria: la importación carga el libro una vez y lo libera al terminar.
+
+Se activa con la variable de entorno FTTH_BACKEND=sqlite. La importación se
+repite solo cuando cambia la versión del libro (datos_ftth.version_libro) o el
+formato del almacén, y reemplaza el archivo de forma atómica: las consultas en
+curso siguen leyendo el archivo anterior."""
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+
+import pandas as pd
+
+from datos_ftth import (
+    HOJAS, RUTA_EXCEL, SEPARADOR_TIPO, TIPOS_PARQUET, _preparar_para_parquet, _restaurar_de_parquet,
+    cargar_libro, version_libro
+)
+from historico_ftth import DIMENSIONES_CUBOS
+
+# Índices de cada tabla (período AAAAMM, asesor y código de carga)
+INDICES_SQLITE = {
+    'MANTRA': [['PERIODO'], ['PERIODO', 'Agente']],
+    'DRIVE': [
+        ['PERIODO'], ['PERIODO', 'ASESOR'], ['PERIODO', 'CODIGO DE CARGA'], ['FECHA'], ['PERIODO_FECHA'],
+    ],
+    'LISTA': [['PERIODO']],
+}
+
+# Versión del formato del almacén (tablas e índices): al cambiarla se vuelve a importar
+FORMATO_ALMACEN = 3
+
+# Columna con la etiqueta de fila del DataFrame original
+COLUMNA_FILA = '_FILA'
+
+
+def ruta_sqlite(excel_path=RUTA_EXCEL):
+    return os.path.splitext(excel_path)[0] + '.sqlite'
+
+
+def _columna(nombre):
+    return '"' + nombre.replace('"', '""') + '"'
+
+
+def _conectar(ruta):
+    # Solo lectura: las consultas nunca modifican el almacén
+    return closing(sqlite3.connect(Path(ruta).resolve().as_uri() + '?mode=ro', uri=True))
+
+
+def _version_almacen(ruta):
+    try:
+        with _conectar(ruta) as con:
+            return con.execute('SELECT version FROM meta').fetchone()[0]
+    except (sqlite3.Error, TypeError):
+        return None
+
+
+def importar_libro(excel_path=RUTA_EXCEL):
+    """Importa las hojas del libro al almacén si cambió su versión.
+    Devuelve la ruta del archivo SQLite.
+
+    Cada hoja guarda en la tabla TIPOS el dtype de sus columnas (y las
+    categorías de las category). Las columnas object de tipos mezclados se
+    guardan con la codificación de los snapshots (ver
+    datos_ftth._preparar_para_parquet): los textos en la columna y los demás
+    valores en columnas auxiliares de su tipo."""
+    ruta = ruta_sqlite(excel_path)
+    version = f'{FORMATO_ALMACEN}-{version_libro(excel_path)}'
+    if _version_almacen(ruta) == version:
+        return ruta
+
+    libro = cargar_libro(excel_path)
+    ruta_tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with closing(sqlite3.connect(ruta_tmp)) as con:
+            tipos = []
+            for hoja in HOJAS:
+                df = _preparar_para_parquet(libro[hoja])
+                for col, dtype in libro[hoja].dtypes.items():
+                    categorias = None
+                    if isinstance(dtype, pd.CategoricalDtype):
+                        categorias = json.dumps(dtype.categories.tolist())
+                        df[str(col)] = df[str(col)].astype(object)
+                    tipos.append((hoja, str(col), str(dtype), categorias))
+                df.to_sql(hoja, con, index=True, index_label=COLUMNA_FILA)
+                for n, columnas in enumerate(INDICES_SQLITE.get(hoja, [])):
+                    con.execute(
+                        f'CREATE INDEX ix_{hoja}_{n} ON {hoja} ({", ".join(map(_columna, columnas))})'
+                    )
+            libro['ASESORES'].to_sql('ASESORES', con, index=True)
+            pd.DataFrame(tipos, columns=['hoja', 'columna', 'tipo', 'categorias']).to_sql('TIPOS', con, index=False)
+            con.execute('CREATE TABLE meta (version TEXT)')
+            con.execute('INSERT INTO meta VALUES (?)', (version,))
+            con.commit()
+        os.replace(ruta_tmp, ruta)
+    finally:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+    return ruta
+
+
+def _tipos_hoja(df, tipos):
+    """Restituye los tipos de la hoja normalizada (índice, columnas de tipos
+    mezclados y el dtype de cada columna). tipos: filas (columna, tipo,
+    categorías) de la tabla TIPOS de la hoja."""
+    df = df.set_index(COLUMNA_FILA)
+    df.index.name = None
+    for auxiliar in [col for col in df.columns if SEPARADOR_TIPO in col]:
+        dtype = TIPOS_PARQUET[auxiliar.split(SEPARADOR_TIPO)[1]]
+        valores = df[auxiliar]
+        df[auxiliar] = pd.to_datetime(valores) if dtype.startswith('datetime') else valores.astype(dtype)
+    df = _restaurar_de_parquet(df)
+
+    for col, tipo, categorias in tipos:
+        if categorias is not None:
+            df[col] = pd.Categorical(df[col], categories=json.loads(categorias))
+        elif tipo.startswith('datetime'):
+            df[col] = pd.to_datetime(df[col]).astype(tipo)
+        elif tipo != 'object' and df[col].dtype != tipo:
+            df[col] = df[col].astype(tipo)
+    return df
+
+
+def filas(ruta, hoja, filtros):
+    """Filas de la hoja que cumplen los filtros {columna: valor} (igualdad),
+    en el orden de la hoja normalizada"""
+    condiciones = ' AND '.join(f'{_columna(col)} = ?' for col in filtros) or '1'
+    consulta = f'SELECT * FROM {hoja} WHERE {condiciones} ORDER BY rowid'
+    with _conectar(ruta) as con:
+        df = pd.read_sql_query(consulta, con, params=list(filtros.values()))
+        tipos = con.execute('SELECT columna, tipo, categorias FROM TIPOS WHERE hoja = ?', (hoja,)).fetchall()
+    return _tipos_hoja(df, tipos)
+
+
+def valores(ruta, hoja, columna):
+    """Valores distintos de una columna de la hoja, ordenados"""
+    consulta = f'SELECT DISTINCT {_columna(columna)} FROM {hoja} ORDER BY 1'
+    with _conectar(ruta) as con:
+        return [fila[0] for fila in con.execute(consulta)]
+
+
+def indice_asesores(ruta):
+    """Índice de asesores de la carga (mismo formato que libro['ASESORES'])"""
+    with _conectar(ruta) as con:
+        indice = pd.read_sql_query('SELECT * FROM ASESORES', con, index_col='NOMBRE')
+    indice['ID_ASESOR'] = indice['ID_ASESOR'].astype('int32')
+    return indice
+
+
+def cubos(ruta, hoy=None):
+    """Cubos de MANTRA, DRIVE e INSTALADAS_DIA (mismo formato que
+    historico_ftth.cubos_libro) calculados con GROUP BY en SQLite"""
+    hoy = pd.Timestamp.today() if hoy is None else hoy
+    consultas = {
+        'MANTRA': ('MANTRA', '1', []),
+        'DRIVE': ('DRIVE', '1', []),
+        'INSTALADAS_DIA': ('DRIVE', "FECHA <= ? AND ESTADO = 'INSTALADO'", [str(hoy)]),
+    }
+    resultado = {}
+    with _conectar(ruta) as con:
+        for tipo, (hoja, condicion, parametros) in consultas.items():
+            columnas = ', '.join(map(_columna, DIMENSIONES_CUBOS[tipo]))
+            consulta = (
+                f'SELECT {columnas}, COUNT(*) AS REGISTROS FROM {hoja} '
+                f'WHERE {condicion} GROUP BY {columnas}'
+            )
+            registros = pd.read_sql_query(consulta, con, params=parametros)
+            resultado[tipo] = registros.set_index(DIMENSIONES_CUBOS[tipo])['REGISTROS']
+    return resultado
@@ -0,0 +1,63 @@
+"""Compara los motores de lectura instalados sobre REPORTE FTTH.xlsx
+
+Uso: python benchmark_lectores.py [repeticiones]
+El motor elegido se configura con la variable de entorno FTTH_LECTOR.
+
+Los motores de pandas se miden con leer_hoja_pandas, sin el respaldo en
+streaming de leer_hojas: si un motor falla se marca como FALLÓ en lugar de
+medir el lector en streaming con su nombre."""
+import sys
+import time
+
+from datos_ftth import CATEGORICAS_LECTURA, COLUMNAS_LECTURA, HOJAS, RUTA_EXCEL
+from lector_xlsx import MOTOR_PREDETERMINADO, leer_hoja_pandas, leer_hojas, motores_disponibles
+
+
+def leer(motor, hoja):
+    """Lee la hoja exactamente con el motor indicado (sin respaldo)"""
+    if motor == MOTOR_PREDETERMINADO:
+        return leer_hojas(RUTA_EXCEL, [hoja], COLUMNAS_LECTURA, CATEGORICAS_LECTURA)[hoja]
+    return leer_hoja_pandas(RUTA_EXCEL, hoja, COLUMNAS_LECTURA.get(hoja), CATEGORICAS_LECTURA.get(hoja, ()), motor)
+
+
+repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+motores = motores_disponibles()
+
+print(f'=== MOTORES DE LECTURA ({RUTA_EXCEL}, mejor de {repeticiones}) ===')
+print(f'Instalados: {", ".join(motores)}')
+print()
+
+referencia = leer_hojas(RUTA_EXCEL, HOJAS, COLUMNAS_LECTURA, CATEGORICAS_LECTURA)
+tiempos = {}
+for motor in motores:
+    print(f'--- {motor} ---')
+    tiempos[motor] = 0.0
+    for hoja in HOJAS:
+        mejor = None
+        try:
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                df = leer(motor, hoja)
+                duracion = time.perf_counter() - inicio
+                mejor = duracion if mejor is None else min(mejor, duracion)
+        except Exception as e:
+            print(f'  {hoja:<8} FALLÓ: {type(e).__name__}: {e}')
+            tiempos.pop(motor)
+            break
+        tiempos[motor] += mejor
+
+        esperado = referencia[hoja]
+        iguales = df.shape == esperado.shape and list(df.columns) == list(esperado.columns)
+        estado = 'OK' if iguales else f'DISTINTO (esperado {esperado.shape})'
+        print(f'  {hoja:<8} {mejor:7.2f} s  {df.shape}  {estado}')
+    if motor in tiempos:
+        print(f'  {"TOTAL":<8} {tiempos[motor]:7.2f} s')
+    print()
+
+fallidos = [motor for motor in motores if motor not in tiempos]
+if fallidos:
+    print(f'Motores que fallaron (no se comparan): {", ".join(fallidos)}')
+mas_rapido = min(tiempos, key=tiempos.get)
+print(f'Motor más rápido: {mas_rapido}')
+if mas_rapido != MOTOR_PREDETERMINADO:
+    print(f'Para usarlo: FTTH_LECTOR={mas_rapido}')
@@ -3,8 +3,21 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
+import functools
+import logging
 import numpy as np
 import os
+from datos_ftth import cargar_libro, columnas_excel, etiqueta_periodo, filas_periodo, nombre_periodo, periodo_anterior, periodo_de
+from vigilante_ftth import VigilanteLibro
+from agregados_ftth import (
+    resumen_mensual, metricas_por_agente, metricas_asesores, variantes_asesor,
+    cubo_diario_asesores, ventas_por_dia_estado, semana_del_mes, kpis_asesores,
+    matriz_instaladas_dia
+)
+from recomendaciones_ftth import recomendaciones_asesores, tabla_equipo
+import historico_ftth
+import almacen_sqlite
+from tablas_html import VERDE, NARANJA, ROJO, GRIS, alternar, color_conversion, enteros, filas_html, por_cumplimiento
 
 st.set_page_config(
     page_title="Reporte Bitel FTTH",
@@ -16,333 +29,245 @@ st.set_page_config(
 
 # ============= CARGA DE DATOS DEL EXCEL =============
 
-@st.cache_data(ttl=3600)
-def load_mantra_data():
-    """Carga datos de la hoja MANTRA del archivo REPORTE FTTH.xlsx
-    Actualizado: 02/03/2026 - Ahora filtra por MES en lugar de FECHA"""
-    excel_path = os.path.join(os.path.dirname(__file__), 'REPORTE FTTH.xlsx')
-    
+EXCEL_PATH = os.path.join(os.path.dirname(__file__), 'REPORTE FTTH.xlsx')
+
+# Backend de datos: 'excel' (hojas completas en memoria, por defecto) o 'sqlite'
+# (consultas filtradas sobre un archivo SQLite importado del Excel, ver almacen_sqlite)
+BACKEND_DATOS = os.environ.get('FTTH_BACKEND', 'excel').strip().lower()
+
+# Con streamlit run el módulo se llama '__main__': se nombra el logger explícitamente
+logger = logging.getLogger('dashboard')
+
+# Los meses se identifican por su período AAAAMM (columna PERIODO, ver
+# datos_ftth): filtros, agregados y claves de cache usan el período, nunca el
+# nombre del mes, para no mezclar el mismo mes de años distintos
+VISTAS_INSTALADAS = ["Análisis por Semana (Mes)", "Comparativo Multi-Mes"]
+
+# Las funciones cacheadas no usan TTL: su clave incluye el token de versión del
+# libro (ver datos_ftth.version_libro). Mientras el Excel no cambie nada se
+# recalcula y cuando cambia todo se recalcula una sola vez, en segundo plano:
+# el vigilante precalienta los caches de la versión nueva y luego la publica.
+
+def precalentar_caches():
+    """Recalcula la carga del libro y los agregados de todos los meses del
+    selector (se ejecuta en el hilo del vigilante, ver vigilante_ftth)
+
+    El hilo conserva las variables globales de la ejecución del script que
+    creó el vigilante: las variables de nivel de módulo de este script no deben
+    reutilizar el nombre de una función que use el precalentamiento."""
+    if get_cubos() is None:
+        raise ValueError(f"No se pudo cargar {EXCEL_PATH}")
+    
+    get_resumen_mensual()
+    get_metricas_por_agente()
+    get_comparativo_semanas_multiples_meses()
+    for _, periodo in get_meses_disponibles():
+        get_instaladas_por_semana(periodo)
+    for periodo in get_periodos():
+        load_data_codigo_carga(periodo)
+        get_datos_mantra_mes(periodo)
+        get_casos_por_agente_nivel(periodo)
+
+@st.cache_resource
+def iniciar_vigilante():
+    """Vigilante del libro, uno solo por proceso (compartido entre sesiones)"""
+    return VigilanteLibro(precalentar_caches, EXCEL_PATH).iniciar()
+
+def version_datos():
+    """Token de versión publicado del libro (None si el archivo no existe)"""
+    return iniciar_vigilante().version_actual()
+
+def cache_por_version(recurso=False, por_dia=False, **opciones):
+    """Reemplaza a st.cache_data(ttl=...): cachea la función usando como clave
+    sus argumentos más el token de versión de los datos.
+    recurso: usa st.cache_resource (objetos compartidos, sin copia por llamada)
+    por_dia: agrega la fecha de hoy a la clave (funciones que filtran fechas futuras)
+    Sin TTL, max_entries acota los resultados que quedan de versiones anteriores."""
+    cache = st.cache_resource if recurso else st.cache_data
+    if not recurso:
+        opciones.setdefault('max_entries', 1000)
+    
+    def decorador(func):
+        def con_version(version, *args, **kwargs):
+            return func(*args, **kwargs)
+        # Streamlit identifica cada cache por el módulo y el nombre de la función
+        con_version.__module__ = func.__module__
+        con_version.__name__ = func.__name__
+        con_version.__qualname__ = func.__qualname__
+        cacheada = cache(**opciones)(con_version)
+        
+        @functools.wraps(func)
+        def envoltura(*args, **kwargs):
+            version = version_datos()
+            if por_dia:
+                version = (version, datetime.now().date())
+            return cacheada(version, *args, **kwargs)
+        envoltura.clear = cacheada.clear
+        return envoltura
+    return decorador
+
+# Con el backend 'excel' el libro se comparte entre sesiones con cache_resource:
+# las hojas son de solo lectura y no se copian en cada llamada. Los helpers nunca
+# escriben sobre ellas. Se conservan dos versiones: la publicada y la que se está
+# precalentando. Con el backend 'sqlite' el libro no se carga en el dashboard:
+# todas las filas, valores y cubos salen de consultas al almacén (filas_hoja,
+# valores_hoja, get_cubos e load_indice_asesores).
+
+@cache_por_version(recurso=True, max_entries=2)
+def load_libro_data():
+    """Carga las hojas MANTRA, DRIVE y LISTA del archivo REPORTE FTTH.xlsx
+    en una sola lectura del libro (o desde el snapshot Parquet si no cambió)"""
     try:
-        df_mantra = pd.read_excel(excel_path, sheet_name='MANTRA')
-        return df_mantra
-    except Exception as e:
+        return cargar_libro(EXCEL_PATH)
+    except Exception:
+        logger.exception("No se pudo cargar %s", EXCEL_PATH)
         return None
 
-@st.cache_data(ttl=3600)    
-def get_total_leads_and_conversion(mes_seleccionado="Noviembre"):
-    """Obtiene total de leads y conversión para un mes específico"""
-    df_mantra = load_mantra_data()
+@cache_por_version(recurso=True, max_entries=2)
+def get_almacen():
+    """Ruta del almacén SQLite con la versión actual del libro; None si el backend
+    es 'excel' o si no se pudo importar (se usan las hojas en memoria)"""
+    if BACKEND_DATOS != 'sqlite':
+        return None
+    try:
+        return almacen_sqlite.importar_libro(EXCEL_PATH)
+    except Exception:
+        logger.exception("No se pudo importar %s al almacén SQLite; se usan las hojas en memoria", EXCEL_PATH)
+        return None
+
+def filas_hoja(hoja, filtros):
+    """Filas de la hoja que cumplen los filtros {columna: valor} (igualdad): se
+    consultan en el almacén SQLite o se recortan de la hoja en memoria (el
+    período con filas_periodo, sin copiar). None si no hay datos."""
+    almacen = get_almacen()
+    if almacen is not None:
+        return almacen_sqlite.filas(almacen, hoja, filtros)
     
-    if df_mantra is None or df_mantra.empty:
-        return 6589, 299  # Valores por defecto si no hay datos
+    libro = load_libro_data()
     
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado]
+    if libro is None:
+        return None
+    df = libro[hoja]
+    filtros = dict(filtros)
+    if 'PERIODO' in filtros:
+        df = filas_periodo(df, filtros.pop('PERIODO'))
+    for columna, valor in filtros.items():
+        df = df[df[columna] == valor]
+    return df
+
+def valores_hoja(hoja, columna):
+    """Valores distintos de una columna de la hoja, ordenados"""
+    almacen = get_almacen()
+    if almacen is not None:
+        return almacen_sqlite.valores(almacen, hoja, columna)
     
-    if df_mes.empty:
-        return 0, 0
+    libro = load_libro_data()
     
-    # Limpiar espacios en blanco
-    df_mes['NIVEL 2'] = df_mes['NIVEL 2'].astype(str).str.strip()
-    df_mes['NIVEL 3'] = df_mes['NIVEL 3'].astype(str).str.strip()
+    if libro is None:
+        return []
+    return np.unique(libro[hoja][columna].to_numpy()).tolist()
+
+def hay_registros(hoja):
+    """True si la hoja MANTRA o DRIVE tiene filas (se ve en los cubos)"""
+    cubos = get_cubos()
+    return cubos is not None and not cubos[hoja].empty
+
+@cache_por_version(por_dia=True)
+def get_cubos():
+    """Cubos de MANTRA, DRIVE e instaladas por día: los meses cerrados salen del
+    histórico congelado y solo el mes abierto se agrega en vivo (ver historico_ftth).
+    Con el backend SQLite se calculan con GROUP BY en el almacén."""
+    almacen = get_almacen()
+    if almacen is not None:
+        return almacen_sqlite.cubos(almacen)
     
-    # Total de leads para ese mes
-    total_leads = len(df_mes)
+    libro = load_libro_data()
     
-    # Conversión: Con Cobertura + Contrato OK para ese mes
-    df_conversion = df_mes[
-        (df_mes['NIVEL 2'] == 'Con Cobertura') & 
-        (df_mes['NIVEL 3'] == 'Contrato OK')
-    ]
-    total_conversion = len(df_conversion)
+    if libro is None:
+        return None
+    return historico_ftth.cubos_libro(libro, EXCEL_PATH)
+
+@cache_por_version()
+def get_resumen_mensual():
+    """Métricas de MANTRA y DRIVE de todos los meses, sumadas desde los cubos
+    (ver agregados_ftth.resumen_mensual)"""
+    cubos = get_cubos() or {}
+    return resumen_mensual(cubos.get('MANTRA'), cubos.get('DRIVE'))
+
+def get_periodos():
+    """Períodos (AAAAMM) con registros en MANTRA o DRIVE, del más antiguo al
+    más reciente: son los meses del selector principal"""
+    return [int(periodo) for periodo in get_resumen_mensual().index if periodo > 0]
+
+def get_metricas_mes(periodo):
+    """Métricas de un mes (dict) desde el resumen mensual; 0 si el mes no tiene datos"""
+    resumen = get_resumen_mensual()
     
-    return total_leads, total_conversion
+    if periodo in resumen.index:
+        return {metrica: int(valor) for metrica, valor in resumen.loc[periodo].items()}
+    return dict.fromkeys(resumen.columns, 0)
 
-@st.cache_data(ttl=3600)
-def get_conversion_mantra_mes(mes_seleccionado="Noviembre"):
+def get_total_leads_and_conversion(periodo):
+    """Obtiene total de leads y conversión para un mes específico"""
+    if not hay_registros('MANTRA'):
+        return 6589, 299  # Valores por defecto si no hay datos
+    
+    # Conversión: Con Cobertura + Contrato OK para ese mes
+    metricas = get_metricas_mes(periodo)
+    return metricas['LEADS'], metricas['CONTRATO_OK']
+
+def get_conversion_mantra_mes(periodo):
     """Calcula la conversión: Ventas Instaladas (DRIVE) / Con Cobertura (MANTRA)
     = Transacciones INSTALADAS en DRIVE / Registros con cobertura en MANTRA"""
-    df_mantra = load_mantra_data()
-    df_drive = load_drive_data()
-    
-    if df_mantra is None or df_mantra.empty or df_drive is None or df_drive.empty:
-        return 0
+    metricas = get_metricas_mes(periodo)
+    con_cobertura = metricas['CON_COBERTURA']
     
-    # Obtener Con Cobertura de MANTRA para el mes
-    df_mes_mantra = df_mantra[df_mantra['Mes'] == mes_seleccionado].copy()
-    df_mes_mantra['NIVEL 2'] = df_mes_mantra['NIVEL 2'].astype(str).str.strip()
-    con_cobertura = len(df_mes_mantra[df_mes_mantra['NIVEL 2'] == 'Con Cobertura'])
-    
-    if con_cobertura == 0:
-        return 0
-    
-    # Obtener Ventas INSTALADAS del DRIVE para el mes
     # Solo contar ESTADO = 'INSTALADO' (no PENDIENTE ni CANCELADO)
-    ventas_instaladas = count_instaladas_con_regla(df_drive, None, mes_nombre=mes_seleccionado)
+    ventas_instaladas = metricas['INSTALADAS']
     
-    if ventas_instaladas == 0:
+    if con_cobertura == 0 or ventas_instaladas == 0:
         return 0
     
     # Conversión = Ventas Instaladas / Con Cobertura
-    conversion_pct = round((ventas_instaladas / con_cobertura * 100)) if con_cobertura > 0 else 0
-    return conversion_pct
+    return round((ventas_instaladas / con_cobertura * 100))
 
-@st.cache_data(ttl=3600)
-def get_con_cobertura_count(mes_seleccionado="Noviembre"):
+def get_con_cobertura_count(periodo):
     """Obtiene el conteo de 'Con Cobertura' para un mes específico"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return 0
-    
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado]
-    
-    if df_mes.empty:
-        return 0
-    
-    # Limpiar espacios en blanco
-    df_mes['NIVEL 2'] = df_mes['NIVEL 2'].astype(str).str.strip()
-    
-    # Contar "Con Cobertura"
-    con_cobertura = len(df_mes[df_mes['NIVEL 2'] == 'Con Cobertura'])
-    
-    return con_cobertura
+    return get_metricas_mes(periodo)['CON_COBERTURA']
 
-@st.cache_data(ttl=3600)
-def get_cancelados_mes(mes_seleccionado="Noviembre"):
+def get_cancelados_mes(periodo):
     """Obtiene el conteo de cancelados para un mes específico usando columna MES"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
-    
-    # Determinar número de mes
-    mes_numeros = {
-        'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-        'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-        'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-    }
-    mes_num = mes_numeros.get(mes_seleccionado, None)
-    
-    if mes_num is None:
-        return 0
-    
-    # Filtrar por MES column si existe, sino por FECHA
-    if 'MES' in df_drive.columns:
-        df_mes = df_drive[
-            (df_drive['MES'] == mes_seleccionado) &
-            (df_drive['ESTADO'] == 'CANCELADO')
-        ]
-    else:
-        # Fallback a FECHA
-        df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-        # Para Noviembre, incluir Octubre + Noviembre
-        if mes_num == 11:
-            df_mes = df_drive[
-                ((df_drive['FECHA'].dt.month == 10) | (df_drive['FECHA'].dt.month == 11)) &
-                (df_drive['ESTADO'] == 'CANCELADO')
-            ]
-        else:
-            df_mes = df_drive[
-                (df_drive['FECHA'].dt.month == mes_num) &
-                (df_drive['ESTADO'] == 'CANCELADO')
-            ]
-    
-    cancelados = len(df_mes)
-    return cancelados
+    return get_metricas_mes(periodo)['CANCELADAS']
 
-@st.cache_data
-def get_instaladas_mes(mes_seleccionado="Noviembre"):
+def get_instaladas_mes(periodo):
     """Obtiene el conteo de instaladas para un mes específico
     Regla: Solo INSTALADO (no incluye PENDIENTE)
     Filtra por columna MES"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
-    
-    df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-    
-    # Determinar número de mes
-    mes_numeros = {
-        'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-        'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-        'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-    }
-    mes_num = mes_numeros.get(mes_seleccionado, None)
-    
-    if mes_num is None:
-        return 0
-    
-    # Para Noviembre, incluir Octubre + Noviembre
-    es_noviembre = mes_num == 11
-    instaladas = count_instaladas_con_regla(df_drive, mes_num, es_noviembre, mes_seleccionado)
-    
-    return instaladas
+    return get_metricas_mes(periodo)['INSTALADAS']
 
-def get_ventas_generales_mes(mes_seleccionado="Noviembre"):
+def get_ventas_generales_mes(periodo):
     """Obtiene el total de TODAS las transacciones del mes
     = INSTALADAS + PENDIENTES + CANCELADAS
     Filtra por columna MES"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
-    
-    # Filtrar por mes usando columna MES
-    if 'MES' in df_drive.columns:
-        df_mes = df_drive[df_drive['MES'] == mes_seleccionado]
-    else:
-        # Fallback a FECHA si MES no existe
-        mes_numeros = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros.get(mes_seleccionado, None)
-        df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-        df_mes = df_drive[df_drive['FECHA'].dt.month == mes_num]
-    
-    # Total de TODAS las transacciones
-    total_transacciones = len(df_mes)
-    return total_transacciones
+    return get_metricas_mes(periodo)['VENTAS']
 
-@st.cache_data(ttl=3600)
-def get_no_pago_mes(mes_seleccionado="Noviembre"):
+def get_no_pago_mes(periodo):
     """Obtiene el conteo de NO PAGO para un mes específico usando columna MES"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
-    
-    # Determinar número de mes
-    mes_numeros = {
-        'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-        'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-        'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-    }
-    mes_num = mes_numeros.get(mes_seleccionado, None)
-    
-    if mes_num is None:
-        return 0
-    
-    # Limpiar espacios en blanco en MOTIVO CANCELACIÓN
-    df_drive['MOTIVO CANCELACIÓN'] = df_drive['MOTIVO CANCELACIÓN'].astype(str).str.strip()
-    
-    # Filtrar por MES column si existe, sino por FECHA
-    if 'MES' in df_drive.columns:
-        df_mes = df_drive[
-            (df_drive['MES'] == mes_seleccionado) &
-            (df_drive['MOTIVO CANCELACIÓN'] == 'NO PAGO')
-        ]
-    else:
-        # Fallback a FECHA
-        df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-        # Para Noviembre, incluir Octubre + Noviembre
-        if mes_num == 11:
-            df_mes = df_drive[
-                ((df_drive['FECHA'].dt.month == 10) | (df_drive['FECHA'].dt.month == 11)) &
-                (df_drive['MOTIVO CANCELACIÓN'] == 'NO PAGO')
-            ]
-        else:
-            df_mes = df_drive[
-                (df_drive['FECHA'].dt.month == mes_num) &
-                (df_drive['MOTIVO CANCELACIÓN'] == 'NO PAGO')
-            ]
-    
-    no_pago = len(df_mes)
-    return no_pago
+    return get_metricas_mes(periodo)['NO_PAGO']
 
-@st.cache_data(ttl=3600)
-def get_no_responde_mes(mes_seleccionado="Noviembre"):
+def get_no_responde_mes(periodo):
     """Obtiene el conteo de 'No Responde' para un mes específico desde MANTRA"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return 0
-    
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado]
-    
-    if df_mes.empty:
-        return 0
-    
-    # Limpiar espacios en blanco en NIVEL 1
-    df_mes['NIVEL 1'] = df_mes['NIVEL 1'].astype(str).str.strip()
-    
-    # Contar "No Responde"
-    no_responde = len(df_mes[df_mes['NIVEL 1'] == 'No Responde'])
-    
-    return no_responde
+    return get_metricas_mes(periodo)['NO_RESPONDE']
 
-@st.cache_data(ttl=3600)
-def get_no_especifica_mes(mes_seleccionado="Noviembre"):
+def get_no_especifica_mes(periodo):
     """Obtiene el conteo de 'No Especifica' para un mes específico desde MANTRA"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return 0
-    
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado]
-    
-    if df_mes.empty:
-        return 0
-    
-    # Limpiar espacios en blanco en NIVEL 2
-    df_mes['NIVEL 2'] = df_mes['NIVEL 2'].astype(str).str.strip()
-    
-    # Contar "No Especifica"
-    no_especifica = len(df_mes[df_mes['NIVEL 2'] == 'No Especifica'])
-    
-    return no_especifica
+    return get_metricas_mes(periodo)['NO_ESPECIFICA']
 
-@st.cache_data(ttl=3600)
-def get_sin_cobertura_mes(mes_seleccionado="Noviembre"):
+def get_sin_cobertura_mes(periodo):
     """Obtiene el conteo de 'Sin Cobertura' para un mes específico desde MANTRA"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return 0
-    
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado]
-    
-    if df_mes.empty:
-        return 0
-    
-    # Limpiar espacios en blanco en NIVEL 2
-    df_mes['NIVEL 2'] = df_mes['NIVEL 2'].astype(str).str.strip()
-    
-    # Contar "Sin Cobertura"
-    sin_cobertura = len(df_mes[df_mes['NIVEL 2'] == 'Sin Cobertura'])
-    
-    return sin_cobertura
-
-@st.cache_data(ttl=3600)
-def load_lista_metas():
-    """Carga los datos de metas por mes de la hoja LISTA"""
-    excel_path = os.path.join(os.path.dirname(__file__), 'REPORTE FTTH.xlsx')
-    
-    try:
-        df_lista = pd.read_excel(excel_path, sheet_name='LISTA')
-        return df_lista
-    except Exception as e:
-        return None
-
-@st.cache_data(ttl=30)  # Reducir para asegurar datos frescos
-def load_drive_data():
-    """Carga datos de la hoja DRIVE del archivo REPORTE FTTH.xlsx"""
-    excel_path = os.path.join(os.path.dirname(__file__), 'REPORTE FTTH.xlsx')
-    
-    try:
-        df_drive = pd.read_excel(excel_path, sheet_name='DRIVE')
-        return df_drive
-    except Exception as e:
-        return None
+    return get_metricas_mes(periodo)['SIN_COBERTURA']
 
-def count_instaladas_con_regla(df, fecha_mes_num, fecha_mes_es_noviembre=False, mes_nombre="Enero"):
+def count_instaladas_con_regla(df, periodo):
     """
     Cuenta instaladas aplicando regla para todos los meses.
     
@@ -355,174 +280,67 @@ def count_instaladas_con_regla(df, fecha_mes_num, fecha_mes_es_noviembre=False,
     
     Args:
         df: DataFrame del DRIVE
-        fecha_mes_num: número del mes (deprecated, usa mes_nombre)
-        fecha_mes_es_noviembre: si incluir Oct+Nov (deprecated)
-        mes_nombre: nombre del mes ('Enero', 'Diciembre', etc)
+        periodo: período AAAAMM del mes (202601 = Enero 2026)
     
     Returns:
         int: cantidad de instaladas según la regla
     """
-    # Preparar dataframe
-    df_temp = df.copy()
-    df_temp['ESTADO'] = df_temp['ESTADO'].astype(str).str.strip()
+    # ESTADO ya viene limpio y PERIODO calculado desde la carga
+    # Filtrar por el período de la venta (no por FECHA)
+    df_mes = filas_periodo(df, periodo)
     
-    # Filtrar por columna MES (no por FECHA)
-    if 'MES' in df_temp.columns:
-        df_mes = df_temp[df_temp['MES'] == mes_nombre]
-    else:
-        # Fallback a filtro por FECHA si MES no existe
-        df_temp['FECHA'] = pd.to_datetime(df_temp['FECHA'], errors='coerce')
-        if fecha_mes_es_noviembre:
-            df_mes = df_temp[
-                ((df_temp['FECHA'].dt.month == 10) | (df_temp['FECHA'].dt.month == 11))
-            ]
-        else:
-            df_mes = df_temp[df_temp['FECHA'].dt.month == fecha_mes_num]
-    
-    # Aplicar regla: Solo INSTALADO
-    df_instaladas = df_mes[df_mes['ESTADO'] == 'INSTALADO']
-    
-    return len(df_instaladas)
+    # Aplicar regla: Solo INSTALADO (se cuentan las filas sin copiarlas)
+    return int((df_mes['ESTADO'] == 'INSTALADO').sum())
 
-@st.cache_data(ttl=3600)
+@cache_por_version()
 def get_meses_disponibles():
-    """Obtiene lista de meses únicos disponibles en los datos con su año.
-    Retorna lista de tuplas (mes_año, mes_nombre, año)"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return []
-    
-    df_temp = df_drive.copy()
-    df_temp['FECHA'] = pd.to_datetime(df_temp['FECHA'], errors='coerce')
-    
-    # Extraer año y mes
-    df_temp['AÑO'] = df_temp['FECHA'].dt.year
-    df_temp['MES_NUM'] = df_temp['FECHA'].dt.month
-    
-    # Obtener combinaciones únicas de año y mes
-    meses_unicos = df_temp.groupby(['AÑO', 'MES_NUM']).size().reset_index(name='count')
-    meses_unicos = meses_unicos.sort_values(['AÑO', 'MES_NUM'], ascending=[False, False])
-    
-    # Mapear números a nombres
-    mes_nombres = {
-        1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril',
-        5: 'Mayo', 6: 'Junio', 7: 'Julio', 8: 'Agosto',
-        9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
-    }
+    """Obtiene lista de meses (según la FECHA de las ventas) disponibles en los
+    datos, del más reciente al más antiguo.
+    Retorna lista de tuplas (mes_año, periodo)"""
+    # Períodos distintos de las fechas (PERIODO_FECHA viene de la carga; 0 = sin fecha)
+    periodos = valores_hoja('DRIVE', 'PERIODO_FECHA')[::-1]
     
     # Crear lista con formato "Mes Año"
-    meses_disponibles = []
-    for _, row in meses_unicos.iterrows():
-        año = int(row['AÑO'])
-        mes_num = int(row['MES_NUM'])
-        mes_nombre = mes_nombres[mes_num]
-        mes_año = f"{mes_nombre} {año}"
-        meses_disponibles.append((mes_año, mes_nombre, año, mes_num))
-    
-    return meses_disponibles
-
-@st.cache_data(ttl=3600)
-def debug_instaladas_por_dia(mes_seleccionado="Febrero", dia=3):
+    return [(etiqueta_periodo(int(periodo)), int(periodo)) for periodo in periodos if periodo > 0]
+
+@cache_por_version()
+def debug_instaladas_por_dia(periodo, dia=3):
     """Función de debug para ver qué registros hay en un día específico"""
-    df_drive = load_drive_data()
+    # Filtrar por mes (período de la FECHA) y día
+    df_filtrado = filas_hoja('DRIVE', {'PERIODO_FECHA': periodo, 'DIA': dia})
     
-    if df_drive is None or df_drive.empty:
+    if df_filtrado is None:
         return None
     
-    df_temp = df_drive.copy()
-    
-    # Sin limpiezas, solo conversion
-    df_temp['FECHA'] = pd.to_datetime(df_temp['FECHA'], errors='coerce')
-    
-    # Filtrar por mes y día
-    mes_numeros = {
-        'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-        'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-        'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-    }
-    
-    mes_num = mes_numeros.get(mes_seleccionado, None)
-    
-    df_temp['FECHA_MES'] = df_temp['FECHA'].dt.month
-    df_temp['FECHA_DIA'] = df_temp['FECHA'].dt.day
-    
-    # Filtrar por mes y día
-    df_filtrado = df_temp[(df_temp['FECHA_MES'] == mes_num) & (df_temp['FECHA_DIA'] == dia)]
-    
     # Retornar TODOS los registros sin filtrar
     return df_filtrado
 
-@st.cache_data(ttl=60)  # Reducir a 60 segundos para debug
-def get_instaladas_por_semana(mes_seleccionado="Noviembre"):
+@cache_por_version(por_dia=True)
+def get_instaladas_por_semana(periodo):
     """Obtiene VENTAS por DÍA para un mes específico.
     VENTAS = todos los registros del mes (sin importar PAGO o ESTADO)
     Retorna un DataFrame con día y cantidad de ventas
     Filtra por fecha actual para no mostrar registros futuros"""
-    df_drive = load_drive_data()
+    # Filtrar por el período exacto de la FECHA (PERIODO_FECHA y DIA se calculan
+    # al cargar; las filas sin fecha tienen período 0): el año ya forma parte del
+    # período y todos sus días son válidos
+    df_mes = filas_hoja('DRIVE', {'PERIODO_FECHA': periodo})
     
-    if df_drive is None or df_drive.empty:
+    if df_mes is None or df_mes.empty:
         return pd.DataFrame()
     
-    # Conversión simple, sin limpieza excesiva
-    df_temp = df_drive.copy()
-    df_temp['FECHA'] = pd.to_datetime(df_temp['FECHA'], errors='coerce')
-    
-    # Mapeo de meses
-    mes_numeros = {
-        'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-        'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-        'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-    }
-    
-    mes_num = mes_numeros.get(mes_seleccionado, None)
-    if mes_num is None:
-        return pd.DataFrame()
-    
-    # Filtrar por fecha válida
-    df_temp = df_temp[df_temp['FECHA'].notna()]
-    
     # FILTRO POR FECHA ACTUAL - no mostrar fechas futuras
     fecha_actual = pd.Timestamp.today()
-    df_temp = df_temp[df_temp['FECHA'] <= fecha_actual]
-    
-    # Extraer mes y año de FECHA
-    df_temp['FECHA_MES'] = df_temp['FECHA'].dt.month
-    df_temp['FECHA_AÑO'] = df_temp['FECHA'].dt.year
-    df_temp['FECHA_DIA'] = df_temp['FECHA'].dt.day
-    
-    # Filtrar por mes exacto
-    df_mes = df_temp[df_temp['FECHA_MES'] == mes_num].copy()
-    
-    if df_mes.empty:
-        return pd.DataFrame()
-    
-    # Si hay múltiples años, tomar el más reciente
-    año_filtro = df_mes['FECHA_AÑO'].max()
-    df_mes = df_mes[df_mes['FECHA_AÑO'] == año_filtro]
+    df_mes = df_mes[df_mes['FECHA'] <= fecha_actual]
     
     # Filtrar VENTAS - todos los registros sin importar PAGO o ESTADO
-    df_ventas = df_mes.copy()
-    
-    if df_ventas.empty:
-        return pd.DataFrame()
-    
-    # Validar días válidos del mes
-    if mes_num == 12:
-        último_día_mes = pd.Timestamp(year=año_filtro+1, month=1, day=1) - pd.DateOffset(days=1)
-    else:
-        último_día_mes = pd.Timestamp(year=año_filtro, month=mes_num+1, day=1) - pd.DateOffset(days=1)
-    
-    último_día_válido = último_día_mes.day
-    
-    # Filtrar días válidos
-    df_ventas = df_ventas[(df_ventas['FECHA_DIA'] >= 1) & (df_ventas['FECHA_DIA'] <= último_día_válido)]
+    df_ventas = df_mes
     
     if df_ventas.empty:
         return pd.DataFrame()
     
     # Contar por día
-    df_dias = df_ventas.groupby('FECHA_DIA').size().reset_index(name='INSTALADAS')
+    df_dias = df_ventas.groupby('DIA').size().reset_index(name='INSTALADAS')
     df_dias.columns = ['DIA', 'INSTALADAS']
     
     # Crear etiquetas
@@ -531,7 +349,7 @@ def get_instaladas_por_semana(mes_seleccionado="Noviembre"):
         5: 'May', 6: 'Jun', 7: 'Jul', 8: 'Ago',
         9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dic'
     }
-    mes_str = mes_nombres_cortos[mes_num]
+    mes_str = mes_nombres_cortos[periodo % 100]
     
     df_dias['DIA_ETIQUETA'] = df_dias['DIA'].astype(str) + ' ' + mes_str
     
@@ -541,288 +359,400 @@ def get_instaladas_por_semana(mes_seleccionado="Noviembre"):
     
     return result
 
-@st.cache_data(ttl=3600)
-def get_comparativo_semanas_multiples_meses():
-    """Obtiene un comparativo de instaladas por DÍA para todos los meses disponibles.
-    Retorna un DataFrame con día y cantidad por cada mes
-    Filtra por fecha actual para no mostrar registros futuros"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
+# Los comparativos entre meses salen de una única matriz día × período de
+# instaladas. Las columnas de los períodos cerrados no cambian (son las del
+# histórico congelado): se calculan una vez por proceso con los períodos y la
+# firma de sus registros como clave, sin la versión de los datos, y al cambiar
+# el Excel solo se recalculan las columnas de los períodos abiertos. La firma
+# cambia si un período se vuelve a congelar tras una corrección tardía.
+@st.cache_resource(max_entries=4)
+def get_matriz_instaladas_cerradas(periodos, firma):
+    """Instaladas por día de los períodos cerrados (tupla de períodos AAAAMM)"""
+    cubos = get_cubos()
+    
+    if cubos is None:
         return pd.DataFrame()
+    return matriz_instaladas_dia(cubos['INSTALADAS_DIA'], periodos)
+
+@cache_por_version(por_dia=True)
+def get_matriz_instaladas_dia():
+    """Instaladas por día (filas) y período AAAAMM (columnas, en orden
+    cronológico) de todos los meses, sin fechas futuras ni filas sin mes"""
+    cubos = get_cubos()
     
-    df_temp = df_drive.copy()
-    df_temp['ESTADO'] = df_temp['ESTADO'].astype(str).str.strip()
-    df_temp['FECHA'] = pd.to_datetime(df_temp['FECHA'], errors='coerce')
-    
-    # FILTRO POR FECHA ACTUAL - no mostrar fechas futuras
-    fecha_actual = pd.Timestamp.today()
-    df_temp = df_temp[df_temp['FECHA'] <= fecha_actual]
-    
-    # Filtrar solo instaladas
-    df_instaladas = df_temp[df_temp['ESTADO'] == 'INSTALADO'].copy()
-    
-    if df_instaladas.empty:
+    if cubos is None or cubos['INSTALADAS_DIA'].empty:
         return pd.DataFrame()
     
-    # Obtener columna MES si existe, sino calcularla
-    if 'MES' not in df_instaladas.columns:
-        mes_nombres = {
-            1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril',
-            5: 'Mayo', 6: 'Junio', 7: 'Julio', 8: 'Agosto',
-            9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
-        }
-        df_instaladas['MES'] = df_instaladas['FECHA'].dt.month.map(mes_nombres)
-    
-    # Extraer día del mes
-    df_instaladas['DIA'] = df_instaladas['FECHA'].dt.day
-    
-    # Agrupar por mes y día
-    df_pivot = df_instaladas.groupby(['MES', 'DIA']).size().reset_index(name='INSTALADAS')
-    
-    # Crear tabla pivote (meses como columnas, días como filas)
-    df_comparativo = df_pivot.pivot(index='DIA', columns='MES', values='INSTALADAS').fillna(0).astype(int)
+    # Los períodos cerrados se deciden con los estados del cubo de DRIVE
+    cubo = cubos['INSTALADAS_DIA']
+    periodos_cubo = cubo.index.get_level_values('PERIODO')
+    cerrados = tuple(historico_ftth.periodos_cerrados(cubos['DRIVE'].index.to_frame(index=False)))
+    abiertos = [periodo for periodo in periodos_cubo.unique() if periodo > 0 and periodo not in cerrados]
+    firma = int(pd.util.hash_pandas_object(cubo[periodos_cubo.isin(cerrados)]).sum())
     
-    # Ordenar por día
-    df_comparativo = df_comparativo.sort_index()
-    
-    return df_comparativo
+    matriz = pd.concat(
+        [get_matriz_instaladas_cerradas(cerrados, firma), matriz_instaladas_dia(cubo, abiertos)], axis=1
+    )
+    return matriz.sort_index().sort_index(axis=1).fillna(0).astype(int)
 
+def get_comparativo_semanas_multiples_meses():
+    """Obtiene un comparativo de instaladas por DÍA para todos los meses disponibles.
+    Retorna un DataFrame con día y cantidad por cada mes (columnas = períodos
+    AAAAMM, en orden cronológico), ver get_matriz_instaladas_dia
+    Filtra por fecha actual para no mostrar registros futuros"""
+    return get_matriz_instaladas_dia()
+
+@cache_por_version(por_dia=True)
 def get_comparativo_acumulativo_multiples_meses():
     """Obtiene un comparativo ACUMULATIVO de instaladas para todos los meses disponibles.
     Retorna un DataFrame con día y cantidad acumulada por cada mes
     Filtra por fecha actual para no mostrar registros futuros"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return pd.DataFrame()
-    
-    df_temp = df_drive.copy()
-    df_temp['ESTADO'] = df_temp['ESTADO'].astype(str).str.strip()
-    df_temp['FECHA'] = pd.to_datetime(df_temp['FECHA'], errors='coerce')
-    
-    # FILTRO POR FECHA ACTUAL - no mostrar fechas futuras
-    fecha_actual = pd.Timestamp.today()
-    df_temp = df_temp[df_temp['FECHA'] <= fecha_actual]
-    
-    # Filtrar solo instaladas
-    df_instaladas = df_temp[df_temp['ESTADO'] == 'INSTALADO'].copy()
-    
-    if df_instaladas.empty:
-        return pd.DataFrame()
-    
-    # Obtener columna MES si existe, sino calcularla
-    if 'MES' not in df_instaladas.columns:
-        mes_nombres = {
-            1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril',
-            5: 'Mayo', 6: 'Junio', 7: 'Julio', 8: 'Agosto',
-            9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'
+    # Calcular acumulados para cada mes sobre la misma matriz día × período
+    return get_matriz_instaladas_dia().cumsum()
+
+def generar_tabla_horario(periodo):
+    """Meta, instaladas, pendientes y alcance de cada asesor del mes, separados
+    en FULL TIME (meta 60 o 45) y PART TIME"""
+    # LISTA y DRIVE ya vienen normalizados desde la carga
+    df_mes_drive = filas_hoja('DRIVE', {'PERIODO': periodo})
+    
+    # Obtener datos de LISTA
+    df_mes_lista = filas_hoja('LISTA', {'PERIODO': periodo})
+    
+    if df_mes_lista is None or df_mes_drive is None:
+        return None, None
+    
+    # Clasificar asesores por horario: FULL TIME son meta 60 o meta 45, resto es PART TIME
+    full_time = df_mes_lista[(df_mes_lista['Meta'] == 60) | (df_mes_lista['Meta'] == 45)]['Asesor'].tolist()
+    part_time = df_mes_lista[(df_mes_lista['Meta'] != 60) & (df_mes_lista['Meta'] != 45)]['Asesor'].tolist()
+    
+    def procesar_horario(lista_asesoras):
+        datos_tabla = []
+        total_meta = 0
+        total_instalado = 0
+        total_pendiente = 0
+        
+        for idx, asesor in enumerate(lista_asesoras, 1):
+            # Meta
+            meta = df_mes_lista[df_mes_lista['Asesor'] == asesor]['Meta'].sum()
+            if meta == 0:
+                meta = 0
+            
+            # Instalado y Pendiente
+            df_asesor = df_mes_drive[df_mes_drive['ASESOR'] == asesor]
+            instalado = len(df_asesor[df_asesor['ESTADO'] == 'INSTALADO'])
+            pendiente = len(df_asesor[df_asesor['ESTADO'] == 'PENDIENTE'])
+            
+            # Alcance (Cumplimiento)
+            alcance = round((instalado / meta * 100)) if meta > 0 else 0
+            
+            datos_tabla.append({
+                'pos': idx,
+                'asesor': asesor,
+                'meta': int(meta),
+                'instalado': int(instalado),
+                'pendiente': int(pendiente),
+                'alcance': int(alcance)
+            })
+            
+            total_meta += meta
+            total_instalado += instalado
+            total_pendiente += pendiente
+        
+        # Ordenar datos por alcance de mayor a menor
+        datos_tabla_ordenado = sorted(datos_tabla, key=lambda x: x['alcance'], reverse=True)
+        
+        # Actualizar posiciones después del ordenamiento
+        for idx, item in enumerate(datos_tabla_ordenado, 1):
+            item['pos'] = idx
+        
+        return {
+            'datos': datos_tabla_ordenado,
+            'totales': {
+                'meta': int(total_meta),
+                'instalado': int(total_instalado),
+                'pendiente': int(total_pendiente),
+                'alcance': round((total_instalado / total_meta * 100)) if total_meta > 0 else 0
+            }
         }
-        df_instaladas['MES'] = df_instaladas['FECHA'].dt.month.map(mes_nombres)
-    
-    # Extraer día del mes
-    df_instaladas['DIA'] = df_instaladas['FECHA'].dt.day
     
-    # Agrupar por mes y día
-    df_pivot = df_instaladas.groupby(['MES', 'DIA']).size().reset_index(name='INSTALADAS')
+    datos_full_time = procesar_horario(full_time)
+    datos_part_time = procesar_horario(part_time)
     
-    # Crear tabla pivote (meses como columnas, días como filas)
-    df_comparativo = df_pivot.pivot(index='DIA', columns='MES', values='INSTALADAS').fillna(0).astype(int)
-    
-    # Ordenar por día
-    df_comparativo = df_comparativo.sort_index()
-    
-    # Calcular acumulados para cada mes
-    df_acumulativo = df_comparativo.cumsum()
-    
-    return df_acumulativo
+    return datos_full_time, datos_part_time
 
-@st.cache_data(ttl=3600)
-def get_nombres_alternativos(asesor):
-    """Obtiene múltiples variantes del nombre del asesor para búsqueda flexible"""
-    nombres = [asesor.strip()]
-    # Agregar variante sin números al final (ej: ST2_VTP -> ST_VTP)
-    import re
-    nombre_sin_num = re.sub(r'(\d+)(_VTP)$', r'\2', asesor)
-    if nombre_sin_num != asesor:
-        nombres.append(nombre_sin_num)
-    # Agregar variante con número (ej: ST_VTP -> ST2_VTP)
-    nombre_con_num = re.sub(r'(_VTP)$', r'2_VTP', asesor.replace('2_VTP', '_VTP'))
-    if nombre_con_num != asesor and '2_VTP' in nombre_con_num:
-        nombres.append(nombre_con_num)
-    return nombres
-
-def get_pendientes_asesor_mes(asesor, mes_seleccionado="Enero"):
-    """Obtiene cantidad de transacciones PENDIENTE por asesor para un mes"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
+def crear_tabla_html_horario(datos_horario, nombre_horario, color_header, color_accent):
+    if datos_horario is None or not datos_horario['datos']:
+        return ""
     
-    # Limpiar espacios en los nombres de asesor
-    df_drive['ASESOR'] = df_drive['ASESOR'].astype(str).str.strip()
-    asesor = asesor.strip()
+    html = f'''<div style="margin: 20px 0; background: white; border-radius: 8px; overflow: auto; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+            <table style="width: 100%; border-collapse: collapse; font-family: Arial, sans-serif; min-width: 100%;">
+            <thead>
+                <tr style="background: {color_header}; color: white;">
+                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">Nº ASESOR</th>
+                    <th style="padding: 12px; text-align: left; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2); min-width: 170px;">ASESOR</th>
+                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">OBJETIVO</th>
+                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">INSTALADO</th>
+                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">PENDIENTE</th>
+                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">% ALCANCE</th>
+                </tr>
+            </thead>
+            <tbody>
+            '''
     
-    # Obtener nombres alternativos
-    nombres_alternativos = get_nombres_alternativos(asesor)
+    # Agregar filas de datos (una columna por campo, ver tablas_html)
+    datos = pd.DataFrame(datos_horario['datos'])
+    html += filas_html(
+        '''<tr style="background-color: {color_fila}; border-bottom: 1px solid #e5e7eb;">
+                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; color: {color_accent};">#{pos}</td>
+                    <td style="padding: 10px 12px; text-align: left; font-weight: 500; font-size: 11px;">{asesor}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px;">{meta}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; color: #10b981;">{instalado}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; color: #f59e0b;">{pendiente}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; background-color: {alcance_color}22; color: {alcance_color}; border-radius: 4px;">{alcance}%</td>
+                </tr>''',
+        color_fila=alternar(datos['pos'], '#f9fafb', '#ffffff'),
+        color_accent=color_accent,
+        pos=datos['pos'],
+        asesor=datos['asesor'],
+        meta=datos['meta'],
+        instalado=datos['instalado'],
+        pendiente=datos['pendiente'],
+        alcance_color=por_cumplimiento(datos['alcance'], VERDE, NARANJA, ROJO),
+        alcance=datos['alcance'],
+    )
     
-    # Filtrar por mes y asesor (probando múltiples nombres)
-    if 'MES' in df_drive.columns:
-        df_mes_asesor = df_drive[(df_drive['MES'] == mes_seleccionado) & (df_drive['ASESOR'].isin(nombres_alternativos))]
-    else:
-        mes_numeros = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros.get(mes_seleccionado, None)
-        if mes_num is None:
-            return 0
-        df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-        df_mes_asesor = df_drive[(df_drive['FECHA'].dt.month == mes_num) & (df_drive['ASESOR'].isin(nombres_alternativos))]
-    
-    # Contar PENDIENTE
-    df_mes_asesor['ESTADO'] = df_mes_asesor['ESTADO'].astype(str).str.strip()
-    pendientes = len(df_mes_asesor[df_mes_asesor['ESTADO'] == 'PENDIENTE'])
-    return pendientes
-
-def get_leads_asesor_mes(asesor, mes_seleccionado="Enero"):
-    """Obtiene el total de leads asignados a un asesor en un mes de MANTRA"""
-    df_mantra = load_mantra_data()
+    # Agregar fila de totales
+    totales = datos_horario['totales']
+    alcance_total_color = por_cumplimiento(totales['alcance'], VERDE, NARANJA, ROJO)
+    html += f'''<tr style="background: {color_header}; color: white; font-weight: 700;">
+                    <td colspan="2" style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['meta']}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['meta']}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['instalado']}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['pendiente']}</td>
+                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white; background-color: {alcance_total_color}40; border-radius: 4px;">{totales['alcance']}%</td>
+                </tr>
+            </tbody>
+            </table>
+            </div>'''
     
-    if df_mantra is None or df_mantra.empty:
-        return 0
+    return html
+
+@cache_por_version()
+def get_tablas_horario_html(periodo):
+    """Tablas HTML de FULL TIME y PART TIME del mes"""
+    datos_full_time, datos_part_time = generar_tabla_horario(periodo)
+    return (
+        crear_tabla_html_horario(datos_full_time, "FULL TIME", "#3b82f6", "#3b82f6"),
+        crear_tabla_html_horario(datos_part_time, "PART TIME", "#8b5cf6", "#8b5cf6"),
+    )
+
+@cache_por_version(por_dia=True)
+def get_figura_instaladas_semana(periodo, mes_display):
+    """Gráfico de ventas por día del mes (ver get_instaladas_por_semana)"""
+    df_semanas = get_instaladas_por_semana(periodo)
     
-    # Limpiar espacios en los nombres de asesor
-    df_mantra['Agente'] = df_mantra['Agente'].astype(str).str.strip()
-    asesor = asesor.strip()
+    # Crear gráfico de barras
+    fig_semanas = go.Figure()
     
-    # Obtener nombres alternativos
-    nombres_alternativos = get_nombres_alternativos(asesor)
+    fig_semanas.add_trace(go.Bar(
+        x=df_semanas['DIA'],
+        y=df_semanas['INSTALADAS'],
+        marker=dict(
+            color=df_semanas['INSTALADAS'],
+            colorscale='Blues',
+            line=dict(color='white', width=2),
+            opacity=0.85,
+            showscale=True,
+            colorbar=dict(
+                title="Ventas",
+                tickfont=dict(size=10),
+                thickness=15,
+                len=0.7
+            )
+        ),
+        text=df_semanas['INSTALADAS'],
+        textposition='outside',
+        textfont=dict(size=13, color='#1e293b', family='Arial', weight='bold'),
+        hovertemplate='<b>%{x}</b><br><b>Ventas:</b> <b>%{y}</b><extra></extra>',
+        name='Ventas'
+    ))
     
-    # Obtener datos del asesor en MANTRA para el mes
-    df_mes_asesor = df_mantra[(df_mantra['Mes'] == mes_seleccionado) & (df_mantra['Agente'].isin(nombres_alternativos))]
+    fig_semanas.update_layout(
+        title=dict(
+            text=f"Distribución Diaria de Ventas - {mes_display}",
+            font=dict(size=16, color='#1e293b', family='Arial'),
+            x=0.5,
+            xanchor='center'
+        ),
+        height=550,
+        margin=dict(l=50, r=50, t=80, b=150),
+        xaxis_title="Día",
+        yaxis_title="Cantidad de Ventas",
+        xaxis=dict(
+            tickfont=dict(size=9, color='#64748b'),
+            tickangle=-90,
+        ),
+        yaxis=dict(
+            gridcolor='rgba(0,0,0,0.05)',
+            showgrid=True,
+            zeroline=False,
+            tickfont=dict(size=11, color='#64748b'),
+        ),
+        plot_bgcolor='rgba(248, 250, 252, 0.5)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=11, family='Arial', color='#1e293b'),
+        hovermode='x unified',
+        showlegend=False
+    )
     
-    # Total de leads (registros)
-    total_leads = len(df_mes_asesor)
-    return total_leads
+    return fig_semanas
 
-def get_con_cobertura_asesor_mes(asesor, mes_seleccionado="Enero"):
-    """Obtiene la cantidad de leads con cobertura para un asesor en un mes"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return 0
+@cache_por_version(por_dia=True)
+def get_figura_comparativo_acumulativo():
+    """Gráfico del comparativo acumulativo de instaladas de todos los meses;
+    None si no hay datos"""
+    df_comparativo = get_comparativo_acumulativo_multiples_meses()
     
-    # Limpiar espacios en los nombres de asesor
-    df_mantra['Agente'] = df_mantra['Agente'].astype(str).str.strip()
-    asesor = asesor.strip()
+    if df_comparativo.empty:
+        return None
     
-    # Obtener nombres alternativos
-    nombres_alternativos = get_nombres_alternativos(asesor)
+    # Crear gráfico de líneas para comparar meses
+    fig_comparativo = go.Figure()
+    
+    # Agregar línea por cada mes (columnas = períodos AAAAMM)
+    for periodo in df_comparativo.columns:
+        mes_col = etiqueta_periodo(periodo)
+        fig_comparativo.add_trace(go.Scatter(
+            x=df_comparativo.index,
+            y=df_comparativo[periodo],
+            mode='lines+markers',
+            name=mes_col,
+            line=dict(width=2.5),
+            marker=dict(size=6),
+            hovertemplate='<b>Día %{x}</b><br><b>' + mes_col + ':</b> %{y} acumuladas<extra></extra>'
+        ))
     
-    # Obtener datos del asesor en MANTRA para el mes
-    df_mes_asesor = df_mantra[(df_mantra['Mes'] == mes_seleccionado) & (df_mantra['Agente'].isin(nombres_alternativos))]
+    fig_comparativo.update_layout(
+        title=dict(
+            text="Comparativa Acumulativa de Instaladas por Día (Todos los Meses)",
+            font=dict(size=16, color='#1e293b', family='Arial'),
+            x=0.5,
+            xanchor='center'
+        ),
+        height=550,
+        margin=dict(l=60, r=60, t=80, b=80),
+        xaxis_title="Día del Mes",
+        yaxis_title="Total Acumulado de Instaladas",
+        xaxis=dict(
+            tickfont=dict(size=11, color='#64748b'),
+            tickmode='linear',
+            tick0=1,
+            dtick=2
+        ),
+        yaxis=dict(
+            gridcolor='rgba(0,0,0,0.05)',
+            showgrid=True,
+            zeroline=False,
+            tickfont=dict(size=11, color='#64748b'),
+        ),
+        plot_bgcolor='rgba(248, 250, 252, 0.5)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(size=11, family='Arial', color='#1e293b'),
+        hovermode='x unified',
+        legend=dict(
+            x=1.02,
+            y=1,
+            xanchor='left',
+            yanchor='top',
+            bgcolor='rgba(255, 255, 255, 0.8)',
+            bordercolor='#e2e8f0',
+            borderwidth=1
+        )
+    )
     
-    if df_mes_asesor.empty:
-        return 0
+    return fig_comparativo
+
+def load_indice_asesores():
+    """Índice de nombres de asesor (Agente, ASESOR, CODIGO DE CARGA, Asesor) con su
+    nombre canónico e ID entero, construido una vez por carga del libro"""
+    almacen = get_almacen()
+    if almacen is not None:
+        return get_indice_asesores_almacen(almacen)
     
-    # Limpiar espacios en NIVEL 2
-    df_mes_asesor['NIVEL 2'] = df_mes_asesor['NIVEL 2'].astype(str).str.strip()
+    libro = load_libro_data()
     
-    # Contar "Con Cobertura"
-    con_cobertura = len(df_mes_asesor[df_mes_asesor['NIVEL 2'] == 'Con Cobertura'])
-    return con_cobertura
+    if libro is None:
+        return None
+    return libro['ASESORES']
+
+@cache_por_version(recurso=True, max_entries=2)
+def get_indice_asesores_almacen(almacen):
+    """Índice de asesores leído del almacén SQLite, una vez por versión"""
+    return almacen_sqlite.indice_asesores(almacen)
 
-def get_conversion_asesor_mes(asesor, mes_seleccionado="Noviembre"):
+def get_nombres_alternativos(asesor):
+    """Obtiene múltiples variantes del nombre del asesor para búsqueda flexible"""
+    indice = load_indice_asesores()
+    
+    if indice is None:
+        return [asesor.strip()]
+    return variantes_asesor(indice, asesor)
+
+@cache_por_version()
+def get_metricas_por_agente():
+    """Métricas de MANTRA y DRIVE por (mes, agente/asesor), calculadas una sola
+    vez para todos los meses (ver agregados_ftth.metricas_por_agente)"""
+    cubos = get_cubos() or {}
+    return metricas_por_agente(cubos.get('MANTRA'), cubos.get('DRIVE'))
+
+def get_metricas_asesores(asesores, periodo):
+    """Leads, Con Cobertura, Pendientes, Conversión, Instaladas y Canceladas de
+    varios asesores en un mes, en una sola operación (DataFrame indexado por asesor)"""
+    asesores = [asesor.strip() for asesor in asesores]
+    indice = load_indice_asesores()
+    
+    if indice is None:
+        indice = pd.DataFrame(columns=['NOMBRE_VTP', 'CANONICO', 'ID_ASESOR'])
+    return metricas_asesores(get_metricas_por_agente(), indice, periodo, asesores)
+
+def get_pendientes_asesor_mes(asesor, periodo):
+    """Obtiene cantidad de transacciones PENDIENTE por asesor para un mes"""
+    return int(get_metricas_asesores([asesor], periodo)['PENDIENTES'].iloc[0])
+
+def get_leads_asesor_mes(asesor, periodo):
+    """Obtiene el total de leads asignados a un asesor en un mes de MANTRA"""
+    return int(get_metricas_asesores([asesor], periodo)['LEADS'].iloc[0])
+
+def get_con_cobertura_asesor_mes(asesor, periodo):
+    """Obtiene la cantidad de leads con cobertura para un asesor en un mes"""
+    return int(get_metricas_asesores([asesor], periodo)['CON_COBERTURA'].iloc[0])
+
+def get_conversion_asesor_mes(asesor, periodo):
     """Calcula la conversión por asesor: Contrato OK / Con Cobertura (de MANTRA)
     Usando datos de MANTRA únicamente"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return 0
-    
-    # Limpiar espacios en los nombres de asesor
-    df_mantra['Agente'] = df_mantra['Agente'].astype(str).str.strip()
-    asesor = asesor.strip()
-    
-    # Obtener nombres alternativos
-    nombres_alternativos = get_nombres_alternativos(asesor)
-    
-    # Obtener datos del asesor en MANTRA para el mes
-    df_mes_mantra = None
-    for nombre in nombres_alternativos:
-        df_temp = df_mantra[(df_mantra['Mes'] == mes_seleccionado) & (df_mantra['Agente'] == nombre)].copy()
-        if not df_temp.empty:
-            df_mes_mantra = df_temp
-            break
-    
-    if df_mes_mantra is None or df_mes_mantra.empty:
-        return 0
-    
-    # Limpiar niveles
-    df_mes_mantra['NIVEL 2'] = df_mes_mantra['NIVEL 2'].astype(str).str.strip()
-    df_mes_mantra['NIVEL 3'] = df_mes_mantra['NIVEL 3'].astype(str).str.strip()
-    
-    # Con Cobertura
-    con_cobertura = len(df_mes_mantra[df_mes_mantra['NIVEL 2'] == 'Con Cobertura'])
-    
-    if con_cobertura == 0:
-        return 0
-    
-    # Contrato OK (Con Cobertura + Contrato OK)
-    contrato_ok = len(df_mes_mantra[
-        (df_mes_mantra['NIVEL 2'] == 'Con Cobertura') & 
-        (df_mes_mantra['NIVEL 3'] == 'Contrato OK')
-    ])
-    
-    # Conversión = Contrato OK / Con Cobertura
-    conversion_pct = round((contrato_ok / con_cobertura * 100)) if con_cobertura > 0 else 0
-    return conversion_pct
+    return int(get_metricas_asesores([asesor], periodo)['CONVERSION'].iloc[0])
 
-@st.cache_data(ttl=3600)
-def get_datos_mantra_mes(mes_seleccionado="Febrero"):
+@cache_por_version()
+def get_datos_mantra_mes(periodo):
     """Obtiene datos detallados de MANTRA para un mes específico sin agregación"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return pd.DataFrame()
-    
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado].copy()
-    
-    if df_mes.empty:
-        return pd.DataFrame()
+    # Filtrar por período (Agente y niveles ya vienen limpios desde la carga)
+    df_mes = filas_hoja('MANTRA', {'PERIODO': periodo})
     
-    # Limpiar espacios en blanco
-    df_mes['Agente'] = df_mes['Agente'].astype(str).str.strip()
-    df_mes['NIVEL 1'] = df_mes['NIVEL 1'].astype(str).str.strip()
-    df_mes['NIVEL 2'] = df_mes['NIVEL 2'].astype(str).str.strip()
-    df_mes['NIVEL 3'] = df_mes['NIVEL 3'].astype(str).str.strip()
+    if df_mes is None or df_mes.empty:
+        return pd.DataFrame()
     
     return df_mes
 
-@st.cache_data(ttl=3600)
-def get_casos_por_agente_nivel(mes_seleccionado="Febrero"):
+@cache_por_version()
+def get_casos_por_agente_nivel(periodo):
     """Obtiene casos por agente y nivel (1, 2, 3) desde MANTRA
     Retorna un DataFrame con información detallada para análisis"""
-    df_mantra = load_mantra_data()
-    
-    if df_mantra is None or df_mantra.empty:
-        return pd.DataFrame()
-    
-    # Filtrar por mes
-    df_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado].copy()
+    df_mes = get_datos_mantra_mes(periodo)
     
     if df_mes.empty:
         return pd.DataFrame()
     
-    # Limpiar espacios en blanco
-    df_mes['Agente'] = df_mes['Agente'].astype(str).str.strip()
-    df_mes['NIVEL 1'] = df_mes['NIVEL 1'].astype(str).str.strip()
-    df_mes['NIVEL 2'] = df_mes['NIVEL 2'].astype(str).str.strip()
-    df_mes['NIVEL 3'] = df_mes['NIVEL 3'].astype(str).str.strip()
-    
     # Agrupar por Agente
     agentes = df_mes['Agente'].unique()
     
@@ -831,14 +761,14 @@ def get_casos_por_agente_nivel(mes_seleccionado="Febrero"):
         df_agente = df_mes[df_mes['Agente'] == agente]
         total_casos = len(df_agente)
         
-        # Contar por NIVEL 1
-        nivel1_counts = df_agente['NIVEL 1'].value_counts().to_dict()
+        # Contar por NIVEL 1 (solo los valores presentes de la categoría)
+        nivel1_counts = df_agente['NIVEL 1'].value_counts().loc[lambda c: c > 0].to_dict()
         
         # Contar por NIVEL 2
-        nivel2_counts = df_agente['NIVEL 2'].value_counts().to_dict()
+        nivel2_counts = df_agente['NIVEL 2'].value_counts().loc[lambda c: c > 0].to_dict()
         
         # Contar por NIVEL 3
-        nivel3_counts = df_agente['NIVEL 3'].value_counts().to_dict()
+        nivel3_counts = df_agente['NIVEL 3'].value_counts().loc[lambda c: c > 0].to_dict()
         
         datos.append({
             'Agente': agente,
@@ -850,52 +780,34 @@ def get_casos_por_agente_nivel(mes_seleccionado="Febrero"):
     
     return pd.DataFrame(datos)
 
-def calculate_drive_metrics(metas_dict, mes_filtro=None, mes_nombre=None):
+def calculate_drive_metrics(metas_dict, periodo=None):
 
     """
     Calcula Cumplimiento y Efectividad por asesor usando datos de DRIVE
     
     Cumplimiento = INSTALADAS / META
     Efectividad = INSTALADAS / (INSTALADAS + CANCELADAS)
-    """
-    df_drive = load_drive_data()
     
-    if df_drive is None or df_drive.empty:
+    Filtra por el período de la venta (periodo)
+    """
+    if not hay_registros('DRIVE'):
         return {}
     
-    # Extraer columnas necesarias
-    df_drive = df_drive[['FECHA', 'MES', 'ASESOR', 'ESTADO', 'PAGO']].copy()
-    
-    # Filtrar por mes usando columna MES si está disponible
-    if mes_nombre and 'MES' in df_drive.columns:
-        df_drive = df_drive[df_drive['MES'] == mes_nombre]
-    elif mes_filtro:
-        # Fallback a FECHA si MES no existe
-        df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-        df_drive = df_drive[df_drive['FECHA'].dt.month == mes_filtro]
-    
-    # Contar INSTALADOS por asesor (solo INSTALADO, sin PENDIENTE)
-    df_drive_temp = df_drive.copy()
-    df_drive_temp['ESTADO'] = df_drive_temp['ESTADO'].astype(str).str.strip()
-    
-    # Solo INSTALADO
-    df_instalados = df_drive_temp[df_drive_temp['ESTADO'] == 'INSTALADO']
-    instalados_por_asesor = df_instalados.groupby('ASESOR').size()
-    
-    # Contar CANCELADOS por asesor
-    cancelados_por_asesor = df_drive[df_drive['ESTADO'] == 'CANCELADO'].groupby('ASESOR').size()
+    # Métricas de todos los asesores del mes en una sola pasada
+    df_metricas = get_metricas_asesores(list(metas_dict), periodo)
     
     # Calcular métricas
     metricas = {}
     for asesor, meta in metas_dict.items():
-        instalados = instalados_por_asesor.get(asesor, 0)
-        cancelados = cancelados_por_asesor.get(asesor, 0)
+        # Solo INSTALADO (sin PENDIENTE) y CANCELADO, por nombre exacto del asesor
+        instalados = df_metricas.at[asesor, 'INSTALADAS']
+        cancelados = df_metricas.at[asesor, 'CANCELADAS']
         
         # Cumplimiento = INSTALADAS / META
         cumplimiento = round((instalados / meta * 100) if meta > 0 else 0)
         
         # Efectividad = Nueva fórmula: Contrato OK / Con Cobertura (de MANTRA)
-        efectividad = get_conversion_asesor_mes(asesor, mes_nombre)
+        efectividad = int(df_metricas.at[asesor, 'CONVERSION'])
         
         metricas[asesor] = {
             'instalados': instalados,
@@ -907,39 +819,19 @@ def calculate_drive_metrics(metas_dict, mes_filtro=None, mes_nombre=None):
     return metricas
 
 # Cargar datos
-def load_data(mes_seleccionado=None):
-    # Cargar la hoja LISTA para obtener metas por mes
-    df_lista = load_lista_metas()
+def load_data(periodo=None):
+    # Metas de la hoja LISTA del período seleccionado
+    # (Asesor y Meta ya vienen normalizados desde la carga)
+    df_mes_metas = filas_hoja('LISTA', {'PERIODO': periodo})
     
-    # Crear diccionario de metas para el mes seleccionado
+    # Diccionario {Asesor: Meta} SOLO con los asesores activos en este mes
+    # (vacío si no hay datos del mes en LISTA; un asesor repetido queda con su última meta)
     metas_dict = {}
+    if df_mes_metas is not None and not df_mes_metas.empty:
+        metas_dict = dict(zip(df_mes_metas['Asesor'], df_mes_metas['Meta'].astype(int).tolist()))
     
-    if df_lista is not None and not df_lista.empty:
-        # Filtrar por el mes seleccionado
-        df_mes_metas = df_lista[df_lista['Mes'] == mes_seleccionado].copy()
-        
-        # Limpiar espacios en blanco de Asesor y convertir Meta a numérico
-        df_mes_metas['Asesor'] = df_mes_metas['Asesor'].astype(str).str.strip()
-        df_mes_metas['Meta'] = pd.to_numeric(df_mes_metas['Meta'], errors='coerce').fillna(0)
-        
-        # Crear diccionario {Asesor: Meta} SOLO con los asesores activos en este mes
-        for idx, row in df_mes_metas.iterrows():
-            metas_dict[row['Asesor']] = int(row['Meta'])
-    
-    # Si no hay datos para el mes en LISTA, retornar vacío
-    if not metas_dict:
-        metas_dict = {}
-    
-    # Determinar número de mes
-    mes_numeros = {
-        'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-        'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-        'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-    }
-    mes_num = mes_numeros.get(mes_seleccionado, None)
-    
-    # Obtener métricas de DRIVE filtrando por mes (ahora con mes_nombre)
-    metricas = calculate_drive_metrics(metas_dict, mes_filtro=mes_num, mes_nombre=mes_seleccionado)
+    # Obtener métricas de DRIVE filtrando por período
+    metricas = calculate_drive_metrics(metas_dict, periodo=periodo)
     
     # Construir DataFrame
     empleados = []
@@ -978,119 +870,62 @@ def load_data(mes_seleccionado=None):
     df['Diferencia'] = df['Cumplimiento'] - 100
     return df
 
-@st.cache_data(ttl=3600)
-def load_data_codigo_carga(mes_seleccionado=None):
+@cache_por_version()
+def load_data_codigo_carga(periodo=None):
     """Carga datos agrupados por CODIGO DE CARGA (Agente) para un mes exacto.
     Incluye TODOS los agentes de MANTRA, incluso aquellos sin registros en DRIVE.
     - LEADS vienen de MANTRA (cantidad de registros por Agente)
     - VENTAS = todos los registros del mes (sin importar PAGO o ESTADO)
     - PEND = cantidad de PENDIENTES
-    Filtra por columna MES exacto en ambas hojas."""
-    df_drive = load_drive_data()
-    df_mantra = load_mantra_data()
-    
-    if df_drive is None or df_drive.empty or df_mantra is None or df_mantra.empty:
+    Filtra por el período exacto en ambas hojas."""
+    if not hay_registros('DRIVE') or not hay_registros('MANTRA'):
         return pd.DataFrame()
     
     # ============= LEADS DESDE MANTRA =============
-    # Filtrar por MES exacto en MANTRA
-    df_mantra_mes = df_mantra[df_mantra['Mes'] == mes_seleccionado].copy()
+    # Leads y Con Cobertura por Agente del mes, desde las métricas agregadas
+    metricas_agente = get_metricas_por_agente()
+    if periodo not in metricas_agente.index.get_level_values('PERIODO'):
+        return pd.DataFrame()
+    df_mantra_mes = metricas_agente.xs(periodo, level='PERIODO').reset_index()
+    df_mantra_mes = df_mantra_mes[df_mantra_mes['LEADS'] > 0]
     
     if df_mantra_mes.empty:
         return pd.DataFrame()
     
-    # Limpiar espacios en blanco en Agente y estandarizar (agregar _VTP si no lo tiene)
-    df_mantra_mes['Agente'] = df_mantra_mes['Agente'].astype(str).str.strip()
-    # Estandarizar: si no termina con _VTP, agregar lo
-    df_mantra_mes['Agente'] = df_mantra_mes['Agente'].apply(
-        lambda x: x if x.endswith('_VTP') else x + '_VTP'
-    )
-    
-    # Agrupar por Agente y contar LEADS
-    leads_dict = df_mantra_mes.groupby('Agente').size().to_dict()
+    # Estandarizar: si no termina con _VTP, agregar lo (nombre estandarizado del índice de asesores)
+    df_mantra_mes['CODIGO_CARGA'] = df_mantra_mes['NOMBRE'].map(load_indice_asesores()['NOMBRE_VTP'])
+    df_leads = df_mantra_mes.groupby('CODIGO_CARGA')[['LEADS', 'CON_COBERTURA']].sum()
     
     # ============= ESTADÍSTICAS DESDE DRIVE =============
-    # Filtrar por MES exacto en DRIVE
-    df_drive_mes = df_drive[df_drive['MES'] == mes_seleccionado].copy()
-    
-    if df_drive_mes.empty:
-        df_drive_mes = pd.DataFrame()
-    else:
-        # Limpiar espacios en blanco en columnas clave
-        df_drive_mes['CODIGO DE CARGA'] = df_drive_mes['CODIGO DE CARGA'].astype(str).str.strip()
-        df_drive_mes['ESTADO'] = df_drive_mes['ESTADO'].astype(str).str.strip()
-        df_drive_mes['PAGO'] = df_drive_mes['PAGO'].astype(str).str.strip()
-        df_drive_mes['FECHA'] = pd.to_datetime(df_drive_mes['FECHA'], errors='coerce')
-        
-        # Mapeo de meses a números para validar fecha
-        mes_numeros_inv = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros_inv.get(mes_seleccionado, None)
-        
-        # Filtrar por fecha real del mes (excluir fechas que no pertenecen al mes)
-        if mes_num:
-            df_drive_mes = df_drive_mes[df_drive_mes['FECHA'].dt.month == mes_num].copy()
-    
-    # Agrupar por CODIGO DE CARGA y contar estados
-    grupos = []
-    
-    # Obtener todos los agentes únicos de MANTRA (que son los CODIGO DE CARGA)
-    agentes_unicos = sorted(leads_dict.keys())
-    
-    for agente in agentes_unicos:
-        # Leads desde MANTRA
-        leads = leads_dict.get(agente, 0)
-        
-        # Con cobertura desde MANTRA (NIVEL 2 = 'Con Cobertura')
-        df_agente_mantra = df_mantra_mes[df_mantra_mes['Agente'] == agente]
-        df_agente_mantra['NIVEL 2'] = df_agente_mantra['NIVEL 2'].astype(str).str.strip()
-        con_cobertura = len(df_agente_mantra[df_agente_mantra['NIVEL 2'] == 'Con Cobertura'])
-        
-        # Inicializar contadores
-        ventas = 0
-        pendientes = 0
-        
-        # Si hay datos en DRIVE, buscar registros del agente
-        if not df_drive_mes.empty:
-            df_agente = df_drive_mes[df_drive_mes['CODIGO DE CARGA'] == agente]
-            
-            if not df_agente.empty:
-                # VENTAS = todos los registros sin importar PAGO o ESTADO
-                ventas = len(df_agente)
-                
-                # PENDIENTES = registros con ESTADO='PENDIENTE'
-                pendientes = len(df_agente[df_agente['ESTADO'] == 'PENDIENTE'])
-        
-        grupos.append({
-            'CODIGO_CARGA': agente,
-            'LEADS': leads,
-            'CON_COBERTURA': con_cobertura,
-            'VENTAS': ventas,
-            'PENDIENTES': pendientes
-        })
-    
-    if not grupos:
-        return pd.DataFrame()
+    # Filtrar por período exacto en DRIVE y por fecha real del mes
+    # (excluir fechas que no pertenecen al período)
+    df_drive_mes = filas_hoja('DRIVE', {'PERIODO': periodo, 'PERIODO_FECHA': periodo})
+    
+    # VENTAS = todos los registros sin importar PAGO o ESTADO; PENDIENTES = ESTADO='PENDIENTE'
+    df_ventas = (
+        (df_drive_mes['ESTADO'] == 'PENDIENTE')
+        .groupby(df_drive_mes['CODIGO DE CARGA'], observed=True)
+        .agg(['size', 'sum'])
+        .set_axis(['VENTAS', 'PENDIENTES'], axis=1)
+    )
+    df_ventas.index = df_ventas.index.astype(str)
     
-    df_resultado = pd.DataFrame(grupos)
+    # Todos los agentes de MANTRA (que son los CODIGO DE CARGA), con o sin registros en DRIVE
+    df_resultado = df_leads.join(df_ventas).fillna(0).astype(int)
+    df_resultado = df_resultado.rename_axis('CODIGO_CARGA').reset_index()
+    df_resultado = df_resultado[['CODIGO_CARGA', 'LEADS', 'CON_COBERTURA', 'VENTAS', 'PENDIENTES']]
     
     # Calcular % Conversión de Ventas respecto a Leads: (VENTAS / LEADS) * 100
     df_resultado['CONV_VENTAS'] = (df_resultado['VENTAS'] / df_resultado['LEADS'] * 100).round(0).astype(int)
     
     # Calcular % Conversión de Ventas respecto a Con Cobertura: (VENTAS / CON_COBERTURA) * 100
-    # Evitar división por cero
-    df_resultado['CONV_VENTAS_COB'] = df_resultado.apply(
-        lambda row: int((row['VENTAS'] / row['CON_COBERTURA'] * 100)) if row['CON_COBERTURA'] > 0 else 0,
-        axis=1
-    )
+    # Evitar división por cero (0 si no hay Con Cobertura)
+    con_cobertura = df_resultado['CON_COBERTURA'].where(df_resultado['CON_COBERTURA'] > 0)
+    df_resultado['CONV_VENTAS_COB'] = (df_resultado['VENTAS'] / con_cobertura * 100).fillna(0).astype(int)
     
     # Calcular ventas necesarias para llegar al 10%: (LEADS * 0.10) - VENTAS
-    df_resultado['VENTAS_FALTA_10'] = ((df_resultado['LEADS'] * 0.10) - df_resultado['VENTAS']).round(0).astype(int)
     # Si ya alcanzó el 10%, mostrar 0
-    df_resultado['VENTAS_FALTA_10'] = df_resultado['VENTAS_FALTA_10'].apply(lambda x: max(0, x))
+    df_resultado['VENTAS_FALTA_10'] = ((df_resultado['LEADS'] * 0.10) - df_resultado['VENTAS']).round(0).astype(int).clip(lower=0)
     
     # Ordenar por VENTAS de mayor a menor
     df_resultado = df_resultado.sort_values('VENTAS', ascending=False).reset_index(drop=True)
@@ -1100,31 +935,120 @@ def load_data_codigo_carga(mes_seleccionado=None):
     
     return df_resultado
 
-# ============= ANÁLISIS DETALLADO DEL DRIVE =============
+def generar_tabla_codigos_carga(df_datos):
+    """Genera tabla HTML para datos agrupados por CODIGO DE CARGA"""
+    html = '''<div style="margin: 20px 0; background: white; border-radius: 8px; overflow: auto; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
+        <table style="width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;">
+        <thead>
+            <tr style="background: linear-gradient(135deg, #0066cc 0%, #00d4ff 100%); color: white;">
+                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">POS</th>
+                <th style="padding: 14px; text-align: left; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2); min-width: 180px;">CODIGO CARGA</th>
+                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">TOTAL DE LEADS</th>
+                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);"># CON COBERTURA</th>
+                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">TOTAL DE VENTAS</th>
+                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">%CONV. VENTAS FINAL</th>
+                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px;">%CONV. VENTAS</th>
+            </tr>
+        </thead>
+        <tbody>
+        '''
+    
+    # Colores: ventas en verde (o gris si no hay) y conversiones según color_conversion
+    ventas = enteros(df_datos['VENTAS'])
+    conv_ventas = enteros(df_datos['CONV_VENTAS'])
+    conv_ventas_cob = enteros(df_datos['CONV_VENTAS_COB'])
+    html += filas_html(
+        '''<tr style="background-color: {color_fila}; border-bottom: 1px solid #e5e7eb;">
+                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; color: #0066cc;">#{pos}</td>
+                <td style="padding: 12px; text-align: left; font-weight: 500; font-size: 12px;">{codigo}</td>
+                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px;">{leads}</td>
+                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px;">{con_cobertura}</td>
+                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; color: {color_ventas};">{ventas}</td>
+                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; background-color: {color_conv}22; color: {color_conv}; border-radius: 4px;">{conv_ventas}%</td>
+                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; background-color: {color_conv_cob}22; color: {color_conv_cob}; border-radius: 4px;">{conv_ventas_cob}%</td>
+            </tr>''',
+        color_fila=alternar(df_datos.index, '#f9fafb', '#ffffff'),
+        pos=enteros(df_datos['POS']),
+        codigo=df_datos['CODIGO_CARGA'],
+        leads=enteros(df_datos['LEADS']),
+        con_cobertura=enteros(df_datos['CON_COBERTURA']),
+        color_ventas=np.where(ventas > 0, VERDE, GRIS),
+        ventas=ventas,
+        color_conv=color_conversion(conv_ventas),
+        conv_ventas=conv_ventas,
+        color_conv_cob=color_conversion(conv_ventas_cob),
+        conv_ventas_cob=conv_ventas_cob,
+    )
+    
+    # Calcular y agregar fila de TOTALES
+    total_leads = df_datos['LEADS'].sum()
+    total_con_cobertura = df_datos['CON_COBERTURA'].sum()
+    total_ventas = df_datos['VENTAS'].sum()
+    total_conv_ventas_cob = int((total_ventas / total_con_cobertura * 100)) if total_con_cobertura > 0 else 0
+    total_conv_ventas = int((total_ventas / total_leads * 100)) if total_leads > 0 else 0
+    
+    # Colores de las conversiones totales
+    color_conv_total_cob = color_conversion(total_conv_ventas_cob)
+    color_conv_total = color_conversion(total_conv_ventas)
+    
+    html += f'''<tr style="background: linear-gradient(135deg, #0066cc 0%, #00d4ff 100%); color: white; font-weight: 700;">
+            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;"></td>
+            <td style="padding: 12px; text-align: left; font-weight: 700; font-size: 12px;">TOTAL</td>
+            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">{total_leads}</td>
+            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">{total_con_cobertura}</td>
+            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">{total_ventas}</td>
+            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; background-color: {color_conv_total}40; color: white; border-radius: 4px;">{total_conv_ventas}%</td>
+            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; background-color: {color_conv_total_cob}40; color: white; border-radius: 4px;">{total_conv_ventas_cob}%</td>
+        </tr>'''
+    
+    html += '''</tbody>
+        </table>
+        </div>'''
+    
+    return html
 
-@st.cache_data(ttl=3600)
-def get_drive_history_by_asesor(asesor, mes_seleccionado="Marzo"):
-    """Obtiene historial detallado de transacciones por asesor en el DRIVE"""
-    df_drive = load_drive_data()
+@cache_por_version()
+def get_tabla_codigos_carga_html(periodo):
+    """Tabla HTML de LEADS, VENTAS y conversiones por CODIGO DE CARGA del mes"""
+    return generar_tabla_codigos_carga(load_data_codigo_carga(periodo))
+
+@cache_por_version()
+def get_tabla_meta_html(periodo):
+    """Tabla HTML de la meta mensual de cada asesor (de mayor a menor) con el total"""
+    tabla_meta = load_data(periodo)[['Asesor', 'Meta']]
+    tabla_meta = tabla_meta.sort_values('Meta', ascending=False)
     
-    if df_drive is None or df_drive.empty:
-        return pd.DataFrame()
+    # Crear HTML para la tabla personalizada
+    html_tabla = '<div class="meta-tabla" style="width: auto; max-width: none;"><table><thead><tr><th>Pos</th><th>Asesor</th><th style="text-align: center;">Meta</th></tr></thead><tbody>'
+    
+    html_tabla += filas_html(
+        '<tr><td style="font-weight: 700; text-align: center; color: #0066cc;">#{pos}</td><td style="font-weight: 600;">{asesor}</td><td style="text-align: center;"><div class="meta-valor">{meta}</div></td></tr>',
+        pos=np.arange(1, len(tabla_meta) + 1),
+        asesor=tabla_meta['Asesor'],
+        meta=enteros(tabla_meta['Meta']),
+    )
     
-    # Filtrar por mes y asesor
-    df_mes = df_drive[df_drive['MES'] == mes_seleccionado].copy() if 'MES' in df_drive.columns else df_drive
+    # Agregar fila de totales
+    total_meta = int(tabla_meta['Meta'].sum())
+    html_tabla += f'<tr style="background-color: #e0e7ff; font-weight: 700; border-top: 2px solid #0066cc;"><td style="text-align: center; color: #0066cc;">∑</td><td style="font-weight: 700; color: #0066cc;">TOTAL</td><td style="text-align: center; font-weight: 700; color: #0066cc;"><div class="meta-valor" style="background-color: #0066cc; color: white;">{total_meta}</div></td></tr>'
     
-    # Limpiar espacios en la columna ASESOR
-    df_mes['ASESOR'] = df_mes['ASESOR'].astype(str).str.strip()
+    html_tabla += '</tbody></table></div>'
+    return html_tabla
+
+# ============= ANÁLISIS DETALLADO DEL DRIVE =============
+
+@cache_por_version()
+def get_drive_history_by_asesor(asesor, periodo):
+    """Obtiene historial detallado de transacciones por asesor en el DRIVE"""
+    # ASESOR ya viene limpio y FECHA convertida desde la carga
     asesor_clean = asesor.strip()
     
-    df_asesor = df_mes[df_mes['ASESOR'] == asesor_clean].copy()
+    # Filtrar por período y asesor
+    df_asesor = filas_hoja('DRIVE', {'PERIODO': periodo, 'ASESOR': asesor_clean})
     
-    if df_asesor.empty:
+    if df_asesor is None or df_asesor.empty:
         return pd.DataFrame()
     
-    # Limpiar fechas
-    df_asesor['FECHA'] = pd.to_datetime(df_asesor['FECHA'], errors='coerce')
-    
     # Ordenar por fecha
     df_asesor = df_asesor.sort_values('FECHA')
     
@@ -1133,130 +1057,97 @@ def get_drive_history_by_asesor(asesor, mes_seleccionado="Marzo"):
     
     return df_asesor
 
-@st.cache_data(ttl=3600)
-def get_drive_asesor_kpis(asesor, mes_seleccionado="Marzo"):
+# Los análisis por asesor (KPIs, desglose diario, crecimiento y tendencias) se
+# arman desde un único cubo de ventas por (ASESOR, FECHA, ESTADO) del mes, que
+# se calcula una vez por versión de datos: cambiar de asesor solo lo recorta.
+@cache_por_version(recurso=True, max_entries=16)
+def get_cubo_diario_asesores(periodo):
+    """Ventas de DRIVE del mes por (ASESOR, FECHA, ESTADO), ver cubo_diario_asesores"""
+    df_mes = filas_hoja('DRIVE', {'PERIODO': periodo})
+    
+    if df_mes is None:
+        return None
+    return cubo_diario_asesores(df_mes)
+
+def get_ventas_asesor(asesor, periodo):
+    """Ventas del asesor en el mes por (FECHA, ESTADO) desde el cubo diario;
+    Serie vacía si no tiene registros"""
+    cubo = get_cubo_diario_asesores(periodo)
+    if cubo is None:
+        return pd.Series(dtype=int)
+    try:
+        return cubo.xs(asesor.strip(), level='ASESOR')
+    except KeyError:
+        return pd.Series(dtype=int)
+
+# KPIs y recomendaciones se calculan para todo el equipo del mes a la vez;
+# la vista de un asesor es una búsqueda en esas tablas
+@cache_por_version()
+def get_kpis_equipo(periodo):
+    """KPIs de DRIVE de todos los asesores del mes, una fila por asesor (ver kpis_asesores)"""
+    return kpis_asesores(get_cubo_diario_asesores(periodo))
+
+@cache_por_version()
+def get_recomendaciones_equipo(periodo):
+    """Recomendaciones de todos los asesores del mes (ver recomendaciones_ftth)"""
+    return recomendaciones_asesores(get_kpis_equipo(periodo))
+
+@cache_por_version()
+def get_tabla_equipo(periodo):
+    """KPIs, alertas y prioridad de todos los asesores del mes (ver tabla_equipo)"""
+    return tabla_equipo(get_kpis_equipo(periodo), get_recomendaciones_equipo(periodo))
+
+def get_drive_asesor_kpis(asesor, periodo):
     """Calcula KPIs importantes para un asesor en el DRIVE"""
-    df_asesor = get_drive_history_by_asesor(asesor, mes_seleccionado)
+    kpis_equipo = get_kpis_equipo(periodo)
+    asesor_clean = asesor.strip()
     
-    if df_asesor.empty:
+    if asesor_clean not in kpis_equipo.index:
         return {}
     
-    # Limpiar columnas
-    df_asesor['ESTADO'] = df_asesor['ESTADO'].astype(str).str.strip()
-    df_asesor['PAGO'] = df_asesor['PAGO'].astype(str).str.strip()
-    df_asesor['FECHA'] = pd.to_datetime(df_asesor['FECHA'], errors='coerce')
-    
-    total_ventas = len(df_asesor)
-    instaladas = len(df_asesor[df_asesor['ESTADO'] == 'INSTALADO'])
-    pendientes = len(df_asesor[df_asesor['ESTADO'] == 'PENDIENTE'])
-    canceladas = len(df_asesor[df_asesor['ESTADO'] == 'CANCELADO'])
-    
-    # Tasa de conversión (instaladas / total)
-    tasa_conversion = (instaladas / total_ventas * 100) if total_ventas > 0 else 0
-    
-    # Tasa de cancelación
-    tasa_cancelacion = (canceladas / total_ventas * 100) if total_ventas > 0 else 0
-    
-    # Tiempo promedio entre ventas (en días)
-    fechas_validas = df_asesor['FECHA'].dropna()
-    if len(fechas_validas) > 1:
-        dias_totales = (fechas_validas.max() - fechas_validas.min()).days
-        tiempo_promedio = dias_totales / (len(fechas_validas) - 1) if len(fechas_validas) > 1 else 0
-    else:
-        tiempo_promedio = 0
-    
-    # Velocidad de venta (ventas por día)
-    dias_activos = len(df_asesor['FECHA'].dt.date.unique()) if len(fechas_validas) > 0 else 1
-    velocidad_venta = total_ventas / dias_activos if dias_activos > 0 else 0
-    
-    # Estabilidad (desviación estándar de ventas por día)
-    ventas_por_dia = df_asesor.groupby(df_asesor['FECHA'].dt.date).size()
-    estabilidad = ventas_por_dia.std() if len(ventas_por_dia) > 1 else 0
-    
-    return {
-        'total_ventas': total_ventas,
-        'instaladas': instaladas,
-        'pendientes': pendientes,
-        'canceladas': canceladas,
-        'tasa_conversion': round(tasa_conversion, 1),
-        'tasa_cancelacion': round(tasa_cancelacion, 1),
-        'tiempo_promedio_dias': round(tiempo_promedio, 1),
-        'velocidad_venta': round(velocidad_venta, 2),
-        'dias_activos': dias_activos,
-        'estabilidad_ventas': round(estabilidad, 2),
-        'fecha_primera_venta': fechas_validas.min() if len(fechas_validas) > 0 else None,
-        'fecha_ultima_venta': fechas_validas.max() if len(fechas_validas) > 0 else None,
-    }
+    kpis = kpis_equipo.loc[[asesor_clean]].to_dict('records')[0]
+    for fecha in ['fecha_primera_venta', 'fecha_ultima_venta']:
+        if pd.isna(kpis[fecha]):
+            kpis[fecha] = None
+    return kpis
 
-@st.cache_data(ttl=3600)
-def get_ventas_mes_pasado(asesor, mes_actual="Marzo"):
+@cache_por_version()
+def get_ventas_mes_pasado(asesor, periodo_actual):
     """Obtiene ventas del mes anterior que aún están pendientes"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return pd.DataFrame()
-    
-    # Filtrar por asesor
-    df_drive['ASESOR'] = df_drive['ASESOR'].astype(str).str.strip()
-    df_asesor = df_drive[df_drive['ASESOR'] == asesor.strip()].copy()
-    
-    if df_asesor.empty:
-        return pd.DataFrame()
-    
-    # Obtener mes anterior
-    meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio', 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-    if mes_actual in meses:
-        idx_actual = meses.index(mes_actual)
-        mes_anterior = meses[idx_actual - 1] if idx_actual > 0 else None
-    else:
-        mes_anterior = None
-    
-    if mes_anterior is None:
-        return pd.DataFrame()
-    
-    # Filtrar por mes anterior
-    df_anterior = df_asesor[df_asesor['MES'] == mes_anterior].copy()
+    # Filtrar por el período anterior (Enero -> Diciembre del año previo) y asesor
+    df_anterior = filas_hoja('DRIVE', {'PERIODO': periodo_anterior(periodo_actual), 'ASESOR': asesor.strip()})
     
-    if df_anterior.empty:
+    if df_anterior is None or df_anterior.empty:
         return pd.DataFrame()
     
-    # Limpiar y ordenar
-    df_anterior['FECHA'] = pd.to_datetime(df_anterior['FECHA'], errors='coerce')
+    # Ordenar
     df_anterior = df_anterior.sort_values('FECHA')
     
     return df_anterior
 
-@st.cache_data(ttl=3600)
-def get_desglose_diario(asesor, mes_seleccionado="Marzo"):
+@cache_por_version()
+def get_desglose_diario(asesor, periodo):
     """Obtiene desglose de ventas por día del mes actual"""
-    df_asesor = get_drive_history_by_asesor(asesor, mes_seleccionado)
+    # Ventas por día y estado (desde el cubo diario)
+    desglose = ventas_por_dia_estado(get_ventas_asesor(asesor, periodo))
     
-    if df_asesor.empty:
+    if desglose.empty:
         return pd.DataFrame()
     
-    df_asesor['FECHA'] = pd.to_datetime(df_asesor['FECHA'], errors='coerce')
-    df_asesor['ESTADO'] = df_asesor['ESTADO'].astype(str).str.strip()
-    
-    # Agrupar por día y estado
-    desglose = df_asesor.groupby([df_asesor['FECHA'].dt.date, 'ESTADO']).size().unstack(fill_value=0)
+    desglose.columns = desglose.columns.astype(str)
     desglose['TOTAL'] = desglose.sum(axis=1)
     
     return desglose
 
-@st.cache_data(ttl=3600)
-def get_crecimiento_ventas(asesor, mes_seleccionado="Marzo"):
+@cache_por_version()
+def get_crecimiento_ventas(asesor, periodo):
     """Obtiene el crecimiento acumulado de ventas por día con promedio"""
-    df_asesor = get_drive_history_by_asesor(asesor, mes_seleccionado)
+    # Ventas diarias por tipo (desde el cubo diario)
+    ventas_diarias = ventas_por_dia_estado(get_ventas_asesor(asesor, periodo))
     
-    if df_asesor.empty:
+    if ventas_diarias.empty:
         return pd.DataFrame()
     
-    df_asesor['FECHA'] = pd.to_datetime(df_asesor['FECHA'], errors='coerce')
-    df_asesor['ESTADO'] = df_asesor['ESTADO'].astype(str).str.strip()
-    
-    # Contar ventas diarias por tipo
-    ventas_diarias = df_asesor.groupby([df_asesor['FECHA'].dt.date, 'ESTADO']).size().unstack(fill_value=0)
-    
     # Calcular acumuladas
     crecimiento = pd.DataFrame()
     crecimiento['Fecha'] = ventas_diarias.index
@@ -1284,40 +1175,24 @@ def get_crecimiento_ventas(asesor, mes_seleccionado="Marzo"):
     
     return crecimiento
 
-@st.cache_data(ttl=3600)
-def get_crecimiento_ventas_semanal(asesor, mes_seleccionado="Marzo"):
+@cache_por_version()
+def get_crecimiento_ventas_semanal(asesor, periodo):
     """Obtiene el crecimiento acumulado agrupado por semana (DO-LU-MA-MI-JU-VI-SA) con promedio"""
-    df_asesor = get_drive_history_by_asesor(asesor, mes_seleccionado)
+    # Ventas diarias por tipo (desde el cubo diario)
+    ventas_diarias = ventas_por_dia_estado(get_ventas_asesor(asesor, periodo))
     
-    if df_asesor.empty:
+    if ventas_diarias.empty:
         return pd.DataFrame()
     
-    df_asesor['FECHA'] = pd.to_datetime(df_asesor['FECHA'], errors='coerce')
-    df_asesor['ESTADO'] = df_asesor['ESTADO'].astype(str).str.strip()
-    
-    # Calcular número de semana basado en el día del mes (semana 1: 1-7, semana 2: 8-14, etc.)
-    df_asesor['NUM_SEMANA'] = ((df_asesor['FECHA'].dt.day - 1) // 7) + 1
-    
-    # Crear etiqueta descriptiva para cada semana
-    def get_semana_label(row):
-        day = row['FECHA'].day
-        if day <= 7:
-            return f"Semana 1 (1-7)"
-        elif day <= 14:
-            return f"Semana 2 (8-14)"
-        elif day <= 21:
-            return f"Semana 3 (15-21)"
-        else:
-            return f"Semana 4 (22-31)"
-    
-    df_asesor['LABEL_SEMANA'] = df_asesor.apply(get_semana_label, axis=1)
+    # Semana del mes de cada día (1-7, 8-14, 15-21, 22-31), ver semana_del_mes
+    semana = pd.Index(semana_del_mes(pd.DatetimeIndex(ventas_diarias.index).day), name='SEMANA')
     
-    # Contar ventas semanales por tipo
-    ventas_semanales = df_asesor.groupby(['NUM_SEMANA', 'LABEL_SEMANA', 'ESTADO']).size().unstack(fill_value=0)
+    # Sumar ventas semanales por tipo
+    ventas_semanales = ventas_diarias.groupby(semana, observed=True).sum()
     
     # Calcular acumuladas
     crecimiento_semanal = pd.DataFrame()
-    crecimiento_semanal['Semana'] = ventas_semanales.index.get_level_values('LABEL_SEMANA')
+    crecimiento_semanal['Semana'] = ventas_semanales.index.astype(str)
     
     # Usar columnas si existen, sino 0
     instaladas = ventas_semanales['INSTALADO'].values if 'INSTALADO' in ventas_semanales.columns else np.zeros(len(ventas_semanales))
@@ -1342,76 +1217,35 @@ def get_crecimiento_ventas_semanal(asesor, mes_seleccionado="Marzo"):
     
     return crecimiento_semanal
 
-@st.cache_data(ttl=3600)
-def get_drive_tendencias(asesor, mes_seleccionado="Marzo"):
+@cache_por_version()
+def get_drive_tendencias(asesor, periodo):
     """Analiza tendencias de ventas semana a semana"""
-    df_asesor = get_drive_history_by_asesor(asesor, mes_seleccionado)
+    ventas_diarias = ventas_por_dia_estado(get_ventas_asesor(asesor, periodo))
     
-    if df_asesor.empty:
+    if ventas_diarias.empty:
         return pd.DataFrame()
     
-    df_asesor['FECHA'] = pd.to_datetime(df_asesor['FECHA'], errors='coerce')
-    df_asesor['ESTADO'] = df_asesor['ESTADO'].astype(str).str.strip()
-    df_asesor['SEMANA'] = df_asesor['FECHA'].dt.isocalendar().week
+    semana = pd.Index(pd.DatetimeIndex(ventas_diarias.index).isocalendar().week.array, name='SEMANA')
     
-    # Contar por semana y estado
-    tendencias = df_asesor.groupby(['SEMANA', 'ESTADO']).size().unstack(fill_value=0)
+    # Sumar por semana y estado
+    tendencias = ventas_diarias.groupby(semana).sum()
+    tendencias.columns = tendencias.columns.astype(str)
     
     return tendencias
 
-def get_recomendaciones_asesor(asesor, kpis, mes_seleccionado="Marzo"):
-    """Genera recomendaciones personalizadas basadas en el análisis"""
-    recomendaciones = []
-    
-    if kpis.get('tasa_conversion', 0) < 50:
-        recomendaciones.append({
-            'tipo': 'crítica',
-            'título': '⚠️ Tasa de Conversión Baja',
-            'descripción': f"Su tasa de conversión es {kpis.get('tasa_conversion', 0)}%. Objetivo: aumentar a 80%+",
-            'acción': 'Enfoque en filtrar mejor los leads antes de hacer seguimiento. Calidad > Cantidad'
-        })
-    
-    if kpis.get('tasa_cancelacion', 0) > 30:
-        recomendaciones.append({
-            'tipo': 'crítica',
-            'título': '⚠️ Tasa de Cancelación Alta',
-            'descripción': f"El {kpis.get('tasa_cancelacion', 0)}% de sus ventas se cancelan",
-            'acción': 'Investigar causas de cancelación. ¿Falta de seguimiento? ¿Expectativas no cumplidas?'
-        })
-    
-    if kpis.get('velocidad_venta', 0) < 1:
-        recomendaciones.append({
-            'tipo': 'alta',
-            'título': '📈 Aumentar Velocidad de Venta',
-            'descripción': f"Actualmente {kpis.get('velocidad_venta', 0)} ventas/día. Potencial: 2+ ventas/día",
-            'acción': 'Dedique más tiempo a llamadas y seguimiento. Cree rutinas diarias'
-        })
-    
-    if kpis.get('estabilidad_ventas', 0) > 2:
-        recomendaciones.append({
-            'tipo': 'media',
-            'título': '📊 Variabilidad en Ventas',
-            'descripción': f"Sus ventas varían mucho por día (desv. std: {kpis.get('estabilidad_ventas', 0)})",
-            'acción': 'Implemente una estrategia consistente diaria. Objetivos claros por día'
-        })
-    
-    if kpis.get('pendientes', 0) > 5:
-        recomendaciones.append({
-            'tipo': 'media',
-            'título': '⏳ Muchas Ventas Pendientes',
-            'descripción': f"Tiene {kpis.get('pendientes', 0)} ventas en estado PENDIENTE",
-            'acción': 'Prioricel el seguimiento de pendientes para convertirlas en instaladas'
-        })
+def get_recomendaciones_asesor(asesor, kpis, periodo):
+    """Genera recomendaciones personalizadas basadas en el análisis
+    (reglas en recomendaciones_ftth, evaluadas para todo el equipo del mes)"""
+    recomendaciones = get_recomendaciones_equipo(periodo)
+    del_asesor = recomendaciones[recomendaciones['ASESOR'] == asesor.strip()]
     
-    if len(recomendaciones) == 0:
-        recomendaciones.append({
-            'tipo': 'éxito',
-            'título': '✅ Desempeño Sólido',
-            'descripción': "Sus métricas se ven bien. Continúe con esta tendencia",
-            'acción': 'Mantenga la consistencia y búsque formas de optimizar aún más'
-        })
+    # KPIs que no son del mes (o de un asesor sin ventas): se evalúan aparte
+    if del_asesor.empty:
+        columnas = ['tasa_conversion', 'tasa_cancelacion', 'velocidad_venta', 'estabilidad_ventas', 'pendientes']
+        kpis_asesor = pd.DataFrame([kpis], index=[asesor.strip()]).reindex(columns=columnas, fill_value=0).fillna(0)
+        del_asesor = recomendaciones_asesores(kpis_asesor)
     
-    return recomendaciones
+    return del_asesor.drop(columns='ASESOR').to_dict('records')
 
 # Estilos mejorados con tema moderno y premium
 st.markdown("""
@@ -1793,35 +1627,49 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Aviso si la última versión del Excel no se pudo cargar (el vigilante la reintenta)
+error_carga = iniciar_vigilante().ultimo_error()
+if error_carga is not None:
+    st.warning(
+        f"⚠️ No se pudo cargar la versión más reciente del Excel "
+        f"({error_carga['hora'].strftime('%d/%m/%Y %H:%M')}, intento {error_carga['intentos']}): "
+        f"{error_carga['error']}. Se muestran los datos de la versión `{version_datos()}`; "
+        f"próximo reintento a las {error_carga['reintento'].strftime('%H:%M:%S')}."
+    )
+
 # Filtros mejorados con layout dinámico
 st.markdown("### ⚙️ Filtros y Opciones")
 col_filtros = st.columns(3, gap="medium")
 
+periodos_selector = get_periodos()
+if not periodos_selector:
+    st.error("No hay datos disponibles en los registros")
+    st.stop()
+
 with col_filtros[0]:
-    mes = st.selectbox("📅 Selecciona Mes", ["Noviembre", "Diciembre", "Enero", "Febrero", "Marzo"], index=4)
+    periodo = st.selectbox(
+        "📅 Selecciona Mes",
+        periodos_selector,
+        index=len(periodos_selector) - 1,
+        format_func=etiqueta_periodo
+    )
 
-# Mapeo de meses a años
-mes_año_map = {
-    "Noviembre": "Noviembre 2025",
-    "Diciembre": "Diciembre 2025",
-    "Enero": "Enero 2026",
-    "Febrero": "Febrero 2026",
-    "Marzo": "Marzo 2026"
-}
+# Nombre del mes para los títulos; los datos se piden siempre por período
+mes = nombre_periodo(periodo)
 
 # Header mejorado - Dinámico
 st.markdown(f"""
 <div class="header-container">
     <div class="header-content">
         <div class="header-title">🌐 WORLDTEL</div>
-        <div class="header-subtitle">Dashboard de Cumplimiento Mensual - {mes_año_map[mes]}</div>
+        <div class="header-subtitle">Dashboard de Cumplimiento Mensual - {etiqueta_periodo(periodo)}</div>
     </div>
     <div style="position: absolute; right: 250px; top: 50%; transform: translateY(-50%); color: white; font-size: 3.8em; font-weight: 800; letter-spacing: -0.5px;">BITEL - FTTH</div>
 </div>
 """, unsafe_allow_html=True)
 
 # Cargar datos con el mes seleccionado
-df = load_data(mes)
+df = load_data(periodo)
 
 with col_filtros[1]:
     opciones_asesores = ["Todos"] + sorted(df['Asesor'].unique())
@@ -1830,140 +1678,42 @@ with col_filtros[1]:
 vista = "Completa"
 
 # Obtener valores del Excel basado en el mes seleccionado
-total_leads_excel, total_conversion_excel = get_total_leads_and_conversion(mes)
+total_leads_excel, total_conversion_excel = get_total_leads_and_conversion(periodo)
 
 # KPI Cards mejorados - Datos del asesor seleccionado o totales
-def get_cumplimiento_total_mes(mes_nombre):
+def get_cumplimiento_total_mes(periodo):
     """Calcula el cumplimiento total del mes: (Total Instaladas / Total de Metas) * 100"""
-    df_lista = load_lista_metas()
-    df_drive = load_drive_data()
+    df_mes_metas = filas_hoja('LISTA', {'PERIODO': periodo})
     
-    if df_lista is None or df_lista.empty or df_drive is None or df_drive.empty:
+    if df_mes_metas is None or df_mes_metas.empty:
         return 0
     
-    try:
-        # Mapear nombre del mes a número
-        mes_numeros = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros.get(mes_nombre)
-        
-        if mes_num is None:
-            return 0
-        
-        # Obtener total de metas para el mes
-        df_mes_metas = df_lista[df_lista['Mes'] == mes_nombre]
-        total_metas = df_mes_metas['Meta'].sum()
-        
-        if total_metas == 0:
-            return 0
-        
-        # Aplicar regla: INSTALADO - pasando mes_nombre para filtrar por MES column
-        es_noviembre = mes_num == 11
-        total_instaladas = count_instaladas_con_regla(df_drive, mes_num, es_noviembre, mes_nombre)
-        
-        # Calcular cumplimiento
-        cumplimiento_total = round((total_instaladas / total_metas * 100))
-        
-        return cumplimiento_total
-    except Exception as e:
+    # Obtener total de metas para el mes
+    total_metas = df_mes_metas['Meta'].sum()
+    
+    if total_metas == 0:
         return 0
+    
+    # Regla: solo INSTALADO, filtrando por el período de la venta
+    total_instaladas = get_metricas_mes(periodo)['INSTALADAS']
+    return round((total_instaladas / total_metas * 100))
 
-def get_efectividad_mes(mes_nombre):
+def get_efectividad_mes(periodo):
     """Calcula la efectividad para un mes: INSTALADAS/(INSTALADAS+CANCELADAS)
     Donde INSTALADAS = INSTALADO (sin PENDIENTE)"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
+    metricas = get_metricas_mes(periodo)
+    instaladas = metricas['INSTALADAS']
+    total_transacciones = instaladas + metricas['CANCELADAS']
     
-    try:
-        # Mapear nombre del mes a número
-        mes_numeros = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros.get(mes_nombre)
-        
-        if mes_num is None:
-            return 0
-        
-        # Filtrar por MES en lugar de FECHA
-        if 'MES' in df_drive.columns:
-            df_filtrado = df_drive[df_drive['MES'] == mes_nombre]
-        else:
-            # Fallback a FECHA si MES no existe
-            df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-            # Para Noviembre, incluir Octubre + Noviembre
-            if mes_num == 11:
-                df_filtrado = df_drive[
-                    ((df_drive['FECHA'].dt.month == 10) | (df_drive['FECHA'].dt.month == 11))
-                ]
-            else:
-                # Para otros meses, solo ese mes
-                df_filtrado = df_drive[
-                    (df_drive['FECHA'].dt.month == mes_num)
-                ]
-        
-        # Contar instaladas con regla (solo INSTALADO)
-        instaladas = count_instaladas_con_regla(df_filtrado, mes_num, mes_num == 11, mes_nombre)
-        canceladas = len(df_filtrado[df_filtrado['ESTADO'] == 'CANCELADO'])
-        
-        # Calcular efectividad
-        total_transacciones = instaladas + canceladas
-        if total_transacciones > 0:
-            efectividad = round((instaladas / total_transacciones * 100))
-        else:
-            efectividad = 0
-        
-        return efectividad
-    except Exception as e:
-        return 0
-        
-        # Calcular efectividad
-        total_transacciones = instaladas + canceladas
-        if total_transacciones > 0:
-            efectividad = round((instaladas / total_transacciones * 100))
-        else:
-            efectividad = 0
-        
-        return efectividad
-    except Exception as e:
-        return 0
+    if total_transacciones > 0:
+        return round((instaladas / total_transacciones * 100))
+    return 0
 
-def get_ventas_mes(mes_nombre):
+def get_ventas_mes(periodo):
     """Obtiene el total de instaladas para un mes específico del DRIVE
     Donde INSTALADAS = Solo INSTALADO (no incluye PENDIENTE)
-    Filtra por columna MES"""
-    df_drive = load_drive_data()
-    
-    if df_drive is None or df_drive.empty:
-        return 0
-    
-    try:
-        # Mapear nombre del mes a número
-        mes_numeros = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros.get(mes_nombre)
-        
-        if mes_num is None:
-            return 0
-        
-        # Convertir FECHA a datetime
-        df_drive['FECHA'] = pd.to_datetime(df_drive['FECHA'], errors='coerce')
-        
-        # Para Noviembre, sumar Octubre + Noviembre
-        es_noviembre = mes_num == 11
-        total = count_instaladas_con_regla(df_drive, mes_num, es_noviembre, mes_nombre)
-        return total
-    except Exception as e:
-        return 0
+    Filtra por el período de la venta"""
+    return get_metricas_mes(periodo)['INSTALADAS']
 
 st.markdown("")  # Espaciador
 
@@ -1982,60 +1732,33 @@ if asesor_seleccionado == "Todos":
     asesores_vista = df_vista['Asesor'].tolist()
     
     # Obtener ventas totales, efectividad y cumplimiento total del mes actual desde DRIVE
-    # SIN filtrar por asesores - mostrar TOTALES de TODOS
-    df_drive_filtrado = load_drive_data()
-    
-    if df_drive_filtrado is not None and not df_drive_filtrado.empty:
-        # NO filtrar por asesores - calcular para TODOS
-        # df_drive_filtrado = df_drive_filtrado[df_drive_filtrado['ASESOR'].isin(asesores_vista)]
-        
-        # Calcular métricas para esta vista
-        df_drive_filtrado['FECHA'] = pd.to_datetime(df_drive_filtrado['FECHA'], errors='coerce')
-        
-        # Determinar número de mes
-        mes_numeros = {
-            'Enero': 1, 'Febrero': 2, 'Marzo': 3, 'Abril': 4,
-            'Mayo': 5, 'Junio': 6, 'Julio': 7, 'Agosto': 8,
-            'Septiembre': 9, 'Octubre': 10, 'Noviembre': 11, 'Diciembre': 12
-        }
-        mes_num = mes_numeros.get(mes, None)
-        
-        # Filtrar por columna MES (en lugar de por FECHA)
-        if 'MES' in df_drive_filtrado.columns:
-            df_mes_filtrado = df_drive_filtrado[df_drive_filtrado['MES'] == mes]
-        else:
-            # Fallback a FECHA si MES no existe
-            df_drive_filtrado['FECHA'] = pd.to_datetime(df_drive_filtrado['FECHA'], errors='coerce')
-            if mes_num == 11:
-                df_mes_filtrado = df_drive_filtrado[
-                    ((df_drive_filtrado['FECHA'].dt.month == 10) | (df_drive_filtrado['FECHA'].dt.month == 11))
-                ]
-            else:
-                df_mes_filtrado = df_drive_filtrado[df_drive_filtrado['FECHA'].dt.month == mes_num]
+    # SIN filtrar por asesores - mostrar TOTALES de TODOS (desde el resumen mensual)
+    if hay_registros('DRIVE'):
+        metricas_mes = get_metricas_mes(periodo)
         
         # Ventas (instaladas) - aplicando regla: Solo INSTALADO
-        ventas_total = count_instaladas_con_regla(df_mes_filtrado, mes_num, mes_num == 11, mes)
+        ventas_total = metricas_mes['INSTALADAS']
         
         # Efectividad - Nueva fórmula: Contrato OK / Con Cobertura (de MANTRA)
-        efectividad_mes = get_conversion_mantra_mes(mes)
+        efectividad_mes = get_conversion_mantra_mes(periodo)
         
         # Cumplimiento - calcular contra TODAS las metas del mes
-        df_lista = load_lista_metas()
-        df_mes_metas = df_lista[df_lista['Mes'] == mes]
+        df_mes_metas = filas_hoja('LISTA', {'PERIODO': periodo})
         total_metas = df_mes_metas['Meta'].sum()
         cumplimiento_total = round((ventas_total / total_metas * 100)) if total_metas > 0 else 0
         
         # Ventas generales (total de todas las transacciones)
-        ventas_generales = get_ventas_generales_mes(mes)
+        ventas_generales = metricas_mes['VENTAS']
     else:
         ventas_total = 0
         efectividad_mes = 0
         cumplimiento_total = 0
         ventas_generales = 0
     
+    
     kpis = [
         (f"{total_leads_excel:,}", "📋 Leads", col1),
-        (str(get_con_cobertura_count(mes)), "🌐 Con Cobertura", col2),
+        (str(get_con_cobertura_count(periodo)), "🌐 Con Cobertura", col2),
         (f"{total_conversion_excel}", "✅ Ventas Del Mes", col3),
         (str(ventas_total), "💰 Ventas Instaladas Del Mes", col4),
         (str(ventas_generales), "📈 Ventas Generales Del Mes", col5),
@@ -2047,8 +1770,8 @@ else:
     cumpl_val = int(asesor_data['Cumplimiento'])
     efect_val = int(asesor_data['Efectividad'])
     instaladas_asesor = int(asesor_data['Instaladas'])
-    leads_asesor = get_leads_asesor_mes(asesor_seleccionado, mes)
-    con_cobertura_asesor = get_con_cobertura_asesor_mes(asesor_seleccionado, mes)
+    leads_asesor = get_leads_asesor_mes(asesor_seleccionado, periodo)
+    con_cobertura_asesor = get_con_cobertura_asesor_mes(asesor_seleccionado, periodo)
     
     kpis = [
         (str(leads_asesor), "📋 Total Leads", col1),
@@ -2078,25 +1801,7 @@ col1, col2, col3 = st.columns([0.8, 1.6, 1.6], gap="medium")
 # Columna 1: Meta Mensual
 with col1:
     st.markdown('<div class="chart-title">📈 Meta Mensual</div>', unsafe_allow_html=True)
-    tabla_meta = df[['Asesor', 'Meta']].copy()
-    tabla_meta = tabla_meta.sort_values('Meta', ascending=False).reset_index(drop=True)
-    tabla_meta.index = tabla_meta.index + 1
-    
-    # Crear HTML para la tabla personalizada
-    html_tabla = '<div class="meta-tabla" style="width: auto; max-width: none;"><table><thead><tr><th>Pos</th><th>Asesor</th><th style="text-align: center;">Meta</th></tr></thead><tbody>'
-    
-    for idx, row in tabla_meta.iterrows():
-        asesor = row['Asesor']
-        meta = int(row['Meta'])
-        html_tabla += f'<tr><td style="font-weight: 700; text-align: center; color: #0066cc;">#{idx}</td><td style="font-weight: 600;">{asesor}</td><td style="text-align: center;"><div class="meta-valor">{meta}</div></td></tr>'
-    
-    # Agregar fila de totales
-    total_meta = int(tabla_meta['Meta'].sum())
-    html_tabla += f'<tr style="background-color: #e0e7ff; font-weight: 700; border-top: 2px solid #0066cc;"><td style="text-align: center; color: #0066cc;">∑</td><td style="font-weight: 700; color: #0066cc;">TOTAL</td><td style="text-align: center; font-weight: 700; color: #0066cc;"><div class="meta-valor" style="background-color: #0066cc; color: white;">{total_meta}</div></td></tr>'
-    
-    html_tabla += '</tbody></table></div>'
-    
-    st.markdown(html_tabla, unsafe_allow_html=True)
+    st.markdown(get_tabla_meta_html(periodo), unsafe_allow_html=True)
 
 # Columna 2: Cumplimiento por Agente
 with col2:
@@ -2208,17 +1913,24 @@ st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 # ============= ANÁLISIS DE INSTALADAS POR SEMANA =============
 st.markdown("### 📊 Análisis de Instaladas por Semana")
 
-# Crear dos tabs: uno para mes individual y otro para comparativo
-tab1, tab2 = st.tabs(["Análisis por Semana (Mes)", "Comparativo Multi-Mes"])
+# Vista: análisis de un mes o comparativo. Solo se calcula la vista elegida
+# (una pestaña de st.tabs ejecuta su contenido aunque no esté visible)
+vista_instaladas = st.radio(
+    "Vista",
+    VISTAS_INSTALADAS,
+    horizontal=True,
+    key="vista_instaladas",
+    label_visibility="collapsed"
+)
 
-# TAB 1: Análisis de semanas para un mes seleccionado
-with tab1:
+# Vista 1: análisis de semanas para un mes seleccionado
+if vista_instaladas == VISTAS_INSTALADAS[0]:
     # Obtener meses disponibles
     meses_disp = get_meses_disponibles()
     
     if meses_disp:
         # Crear lista de opciones con formato "Mes Año"
-        opciones_meses = [mes_año for mes_año, _, _, _ in meses_disp]
+        opciones_meses = [mes_año for mes_año, _ in meses_disp]
         
         col_mes_sel, col_espacio = st.columns([2, 3])
         with col_mes_sel:
@@ -2229,70 +1941,18 @@ with tab1:
                 key="mes_analisis"
             )
         
-        # Encontrar el mes_nombre del mes seleccionado
-        mes_nombre_analisis = next((mes_nombre for mes_año, mes_nombre, _, _ in meses_disp if mes_año == mes_seleccionado_display), None)
+        # Encontrar el período del mes seleccionado
+        periodo_analisis = next((periodo_mes for mes_año, periodo_mes in meses_disp if mes_año == mes_seleccionado_display), None)
     else:
         st.warning("No hay datos disponibles en los registros")
-        mes_nombre_analisis = None
+        periodo_analisis = None
     
-    if mes_nombre_analisis:
+    if periodo_analisis:
         # Obtener datos de instaladas por día
-        df_semanas = get_instaladas_por_semana(mes_nombre_analisis)
+        df_semanas = get_instaladas_por_semana(periodo_analisis)
     
     if not df_semanas.empty and len(df_semanas) > 0:
-        # Crear gráfico de barras
-        fig_semanas = go.Figure()
-        
-        fig_semanas.add_trace(go.Bar(
-            x=df_semanas['DIA'],
-            y=df_semanas['INSTALADAS'],
-            marker=dict(
-                color=df_semanas['INSTALADAS'],
-                colorscale='Blues',
-                line=dict(color='white', width=2),
-                opacity=0.85,
-                showscale=True,
-                colorbar=dict(
-                    title="Ventas",
-                    tickfont=dict(size=10),
-                    thickness=15,
-                    len=0.7
-                )
-            ),
-            text=df_semanas['INSTALADAS'],
-            textposition='outside',
-            textfont=dict(size=13, color='#1e293b', family='Arial', weight='bold'),
-            hovertemplate='<b>%{x}</b><br><b>Ventas:</b> <b>%{y}</b><extra></extra>',
-            name='Ventas'
-        ))
-        
-        fig_semanas.update_layout(
-            title=dict(
-                text=f"Distribución Diaria de Ventas - {mes_seleccionado_display}",
-                font=dict(size=16, color='#1e293b', family='Arial'),
-                x=0.5,
-                xanchor='center'
-            ),
-            height=550,
-            margin=dict(l=50, r=50, t=80, b=150),
-            xaxis_title="Día",
-            yaxis_title="Cantidad de Ventas",
-            xaxis=dict(
-                tickfont=dict(size=9, color='#64748b'),
-                tickangle=-90,
-            ),
-            yaxis=dict(
-                gridcolor='rgba(0,0,0,0.05)',
-                showgrid=True,
-                zeroline=False,
-                tickfont=dict(size=11, color='#64748b'),
-            ),
-            plot_bgcolor='rgba(248, 250, 252, 0.5)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=11, family='Arial', color='#1e293b'),
-            hovermode='x unified',
-            showlegend=False
-        )
+        fig_semanas = get_figura_instaladas_semana(periodo_analisis, mes_seleccionado_display)
         
         st.plotly_chart(fig_semanas, use_container_width=True, config={'displayModeBar': False})
         
@@ -2317,157 +1977,22 @@ with tab1:
         with col4:
             st.metric("Promedio por Día", f"{promedio:.1f}")
         
-        st.dataframe(
-            df_tabla_semanas,
-            use_container_width=True,
-            hide_index=True,
-            column_config={
-                "Día": st.column_config.TextColumn(width=200),
-                "Instaladas": st.column_config.NumberColumn(width=150)
-            }
-        )
-        
-        # ============= COMPARATIVA POR HORARIO: FULL TIME vs PART TIME dentro del tab1 =============
-        st.markdown('<div style="margin-top: 40px;"></div>', unsafe_allow_html=True)
-        st.markdown("#### 📊 Comparativa por Horario: FULL TIME vs PART TIME")
-        
-        # Función para generar datos detallados por horario
-        def generar_tabla_horario(mes_sel, meta_minima=60):
-            df_lista = load_lista_metas()
-            df_drive = load_drive_data()
-            
-            if df_lista is None or df_drive is None:
-                return None, None
-            
-            # Preparar LISTA - limpiar espacios en Asesor y convertir Meta a numérico
-            df_lista_clean = df_lista.copy()
-            df_lista_clean['Asesor'] = df_lista_clean['Asesor'].astype(str).str.strip()
-            df_lista_clean['Meta'] = pd.to_numeric(df_lista_clean['Meta'], errors='coerce').fillna(0)
-            
-            # Preparar DRIVE
-            df_drive_clean = df_drive.copy()
-            df_drive_clean['ASESOR'] = df_drive_clean['ASESOR'].astype(str).str.strip()
-            df_drive_clean['ESTADO'] = df_drive_clean['ESTADO'].astype(str).str.strip()
-            df_mes_drive = df_drive_clean[df_drive_clean['MES'] == mes_sel]
-            
-            # Obtener datos de LISTA
-            df_mes_lista = df_lista_clean[df_lista_clean['Mes'] == mes_sel]
-            
-            # Clasificar asesores por horario: FULL TIME son meta 60 o meta 45, resto es PART TIME
-            full_time = df_mes_lista[(df_mes_lista['Meta'] == 60) | (df_mes_lista['Meta'] == 45)]['Asesor'].tolist()
-            part_time = df_mes_lista[(df_mes_lista['Meta'] != 60) & (df_mes_lista['Meta'] != 45)]['Asesor'].tolist()
-            
-            def procesar_horario(lista_asesoras):
-                datos_tabla = []
-                total_meta = 0
-                total_instalado = 0
-                total_pendiente = 0
-                
-                for idx, asesor in enumerate(lista_asesoras, 1):
-                    # Meta
-                    meta = df_mes_lista[df_mes_lista['Asesor'] == asesor]['Meta'].sum()
-                    if meta == 0:
-                        meta = 0
-                    
-                    # Instalado y Pendiente
-                    df_asesor = df_mes_drive[df_mes_drive['ASESOR'] == asesor]
-                    instalado = len(df_asesor[df_asesor['ESTADO'] == 'INSTALADO'])
-                    pendiente = len(df_asesor[df_asesor['ESTADO'] == 'PENDIENTE'])
-                    
-                    # Alcance (Cumplimiento)
-                    alcance = round((instalado / meta * 100)) if meta > 0 else 0
-                    
-                    datos_tabla.append({
-                        'pos': idx,
-                        'asesor': asesor,
-                        'meta': int(meta),
-                        'instalado': int(instalado),
-                        'pendiente': int(pendiente),
-                        'alcance': int(alcance)
-                    })
-                    
-                    total_meta += meta
-                    total_instalado += instalado
-                    total_pendiente += pendiente
-                
-                # Ordenar datos por alcance de mayor a menor
-                datos_tabla_ordenado = sorted(datos_tabla, key=lambda x: x['alcance'], reverse=True)
-                
-                # Actualizar posiciones después del ordenamiento
-                for idx, item in enumerate(datos_tabla_ordenado, 1):
-                    item['pos'] = idx
-                
-                return {
-                    'datos': datos_tabla_ordenado,
-                    'totales': {
-                        'meta': int(total_meta),
-                        'instalado': int(total_instalado),
-                        'pendiente': int(total_pendiente),
-                        'alcance': round((total_instalado / total_meta * 100)) if total_meta > 0 else 0
-                    }
-                }
-            
-            datos_full_time = procesar_horario(full_time)
-            datos_part_time = procesar_horario(part_time)
-            
-            return datos_full_time, datos_part_time
-        
-        # Generar datos de ambos horarios
-        datos_full_time, datos_part_time = generar_tabla_horario(mes_nombre_analisis)
-        
-        # Crear tablas HTML detalladas
-        def crear_tabla_html_horario(datos_horario, nombre_horario, color_header, color_accent):
-            if datos_horario is None or not datos_horario['datos']:
-                return ""
-            
-            html = f'''<div style="margin: 20px 0; background: white; border-radius: 8px; overflow: auto; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-            <table style="width: 100%; border-collapse: collapse; font-family: Arial, sans-serif; min-width: 100%;">
-            <thead>
-                <tr style="background: {color_header}; color: white;">
-                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">Nº ASESOR</th>
-                    <th style="padding: 12px; text-align: left; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2); min-width: 170px;">ASESOR</th>
-                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">OBJETIVO</th>
-                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">INSTALADO</th>
-                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">PENDIENTE</th>
-                    <th style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">% ALCANCE</th>
-                </tr>
-            </thead>
-            <tbody>
-            '''
-            
-            # Agregar filas de datos
-            for item in datos_horario['datos']:
-                color_fila = '#f9fafb' if item['pos'] % 2 == 0 else '#ffffff'
-                alcance_color = '#10b981' if item['alcance'] >= 70 else '#f59e0b' if item['alcance'] >= 50 else '#ef4444'
-                
-                html += f'''<tr style="background-color: {color_fila}; border-bottom: 1px solid #e5e7eb;">
-                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; color: {color_accent};">#{item['pos']}</td>
-                    <td style="padding: 10px 12px; text-align: left; font-weight: 500; font-size: 11px;">{item['asesor']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px;">{item['meta']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; color: #10b981;">{item['instalado']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; color: #f59e0b;">{item['pendiente']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-weight: 600; font-size: 11px; background-color: {alcance_color}22; color: {alcance_color}; border-radius: 4px;">{item['alcance']}%</td>
-                </tr>'''
-            
-            # Agregar fila de totales
-            totales = datos_horario['totales']
-            alcance_total_color = '#10b981' if totales['alcance'] >= 70 else '#f59e0b' if totales['alcance'] >= 50 else '#ef4444'
-            html += f'''<tr style="background: {color_header}; color: white; font-weight: 700;">
-                    <td colspan="2" style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['meta']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['meta']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['instalado']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white;">{totales['pendiente']}</td>
-                    <td style="padding: 10px 12px; text-align: center; font-size: 12px; color: white; background-color: {alcance_total_color}40; border-radius: 4px;">{totales['alcance']}%</td>
-                </tr>
-            </tbody>
-            </table>
-            </div>'''
-            
-            return html
+        st.dataframe(
+            df_tabla_semanas,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Día": st.column_config.TextColumn(width=200),
+                "Instaladas": st.column_config.NumberColumn(width=150)
+            }
+        )
+        
+        # ============= COMPARATIVA POR HORARIO: FULL TIME vs PART TIME dentro de la vista por mes =============
+        st.markdown('<div style="margin-top: 40px;"></div>', unsafe_allow_html=True)
+        st.markdown("#### 📊 Comparativa por Horario: FULL TIME vs PART TIME")
         
-        # Generar HTML para ambos horarios
-        html_full_time = crear_tabla_html_horario(datos_full_time, "FULL TIME", "#3b82f6", "#3b82f6")
-        html_part_time = crear_tabla_html_horario(datos_part_time, "PART TIME", "#8b5cf6", "#8b5cf6")
+        # Tablas HTML de ambos horarios (cacheadas por mes y versión de datos)
+        html_full_time, html_part_time = get_tablas_horario_html(periodo_analisis)
         
         # Mostrar tablas en dos columnas
         col_full_time, col_part_time = st.columns(2)
@@ -2488,66 +2013,13 @@ with tab1:
     else:
         st.warning(f"No hay datos de instaladas para {mes_seleccionado_display}")
 
-# TAB 2: Comparativo acumulativo entre meses
-with tab2:
+# Vista 2: comparativo acumulativo entre meses
+else:
     st.markdown("#### 📈 Comparativa Acumulativa de Instaladas (Todos los Meses)")
     
-    df_comparativo = get_comparativo_acumulativo_multiples_meses()
+    fig_comparativo = get_figura_comparativo_acumulativo()
     
-    if not df_comparativo.empty:
-        # Crear gráfico de líneas para comparar meses
-        fig_comparativo = go.Figure()
-        
-        # Agregar línea por cada mes
-        for mes_col in df_comparativo.columns:
-            fig_comparativo.add_trace(go.Scatter(
-                x=df_comparativo.index,
-                y=df_comparativo[mes_col],
-                mode='lines+markers',
-                name=mes_col,
-                line=dict(width=2.5),
-                marker=dict(size=6),
-                hovertemplate='<b>Día %{x}</b><br><b>' + mes_col + ':</b> %{y} acumuladas<extra></extra>'
-            ))
-        
-        fig_comparativo.update_layout(
-            title=dict(
-                text="Comparativa Acumulativa de Instaladas por Día (Todos los Meses)",
-                font=dict(size=16, color='#1e293b', family='Arial'),
-                x=0.5,
-                xanchor='center'
-            ),
-            height=550,
-            margin=dict(l=60, r=60, t=80, b=80),
-            xaxis_title="Día del Mes",
-            yaxis_title="Total Acumulado de Instaladas",
-            xaxis=dict(
-                tickfont=dict(size=11, color='#64748b'),
-                tickmode='linear',
-                tick0=1,
-                dtick=2
-            ),
-            yaxis=dict(
-                gridcolor='rgba(0,0,0,0.05)',
-                showgrid=True,
-                zeroline=False,
-                tickfont=dict(size=11, color='#64748b'),
-            ),
-            plot_bgcolor='rgba(248, 250, 252, 0.5)',
-            paper_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=11, family='Arial', color='#1e293b'),
-            hovermode='x unified',
-            legend=dict(
-                x=1.02,
-                y=1,
-                xanchor='left',
-                yanchor='top',
-                bgcolor='rgba(255, 255, 255, 0.8)',
-                bordercolor='#e2e8f0',
-                borderwidth=1
-            )
-        )
-        
+    if fig_comparativo is not None:
         st.plotly_chart(fig_comparativo, use_container_width=True, config={'displayModeBar': False})
     else:
         st.warning("No hay datos suficientes para el comparativo de meses")
@@ -2569,29 +2041,21 @@ df_detail['Cumpl%'] = df_detail['Cumplimiento'].astype(str) + '%'
 df_detail['Efect%'] = df_detail['Efectividad'].astype(str) + '%'
 
 # Agregar columna de Pendientes solo para el mes actual
-# Obtener mes actual
-meses_nombres = {1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril', 5: 'Mayo', 6: 'Junio',
-                 7: 'Julio', 8: 'Agosto', 9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'}
-mes_actual = meses_nombres[datetime.now().month]
+# Obtener período actual
+hoy = datetime.now()
+periodo_actual = periodo_de(hoy.year, hoy.month)
+
+# Métricas de todos los asesores del detalle en una sola pasada
+df_metricas_detalle = get_metricas_asesores(df_detail['Asesor'].tolist(), periodo)
+df_metricas_detalle = df_metricas_detalle.reindex([asesor.strip() for asesor in df_detail['Asesor']])
 
 # Solo agregar columna de Pendientes si el mes seleccionado es el mes actual
-if mes == mes_actual:
-    pendientes_list = []
-    for asesor in df_detail['Asesor']:
-        pendientes = get_pendientes_asesor_mes(asesor, mes)
-        pendientes_list.append(pendientes)
-    df_detail['Pendientes'] = pendientes_list
+if periodo == periodo_actual:
+    df_detail['Pendientes'] = df_metricas_detalle['PENDIENTES'].tolist()
 
 # Agregar columnas de Leads y Con Cobertura
-leads_list = []
-con_cobertura_list = []
-for asesor in df_detail['Asesor']:
-    leads = get_leads_asesor_mes(asesor, mes)
-    con_cobertura = get_con_cobertura_asesor_mes(asesor, mes)
-    leads_list.append(leads)
-    con_cobertura_list.append(con_cobertura)
-df_detail['Leads'] = leads_list
-df_detail['Con Cobertura'] = con_cobertura_list
+df_detail['Leads'] = df_metricas_detalle['LEADS'].tolist()
+df_detail['Con Cobertura'] = df_metricas_detalle['CON_COBERTURA'].tolist()
 
 # Separar en Full Time (meta >= 55) y Part Time (meta < 55)
 # Excepción: CARLACA, ISABEL y LAURA son FULL TIME aunque tengan meta 45
@@ -2608,70 +2072,61 @@ else:
     df_fulltime = df_fulltime.sort_values('Cumplimiento', ascending=False).reset_index(drop=True)
     df_parttime = df_parttime.sort_values('Cumplimiento', ascending=False).reset_index(drop=True)
 
-# Función para generar tabla HTML
-def generar_tabla_detalle(df_tabla, tipo_empleado):
-    # Obtener mes actual
-    meses_nombres = {1: 'Enero', 2: 'Febrero', 3: 'Marzo', 4: 'Abril', 5: 'Mayo', 6: 'Junio',
-                     7: 'Julio', 8: 'Agosto', 9: 'Septiembre', 10: 'Octubre', 11: 'Noviembre', 12: 'Diciembre'}
-    mes_actual = meses_nombres[datetime.now().month]
+# Función para generar tabla HTML (cacheada por tabla, período y versión de datos)
+@cache_por_version(por_dia=True)
+def generar_tabla_detalle(df_tabla, tipo_empleado, periodo):
+    # Obtener período actual
+    hoy = datetime.now()
     
     # Verificar si mostrar columna de Pendientes (solo si es el mes actual)
-    mostrar_pendientes = mes == mes_actual
+    mostrar_pendientes = periodo == periodo_de(hoy.year, hoy.month)
     
     if mostrar_pendientes:
         html_tabla = '<div class="meta-tabla"><table><thead><tr><th style="width: 4%;">Pos</th><th style="width: 18%;">Asesor</th><th style="width: 6%;">Leads</th><th style="width: 8%;">Cob</th><th style="width: 6%;">Meta</th><th style="width: 7%;">Inst</th><th style="width: 7%;">Canc</th><th style="width: 7%;">Pend</th><th style="width: 8%;">Cumpl%</th><th style="width: 9%;">Conv%</th><th style="width: 12%;">Estado</th></tr></thead><tbody>'
     else:
         html_tabla = '<div class="meta-tabla"><table><thead><tr><th style="width: 5%;">Pos</th><th style="width: 22%;">Asesor</th><th style="width: 7%;">Leads</th><th style="width: 8%;">Cob</th><th style="width: 7%;">Meta</th><th style="width: 8%;">Inst</th><th style="width: 8%;">Canc</th><th style="width: 9%;">Cumpl%</th><th style="width: 10%;">Conv%</th><th style="width: 10%;">Estado</th></tr></thead><tbody>'
 
-    for idx, (_, row) in enumerate(df_tabla.iterrows(), 1):
-        asesor = row['Asesor']
-        leads = int(row.get('Leads', 0))
-        con_cobertura = int(row.get('Con Cobertura', 0))
-        meta = int(row['Meta'])
-        instaladas = int(row['Instaladas'])
-        canceladas = int(row['Canceladas'])
-        pendientes = int(row.get('Pendientes', 0)) if mostrar_pendientes else 0
-        cumpl = int(row['Cumplimiento'])
-        efect = int(row['Efectividad'])
-        
-        # Determinar estado
-        if cumpl >= 70:
-            estado = '<span class="status-excellent">✓ Excelente</span>'
-            fila_bg = 'background-color: #f0fdf4;'
-        elif cumpl >= 50:
-            estado = '<span class="status-good">~ Bueno</span>'
-            fila_bg = 'background-color: #fffbeb;'
-        else:
-            estado = '<span class="status-poor">✗ Bajo</span>'
-            fila_bg = 'background-color: #fef2f2;'
-        
-        if mostrar_pendientes:
-            html_tabla += f'''<tr style="{fila_bg}">
-                <td style="font-weight: 700; text-align: center; color: #0066cc;">#{idx}</td>
-                <td style="font-weight: 600;">{asesor}</td>
-                <td style="text-align: center; font-weight: 600; color: #0066cc;">{leads}</td>
-                <td style="text-align: center; font-weight: 600; color: #8b5cf6;">{con_cobertura}</td>
-                <td style="text-align: center; font-weight: 600;">{meta}</td>
-                <td style="text-align: center; font-weight: 600; color: #10b981;">{instaladas}</td>
-                <td style="text-align: center; font-weight: 600; color: #ef4444;">{canceladas}</td>
-                <td style="text-align: center; font-weight: 600; color: #f59e0b;">{pendientes}</td>
-                <td style="text-align: center;"><div class="meta-valor">{cumpl}%</div></td>
-                <td style="text-align: center;"><div class="meta-valor" style="background: linear-gradient(135deg, #0066cc 0%, #0052a3 100%);">{efect}%</div></td>
-                <td style="text-align: center;">{estado}</td>
-            </tr>'''
-        else:
-            html_tabla += f'''<tr style="{fila_bg}">
-                <td style="font-weight: 700; text-align: center; color: #0066cc;">#{idx}</td>
+    # Estado y fondo de cada fila según el cumplimiento
+    cumpl = enteros(df_tabla['Cumplimiento'])
+    estado = por_cumplimiento(
+        cumpl,
+        '<span class="status-excellent">✓ Excelente</span>',
+        '<span class="status-good">~ Bueno</span>',
+        '<span class="status-poor">✗ Bajo</span>'
+    )
+    fila_bg = por_cumplimiento(
+        cumpl, 'background-color: #f0fdf4;', 'background-color: #fffbeb;', 'background-color: #fef2f2;'
+    )
+    celda_pendientes = '''
+                <td style="text-align: center; font-weight: 600; color: #f59e0b;">{pendientes}</td>''' if mostrar_pendientes else ''
+    sin_dato = np.zeros(len(df_tabla), dtype=np.int64)
+
+    html_tabla += filas_html(
+        '''<tr style="{fila_bg}">
+                <td style="font-weight: 700; text-align: center; color: #0066cc;">#{pos}</td>
                 <td style="font-weight: 600;">{asesor}</td>
                 <td style="text-align: center; font-weight: 600; color: #0066cc;">{leads}</td>
                 <td style="text-align: center; font-weight: 600; color: #8b5cf6;">{con_cobertura}</td>
                 <td style="text-align: center; font-weight: 600;">{meta}</td>
                 <td style="text-align: center; font-weight: 600; color: #10b981;">{instaladas}</td>
-                <td style="text-align: center; font-weight: 600; color: #ef4444;">{canceladas}</td>
+                <td style="text-align: center; font-weight: 600; color: #ef4444;">{canceladas}</td>''' + celda_pendientes + '''
                 <td style="text-align: center;"><div class="meta-valor">{cumpl}%</div></td>
                 <td style="text-align: center;"><div class="meta-valor" style="background: linear-gradient(135deg, #0066cc 0%, #0052a3 100%);">{efect}%</div></td>
                 <td style="text-align: center;">{estado}</td>
-            </tr>'''
+            </tr>''',
+        fila_bg=fila_bg,
+        pos=np.arange(1, len(df_tabla) + 1),
+        asesor=df_tabla['Asesor'],
+        leads=enteros(df_tabla['Leads']) if 'Leads' in df_tabla else sin_dato,
+        con_cobertura=enteros(df_tabla['Con Cobertura']) if 'Con Cobertura' in df_tabla else sin_dato,
+        meta=enteros(df_tabla['Meta']),
+        instaladas=enteros(df_tabla['Instaladas']),
+        canceladas=enteros(df_tabla['Canceladas']),
+        pendientes=enteros(df_tabla['Pendientes']) if 'Pendientes' in df_tabla else sin_dato,
+        cumpl=cumpl,
+        efect=enteros(df_tabla['Efectividad']),
+        estado=estado,
+    )
 
     html_tabla += '</tbody></table></div>'
     return html_tabla
@@ -2679,14 +2134,14 @@ def generar_tabla_detalle(df_tabla, tipo_empleado):
 # Mostrar tabla Full Time
 if not df_fulltime.empty:
     st.markdown("#### 💼 Asesores Full Time (8 horas - Meta ≥ 55)")
-    html_fulltime = generar_tabla_detalle(df_fulltime, "Full Time")
+    html_fulltime = generar_tabla_detalle(df_fulltime, "Full Time", periodo)
     st.markdown(html_fulltime, unsafe_allow_html=True)
     st.markdown('<div style="margin: 15px 0;"></div>', unsafe_allow_html=True)
 
 # Mostrar tabla Part Time
 if not df_parttime.empty:
     st.markdown("#### 👨‍💼 Asesores Part Time (4 horas - Meta < 55)")
-    html_parttime = generar_tabla_detalle(df_parttime, "Part Time")
+    html_parttime = generar_tabla_detalle(df_parttime, "Part Time", periodo)
     st.markdown(html_parttime, unsafe_allow_html=True)
 
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
@@ -2695,111 +2150,11 @@ st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 st.markdown("#### 👥 Detalle Completo de Todos los Asesores")
 
 # Cargar datos agrupados por CODIGO DE CARGA para el mes seleccionado
-df_codigos_carga = load_data_codigo_carga(mes)
+df_codigos_carga = load_data_codigo_carga(periodo)
 
 if not df_codigos_carga.empty:
-    # Crear tabla HTML con el formato deseado
-    def generar_tabla_codigos_carga(df_datos):
-        """Genera tabla HTML para datos agrupados por CODIGO DE CARGA"""
-        html = '''<div style="margin: 20px 0; background: white; border-radius: 8px; overflow: auto; box-shadow: 0 2px 8px rgba(0,0,0,0.1);">
-        <table style="width: 100%; border-collapse: collapse; font-family: Arial, sans-serif;">
-        <thead>
-            <tr style="background: linear-gradient(135deg, #0066cc 0%, #00d4ff 100%); color: white;">
-                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">POS</th>
-                <th style="padding: 14px; text-align: left; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2); min-width: 180px;">CODIGO CARGA</th>
-                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">TOTAL DE LEADS</th>
-                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);"># CON COBERTURA</th>
-                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">TOTAL DE VENTAS</th>
-                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px; border-right: 1px solid rgba(255,255,255,0.2);">%CONV. VENTAS FINAL</th>
-                <th style="padding: 14px; text-align: center; font-weight: 700; font-size: 12px;">%CONV. VENTAS</th>
-            </tr>
-        </thead>
-        <tbody>
-        '''
-        
-        for idx, row in df_datos.iterrows():
-            color_fila = '#f9fafb' if idx % 2 == 0 else '#ffffff'
-            pos = int(row['POS'])
-            codigo = row['CODIGO_CARGA']
-            leads = int(row['LEADS'])
-            con_cobertura = int(row['CON_COBERTURA'])
-            ventas = int(row['VENTAS'])
-            conv_ventas = int(row['CONV_VENTAS'])
-            conv_ventas_cob = int(row['CONV_VENTAS_COB'])
-            
-            # Determinar color para ventas
-            if ventas > 0:
-                color_ventas = '#10b981'  # Verde
-            else:
-                color_ventas = '#64748b'  # Gris
-            
-            # Determinar color para conversión respecto a leads
-            if conv_ventas >= 10:
-                color_conv = '#10b981'  # Verde
-            elif conv_ventas == 9:
-                color_conv = '#f59e0b'  # Naranja
-            else:
-                color_conv = '#ef4444'  # Rojo
-            
-            # Determinar color para conversión respecto a con cobertura
-            if conv_ventas_cob >= 10:
-                color_conv_cob = '#10b981'  # Verde
-            elif conv_ventas_cob == 9:
-                color_conv_cob = '#f59e0b'  # Naranja
-            else:
-                color_conv_cob = '#ef4444'  # Rojo
-            
-            html += f'''<tr style="background-color: {color_fila}; border-bottom: 1px solid #e5e7eb;">
-                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; color: #0066cc;">#{pos}</td>
-                <td style="padding: 12px; text-align: left; font-weight: 500; font-size: 12px;">{codigo}</td>
-                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px;">{leads}</td>
-                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px;">{con_cobertura}</td>
-                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; color: {color_ventas};">{ventas}</td>
-                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; background-color: {color_conv}22; color: {color_conv}; border-radius: 4px;">{conv_ventas}%</td>
-                <td style="padding: 12px; text-align: center; font-weight: 600; font-size: 12px; background-color: {color_conv_cob}22; color: {color_conv_cob}; border-radius: 4px;">{conv_ventas_cob}%</td>
-            </tr>'''
-        
-        # Calcular y agregar fila de TOTALES
-        total_leads = df_datos['LEADS'].sum()
-        total_con_cobertura = df_datos['CON_COBERTURA'].sum()
-        total_ventas = df_datos['VENTAS'].sum()
-        total_conv_ventas_cob = int((total_ventas / total_con_cobertura * 100)) if total_con_cobertura > 0 else 0
-        total_conv_ventas = int((total_ventas / total_leads * 100)) if total_leads > 0 else 0
-        
-        # Determinar color para conversión total respecto a con cobertura
-        if total_conv_ventas_cob >= 10:
-            color_conv_total_cob = '#10b981'  # Verde
-        elif total_conv_ventas_cob == 9:
-            color_conv_total_cob = '#f59e0b'  # Naranja
-        else:
-            color_conv_total_cob = '#ef4444'  # Rojo
-        
-        # Determinar color para conversión total respecto a leads
-        if total_conv_ventas >= 10:
-            color_conv_total = '#10b981'  # Verde
-        elif total_conv_ventas == 9:
-            color_conv_total = '#f59e0b'  # Naranja
-        else:
-            color_conv_total = '#ef4444'  # Rojo
-        
-        html += f'''<tr style="background: linear-gradient(135deg, #0066cc 0%, #00d4ff 100%); color: white; font-weight: 700;">
-            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;"></td>
-            <td style="padding: 12px; text-align: left; font-weight: 700; font-size: 12px;">TOTAL</td>
-            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">{total_leads}</td>
-            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">{total_con_cobertura}</td>
-            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px;">{total_ventas}</td>
-            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; background-color: {color_conv_total}40; color: white; border-radius: 4px;">{total_conv_ventas}%</td>
-            <td style="padding: 12px; text-align: center; font-weight: 700; font-size: 12px; background-color: {color_conv_total_cob}40; color: white; border-radius: 4px;">{total_conv_ventas_cob}%</td>
-        </tr>'''
-        
-        html += '''</tbody>
-        </table>
-        </div>'''
-        
-        return html
-    
-    # Generar y mostrar tabla
-    html_tabla = generar_tabla_codigos_carga(df_codigos_carga)
+    # Generar y mostrar tabla (cacheada por mes y versión de datos)
+    html_tabla = get_tabla_codigos_carga_html(periodo)
     st.markdown(html_tabla, unsafe_allow_html=True)
     
     # Mostrar estadísticas generales
@@ -2826,157 +2181,167 @@ st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 # ============= NUEVA SECCIÓN: ANÁLISIS DE CASOS POR NIVEL =============
 st.markdown("### 📋 Análisis de Casos por Nivel (MANTRA)")
 
-# Obtener datos detallados de MANTRA
-df_mantra_mes = get_datos_mantra_mes(mes)
-
-if not df_mantra_mes.empty:
-    # Crear filtros múltiples en 4 columnas
-    col1, col2, col3, col4 = st.columns(4, gap="small")
-    
-    with col1:
-        agentes_unique = sorted(df_mantra_mes['Agente'].unique())
-        agente_filtro = st.selectbox(
-            "Agente",
-            ["Todos"] + list(agentes_unique),
-            key="agente_filtro_casos"
-        )
-    
-    # Filtrar por agente para obtener valores únicos de niveles
-    if agente_filtro == "Todos":
-        df_temp = df_mantra_mes.copy()
-    else:
-        df_temp = df_mantra_mes[df_mantra_mes['Agente'] == agente_filtro]
-    
-    with col2:
-        nivel1_unique = sorted(df_temp['NIVEL 1'].unique())
-        nivel1_filtro = st.selectbox(
-            "Nivel 1",
-            ["Todos"] + list(nivel1_unique),
-            key="nivel1_filtro_casos"
-        )
-    
-    # Filtrar por nivel 1
-    if nivel1_filtro == "Todos":
-        df_temp2 = df_temp.copy()
-    else:
-        df_temp2 = df_temp[df_temp['NIVEL 1'] == nivel1_filtro]
-    
-    with col3:
-        nivel2_unique = sorted(df_temp2['NIVEL 2'].unique())
-        nivel2_filtro = st.selectbox(
-            "Nivel 2",
-            ["Todos"] + list(nivel2_unique),
-            key="nivel2_filtro_casos"
-        )
-    
-    # Filtrar por nivel 2
-    if nivel2_filtro == "Todos":
-        df_temp3 = df_temp2.copy()
-    else:
-        df_temp3 = df_temp2[df_temp2['NIVEL 2'] == nivel2_filtro]
-    
-    with col4:
-        nivel3_unique = sorted(df_temp3['NIVEL 3'].unique())
-        nivel3_filtro = st.multiselect(
-            "Nivel 3",
-            list(nivel3_unique),
-            default=list(nivel3_unique),
-            key="nivel3_filtro_casos"
-        )
-    
-    # Aplicar todos los filtros
-    df_filtrado = df_mantra_mes.copy()
-    
-    if agente_filtro != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['Agente'] == agente_filtro]
-    
-    if nivel1_filtro != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['NIVEL 1'] == nivel1_filtro]
+@st.fragment
+def seccion_casos_por_nivel(periodo):
+    """Casos de MANTRA filtrados por agente y niveles: los filtros vuelven a
+    ejecutar solo esta sección"""
+    mes = nombre_periodo(periodo)
     
-    if nivel2_filtro != "Todos":
-        df_filtrado = df_filtrado[df_filtrado['NIVEL 2'] == nivel2_filtro]
-    
-    if nivel3_filtro:
-        df_filtrado = df_filtrado[df_filtrado['NIVEL 3'].isin(nivel3_filtro)]
-    
-    # Mostrar total de casos filtrados
-    total_casos_filtrados = len(df_filtrado)
-    st.markdown(f"### Total de Casos: **{total_casos_filtrados}**")
-    
-    # Mostrar vista previa (primeros 10 registros)
-    if total_casos_filtrados > 0:
-        col_preview, col_download = st.columns([4, 1])
+    # Obtener datos detallados de MANTRA
+    df_mantra_mes = get_datos_mantra_mes(periodo)
+
+    if not df_mantra_mes.empty:
+        # Crear filtros múltiples en 4 columnas
+        col1, col2, col3, col4 = st.columns(4, gap="small")
         
-        with col_preview:
-            st.markdown("#### Vista Previa (Primeros 10 registros)")
-            
-            # Seleccionar columnas para mostrar
-            cols_mostrar = ['Agente', 'NIVEL 1', 'NIVEL 2', 'NIVEL 3']
-            if 'Telefono' in df_filtrado.columns:
-                cols_mostrar.insert(1, 'Telefono')
-            if 'Numero Caso' in df_filtrado.columns:
-                cols_mostrar.insert(0, 'Numero Caso')
-            
-            df_preview = df_filtrado[cols_mostrar].head(10)
-            st.dataframe(df_preview, use_container_width=True, hide_index=True)
-            
-            if total_casos_filtrados > 10:
-                st.caption(f"Mostrando 10 de {total_casos_filtrados} registros")
+        with col1:
+            agentes_unique = sorted(df_mantra_mes['Agente'].dropna().unique())
+            agente_filtro = st.selectbox(
+                "Agente",
+                ["Todos"] + list(agentes_unique),
+                key="agente_filtro_casos"
+            )
+        
+        # Filtrar por agente para obtener valores únicos de niveles
+        if agente_filtro == "Todos":
+            df_temp = df_mantra_mes
+        else:
+            df_temp = df_mantra_mes[df_mantra_mes['Agente'] == agente_filtro]
+        
+        with col2:
+            nivel1_unique = sorted(df_temp['NIVEL 1'].dropna().unique())
+            nivel1_filtro = st.selectbox(
+                "Nivel 1",
+                ["Todos"] + list(nivel1_unique),
+                key="nivel1_filtro_casos"
+            )
+        
+        # Filtrar por nivel 1
+        if nivel1_filtro == "Todos":
+            df_temp2 = df_temp
+        else:
+            df_temp2 = df_temp[df_temp['NIVEL 1'] == nivel1_filtro]
+        
+        with col3:
+            nivel2_unique = sorted(df_temp2['NIVEL 2'].dropna().unique())
+            nivel2_filtro = st.selectbox(
+                "Nivel 2",
+                ["Todos"] + list(nivel2_unique),
+                key="nivel2_filtro_casos"
+            )
+        
+        # Filtrar por nivel 2
+        if nivel2_filtro == "Todos":
+            df_temp3 = df_temp2
+        else:
+            df_temp3 = df_temp2[df_temp2['NIVEL 2'] == nivel2_filtro]
+        
+        with col4:
+            nivel3_unique = sorted(df_temp3['NIVEL 3'].dropna().unique())
+            nivel3_filtro = st.multiselect(
+                "Nivel 3",
+                list(nivel3_unique),
+                default=list(nivel3_unique),
+                key="nivel3_filtro_casos"
+            )
         
-        with col_download:
-            st.markdown("#### Descargar")
+        # Aplicar todos los filtros
+        df_filtrado = df_mantra_mes
+        
+        if agente_filtro != "Todos":
+            df_filtrado = df_filtrado[df_filtrado['Agente'] == agente_filtro]
+        
+        if nivel1_filtro != "Todos":
+            df_filtrado = df_filtrado[df_filtrado['NIVEL 1'] == nivel1_filtro]
+        
+        if nivel2_filtro != "Todos":
+            df_filtrado = df_filtrado[df_filtrado['NIVEL 2'] == nivel2_filtro]
+        
+        if nivel3_filtro:
+            df_filtrado = df_filtrado[df_filtrado['NIVEL 3'].isin(nivel3_filtro)]
+        
+        # Mostrar total de casos filtrados
+        total_casos_filtrados = len(df_filtrado)
+        st.markdown(f"### Total de Casos: **{total_casos_filtrados}**")
+        
+        # Mostrar vista previa (primeros 10 registros)
+        if total_casos_filtrados > 0:
+            col_preview, col_download = st.columns([4, 1])
             
-            # Crear archivo Excel con todos los datos filtrados
-            from io import BytesIO
-            import openpyxl
-            from openpyxl.styles import Font, PatternFill, Alignment
+            with col_preview:
+                st.markdown("#### Vista Previa (Primeros 10 registros)")
+                
+                # Seleccionar columnas para mostrar
+                cols_mostrar = ['Agente', 'NIVEL 1', 'NIVEL 2', 'NIVEL 3']
+                if 'Telefono' in df_filtrado.columns:
+                    cols_mostrar.insert(1, 'Telefono')
+                if 'Numero Caso' in df_filtrado.columns:
+                    cols_mostrar.insert(0, 'Numero Caso')
+                
+                df_preview = df_filtrado[cols_mostrar].head(10)
+                st.dataframe(df_preview, use_container_width=True, hide_index=True)
+                
+                if total_casos_filtrados > 10:
+                    st.caption(f"Mostrando 10 de {total_casos_filtrados} registros")
             
-            buffer = BytesIO()
-            with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                df_filtrado.to_excel(writer, sheet_name='Casos Filtrados', index=False)
+            with col_download:
+                st.markdown("#### Descargar")
                 
-                workbook = writer.book
-                worksheet = writer.sheets['Casos Filtrados']
+                # Crear archivo Excel con todos los datos filtrados
+                from io import BytesIO
+                import openpyxl
+                from openpyxl.styles import Font, PatternFill, Alignment
                 
-                # Estilos
-                header_fill = PatternFill(start_color="0066cc", end_color="0066cc", fill_type="solid")
-                header_font = Font(color="FFFFFF", bold=True, size=11)
+                buffer = BytesIO()
+                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+                    # Solo las columnas de la hoja MANTRA (sin las que se agregan al cargar)
+                    columnas_excel(df_filtrado).to_excel(writer, sheet_name='Casos Filtrados', index=False)
+                    
+                    workbook = writer.book
+                    worksheet = writer.sheets['Casos Filtrados']
+                    
+                    # Estilos
+                    header_fill = PatternFill(start_color="0066cc", end_color="0066cc", fill_type="solid")
+                    header_font = Font(color="FFFFFF", bold=True, size=11)
+                    
+                    # Aplicar estilos al encabezado
+                    for cell in worksheet[1]:
+                        cell.fill = header_fill
+                        cell.font = header_font
+                        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+                    
+                    # Aplicar estilos a datos
+                    for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row):
+                        for cell in row:
+                            cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
+                    
+                    # Ajustar anchos de columna
+                    for col_num, col in enumerate(worksheet.columns, 1):
+                        col_letter = openpyxl.utils.get_column_letter(col_num)
+                        worksheet.column_dimensions[col_letter].width = 20
                 
-                # Aplicar estilos al encabezado
-                for cell in worksheet[1]:
-                    cell.fill = header_fill
-                    cell.font = header_font
-                    cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+                buffer.seek(0)
                 
-                # Aplicar estilos a datos
-                for row in worksheet.iter_rows(min_row=2, max_row=worksheet.max_row):
-                    for cell in row:
-                        cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
+                # Preparar nombre del archivo con agente y fecha
+                nombre_asesor = agente_filtro if agente_filtro != "Todos" else "Todos"
+                fecha_hoy = datetime.now().strftime('%d_%m_%Y')
+                nombre_archivo = f"Casos_Filtrados_{nombre_asesor}_{mes}_{fecha_hoy}.xlsx"
                 
-                # Ajustar anchos de columna
-                for col_num, col in enumerate(worksheet.columns, 1):
-                    col_letter = openpyxl.utils.get_column_letter(col_num)
-                    worksheet.column_dimensions[col_letter].width = 20
-            
-            buffer.seek(0)
-            
-            # Preparar nombre del archivo con agente y fecha
-            nombre_asesor = agente_filtro if agente_filtro != "Todos" else "Todos"
-            fecha_hoy = datetime.now().strftime('%d_%m_%Y')
-            nombre_archivo = f"Casos_Filtrados_{nombre_asesor}_{mes}_{fecha_hoy}.xlsx"
-            
-            st.download_button(
-                label="📥 Descargar Excel",
-                data=buffer,
-                file_name=nombre_archivo,
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True
-            )
+                st.download_button(
+                    label="📥 Descargar Excel",
+                    data=buffer,
+                    file_name=nombre_archivo,
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True
+                )
+        else:
+            st.warning("No hay casos que coincidan con los filtros seleccionados")
+
     else:
-        st.warning("No hay casos que coincidan con los filtros seleccionados")
+        st.warning(f"No hay datos de casos disponibles para {mes}")
 
-else:
-    st.warning(f"No hay datos de casos disponibles para {mes}")
+
+seccion_casos_por_nivel(periodo)
 
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
@@ -2984,374 +2349,404 @@ st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 st.markdown("### 📊 Análisis Detallado del DRIVE por Asesor")
 st.markdown("*Historial de ventas, comportamiento y recomendaciones personalizadas*")
 
-# Obtener lista de asesores del DRIVE para el mes
-df_drive_mes_actual = load_drive_data()
-if df_drive_mes_actual is not None and not df_drive_mes_actual.empty:
-    df_drive_mes_actual = df_drive_mes_actual[df_drive_mes_actual['MES'] == mes].copy()
-    df_drive_mes_actual['ASESOR'] = df_drive_mes_actual['ASESOR'].astype(str).str.strip()
-    asesores_drive = sorted(df_drive_mes_actual['ASESOR'].unique())
-    col1, col2 = st.columns([3, 1])
-    
-    with col1:
-        asesor_seleccionado = st.selectbox(
-            "Selecciona un asesor para análisis detallado:",
-            asesores_drive,
-            key="asesor_drive_analysis"
-        )
+@st.fragment
+def seccion_drive_asesor(periodo):
+    """Análisis del DRIVE por asesor: al cambiar el asesor solo se vuelve a
+    ejecutar esta sección, no todo el dashboard"""
+    mes = nombre_periodo(periodo)
     
-    # Obtener datos del asesor
-    kpis = get_drive_asesor_kpis(asesor_seleccionado, mes)
-    
-    if kpis:
-        # FILA 1: KPIs PRINCIPALES
-        st.markdown("#### 📈 Métricas Clave del Mes")
-        
-        metric_cols = st.columns(5)
-        
-        with metric_cols[0]:
-            st.metric(
-                "Total Ventas",
-                int(kpis['total_ventas']),
-                help="Todas las transacciones registradas"
-            )
-        
-        with metric_cols[1]:
-            st.metric(
-                "Instaladas",
-                int(kpis['instaladas']),
-                delta=f"{kpis['tasa_conversion']:.1f}%",
-                help="Ventas efectivas"
-            )
+    # Obtener lista de asesores del DRIVE para el mes
+    if hay_registros('DRIVE'):
+        # Los asesores del mes salen del cubo diario (ya calculado para los KPIs)
+        cubo_mes = get_cubo_diario_asesores(periodo)
+        asesores_drive = sorted(cubo_mes.index.get_level_values('ASESOR').dropna().unique())
+        col1, col2 = st.columns([3, 1])
         
-        with metric_cols[2]:
-            color_cancelacion = "🔴" if kpis['tasa_cancelacion'] > 30 else "🟡" if kpis['tasa_cancelacion'] > 15 else "🟢"
-            st.metric(
-                "Canceladas",
-                f"{color_cancelacion} {int(kpis['canceladas'])}",
-                delta=f"-{kpis['tasa_cancelacion']:.1f}%",
-                help="Ventas que se cancelaron"
-            )
-        
-        with metric_cols[3]:
-            st.metric(
-                "Pendientes",
-                int(kpis['pendientes']),
-                help="Ventas en seguimiento"
-            )
-        
-        with metric_cols[4]:
-            st.metric(
-                "Velocidad",
-                f"{kpis['velocidad_venta']:.1f} /día",
-                help="Ventas por día promedio"
+        with col1:
+            asesor_seleccionado = st.selectbox(
+                "Selecciona un asesor para análisis detallado:",
+                asesores_drive,
+                key="asesor_drive_analysis"
             )
         
-        # FILA 2C: GRÁFICA DE CRECIMIENTO DE VENTAS
-        st.markdown("#### 📈 Crecimiento de Ventas por Fecha")
-        
-        # Tabs para seleccionar vista por Día o Semana
-        tab_dia, tab_semana = st.tabs(["📅 Por Día", "📊 Por Semana"])
+        # Obtener datos del asesor
+        kpis = get_drive_asesor_kpis(asesor_seleccionado, periodo)
         
-        # TAB 1: Visualización por Día
-        with tab_dia:
-            df_crecimiento = get_crecimiento_ventas(asesor_seleccionado, mes)
+        if kpis:
+            # FILA 1: KPIs PRINCIPALES
+            st.markdown("#### 📈 Métricas Clave del Mes")
             
-            if not df_crecimiento.empty:
-                # Gráfico de línea de crecimiento acumulado CON PROMEDIO
-                fig_crecimiento = go.Figure()
-                
-                # Línea de total acumulado
-                fig_crecimiento.add_trace(go.Scatter(
-                    x=df_crecimiento['Fecha'],
-                    y=df_crecimiento['Total Acumulado'],
-                    mode='lines+markers',
-                    name='Total Acumulado',
-                    line=dict(color='#1976d2', width=3),
-                    marker=dict(size=8)
-                ))
-                
-                # Línea de instaladas acumuladas
-                fig_crecimiento.add_trace(go.Scatter(
-                    x=df_crecimiento['Fecha'],
-                    y=df_crecimiento['Instaladas Acumuladas'],
-                    mode='lines+markers',
-                    name='Instaladas Acumuladas',
-                    line=dict(color='#4caf50', width=2, dash='dash'),
-                    marker=dict(size=6)
-                ))
-                
-                fig_crecimiento.update_layout(
-                    title=f"Crecimiento Acumulado de Ventas por Día - {mes}",
-                    xaxis_title="Fecha",
-                    yaxis_title="Cantidad Acumulada",
-                    height=400,
-                    hovermode='x unified',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
-                    yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray')
+            metric_cols = st.columns(5)
+            
+            with metric_cols[0]:
+                st.metric(
+                    "Total Ventas",
+                    int(kpis['total_ventas']),
+                    help="Todas las transacciones registradas"
                 )
-                
-                st.plotly_chart(fig_crecimiento, use_container_width=True)
-                
-                # Gráfico de barras: Desempeño diario vs promedio
-                promedio_diario = df_crecimiento['TOTAL'].mean()
-                colores_barras = ['#4caf50' if x >= promedio_diario else '#ff6b6b' for x in df_crecimiento['TOTAL']]
-                
-                fig_desempeño = go.Figure(data=[
-                    go.Bar(
-                        x=df_crecimiento['Fecha'],
-                        y=df_crecimiento['TOTAL'],
-                        marker=dict(color=colores_barras),
-                        name='Ventas del Día',
-                        text=df_crecimiento['TOTAL'],
-                        textposition='auto'
-                    )
-                ])
-                
-                # Agregar línea de promedio
-                fig_desempeño.add_hline(
-                    y=promedio_diario,
-                    line_dash="dash",
-                    line_color="orange",
-                    annotation_text=f"Promedio: {promedio_diario:.1f}",
-                    annotation_position="right"
+            
+            with metric_cols[1]:
+                st.metric(
+                    "Instaladas",
+                    int(kpis['instaladas']),
+                    delta=f"{kpis['tasa_conversion']:.1f}%",
+                    help="Ventas efectivas"
                 )
-                
-                fig_desempeño.update_layout(
-                    title=f"Desempeño Diario vs Promedio - {mes}",
-                    xaxis_title="Fecha",
-                    yaxis_title="Ventas del Día",
-                    height=400,
-                    hovermode='x unified',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
-                    yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
-                    showlegend=False
+            
+            with metric_cols[2]:
+                color_cancelacion = "🔴" if kpis['tasa_cancelacion'] > 30 else "🟡" if kpis['tasa_cancelacion'] > 15 else "🟢"
+                st.metric(
+                    "Canceladas",
+                    f"{color_cancelacion} {int(kpis['canceladas'])}",
+                    delta=f"-{kpis['tasa_cancelacion']:.1f}%",
+                    help="Ventas que se cancelaron"
                 )
+            
+            with metric_cols[3]:
+                st.metric(
+                    "Pendientes",
+                    int(kpis['pendientes']),
+                    help="Ventas en seguimiento"
+                )
+            
+            with metric_cols[4]:
+                st.metric(
+                    "Velocidad",
+                    f"{kpis['velocidad_venta']:.1f} /día",
+                    help="Ventas por día promedio"
+                )
+            
+            # FILA 2C: GRÁFICA DE CRECIMIENTO DE VENTAS
+            st.markdown("#### 📈 Crecimiento de Ventas por Fecha")
+            
+            # Tabs para seleccionar vista por Día o Semana
+            tab_dia, tab_semana = st.tabs(["📅 Por Día", "📊 Por Semana"])
+            
+            # TAB 1: Visualización por Día
+            with tab_dia:
+                df_crecimiento = get_crecimiento_ventas(asesor_seleccionado, periodo)
                 
-                st.plotly_chart(fig_desempeño, use_container_width=True)
-                
-                # Mostrar indicadores de crecimiento
-                if len(df_crecimiento) > 1:
-                    inicio = df_crecimiento['Total Acumulado'].iloc[0]
-                    fin = df_crecimiento['Total Acumulado'].iloc[-1]
-                    crecimiento_total = fin - inicio
-                    dias_trabajados = len(df_crecimiento)
-                    crecimiento_promedio_diario = crecimiento_total / dias_trabajados if dias_trabajados > 0 else 0
+                if not df_crecimiento.empty:
+                    # Gráfico de línea de crecimiento acumulado CON PROMEDIO
+                    fig_crecimiento = go.Figure()
                     
-                    # Calcular velocidad reciente (últimos 3 días)
-                    if len(df_crecimiento) >= 3:
-                        velocidad_reciente = df_crecimiento['TOTAL'].iloc[-3:].mean()
-                    else:
-                        velocidad_reciente = df_crecimiento['TOTAL'].mean()
+                    # Línea de total acumulado
+                    fig_crecimiento.add_trace(go.Scatter(
+                        x=df_crecimiento['Fecha'],
+                        y=df_crecimiento['Total Acumulado'],
+                        mode='lines+markers',
+                        name='Total Acumulado',
+                        line=dict(color='#1976d2', width=3),
+                        marker=dict(size=8)
+                    ))
                     
-                    # Contar días arriba y bajo promedio
-                    dias_arriba = len(df_crecimiento[df_crecimiento['TOTAL'] >= promedio_diario])
-                    dias_bajo = len(df_crecimiento[df_crecimiento['TOTAL'] < promedio_diario])
+                    # Línea de instaladas acumuladas
+                    fig_crecimiento.add_trace(go.Scatter(
+                        x=df_crecimiento['Fecha'],
+                        y=df_crecimiento['Instaladas Acumuladas'],
+                        mode='lines+markers',
+                        name='Instaladas Acumuladas',
+                        line=dict(color='#4caf50', width=2, dash='dash'),
+                        marker=dict(size=6)
+                    ))
                     
-                    col_crec1, col_crec2, col_crec3 = st.columns(3)
-                    with col_crec1:
-                        st.metric("Crecimiento Total", f"+{crecimiento_total:.0f} ventas")
-                    with col_crec2:
-                        st.metric("Promedio Diario", f"{promedio_diario:.1f} ventas/día")
-                    with col_crec3:
-                        st.metric("Velocidad Reciente", f"{velocidad_reciente:.1f} ventas/día")
+                    fig_crecimiento.update_layout(
+                        title=f"Crecimiento Acumulado de Ventas por Día - {mes}",
+                        xaxis_title="Fecha",
+                        yaxis_title="Cantidad Acumulada",
+                        height=400,
+                        hovermode='x unified',
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
+                        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray')
+                    )
                     
-                    # Segunda fila de métricas
-                    col_crec4, col_crec5 = st.columns(2)
-                    with col_crec4:
-                        st.metric("🟢 Días Arriba del Promedio", f"{dias_arriba}/{dias_trabajados}")
-                    with col_crec5:
-                        st.metric("🔴 Días Bajo el Promedio", f"{dias_bajo}/{dias_trabajados}")
-            else:
-                st.info("No hay datos de crecimiento por día para este mes")
-        
-        # TAB 2: Visualización por Semana
-        with tab_semana:
-            df_crecimiento_semanal = get_crecimiento_ventas_semanal(asesor_seleccionado, mes)
+                    st.plotly_chart(fig_crecimiento, use_container_width=True)
+                    
+                    # Gráfico de barras: Desempeño diario vs promedio
+                    promedio_diario = df_crecimiento['TOTAL'].mean()
+                    colores_barras = ['#4caf50' if x >= promedio_diario else '#ff6b6b' for x in df_crecimiento['TOTAL']]
+                    
+                    fig_desempeño = go.Figure(data=[
+                        go.Bar(
+                            x=df_crecimiento['Fecha'],
+                            y=df_crecimiento['TOTAL'],
+                            marker=dict(color=colores_barras),
+                            name='Ventas del Día',
+                            text=df_crecimiento['TOTAL'],
+                            textposition='auto'
+                        )
+                    ])
+                    
+                    # Agregar línea de promedio
+                    fig_desempeño.add_hline(
+                        y=promedio_diario,
+                        line_dash="dash",
+                        line_color="orange",
+                        annotation_text=f"Promedio: {promedio_diario:.1f}",
+                        annotation_position="right"
+                    )
+                    
+                    fig_desempeño.update_layout(
+                        title=f"Desempeño Diario vs Promedio - {mes}",
+                        xaxis_title="Fecha",
+                        yaxis_title="Ventas del Día",
+                        height=400,
+                        hovermode='x unified',
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
+                        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
+                        showlegend=False
+                    )
+                    
+                    st.plotly_chart(fig_desempeño, use_container_width=True)
+                    
+                    # Mostrar indicadores de crecimiento
+                    if len(df_crecimiento) > 1:
+                        inicio = df_crecimiento['Total Acumulado'].iloc[0]
+                        fin = df_crecimiento['Total Acumulado'].iloc[-1]
+                        crecimiento_total = fin - inicio
+                        dias_trabajados = len(df_crecimiento)
+                        crecimiento_promedio_diario = crecimiento_total / dias_trabajados if dias_trabajados > 0 else 0
+                        
+                        # Calcular velocidad reciente (últimos 3 días)
+                        if len(df_crecimiento) >= 3:
+                            velocidad_reciente = df_crecimiento['TOTAL'].iloc[-3:].mean()
+                        else:
+                            velocidad_reciente = df_crecimiento['TOTAL'].mean()
+                        
+                        # Contar días arriba y bajo promedio
+                        dias_arriba = len(df_crecimiento[df_crecimiento['TOTAL'] >= promedio_diario])
+                        dias_bajo = len(df_crecimiento[df_crecimiento['TOTAL'] < promedio_diario])
+                        
+                        col_crec1, col_crec2, col_crec3 = st.columns(3)
+                        with col_crec1:
+                            st.metric("Crecimiento Total", f"+{crecimiento_total:.0f} ventas")
+                        with col_crec2:
+                            st.metric("Promedio Diario", f"{promedio_diario:.1f} ventas/día")
+                        with col_crec3:
+                            st.metric("Velocidad Reciente", f"{velocidad_reciente:.1f} ventas/día")
+                        
+                        # Segunda fila de métricas
+                        col_crec4, col_crec5 = st.columns(2)
+                        with col_crec4:
+                            st.metric("🟢 Días Arriba del Promedio", f"{dias_arriba}/{dias_trabajados}")
+                        with col_crec5:
+                            st.metric("🔴 Días Bajo el Promedio", f"{dias_bajo}/{dias_trabajados}")
+                else:
+                    st.info("No hay datos de crecimiento por día para este mes")
             
-            if not df_crecimiento_semanal.empty:
-                # Gráfico de línea de crecimiento semanal acumulado
-                fig_crecimiento_semanal = go.Figure()
-                
-                # Línea de total acumulado semanal
-                fig_crecimiento_semanal.add_trace(go.Scatter(
-                    x=df_crecimiento_semanal['Semana'],
-                    y=df_crecimiento_semanal['Total Acumulado'],
-                    mode='lines+markers',
-                    name='Total Acumulado',
-                    line=dict(color='#1976d2', width=3),
-                    marker=dict(size=10)
-                ))
-                
-                # Línea de instaladas acumuladas semanal
-                fig_crecimiento_semanal.add_trace(go.Scatter(
-                    x=df_crecimiento_semanal['Semana'],
-                    y=df_crecimiento_semanal['Instaladas Acumuladas'],
-                    mode='lines+markers',
-                    name='Instaladas Acumuladas',
-                    line=dict(color='#4caf50', width=2, dash='dash'),
-                    marker=dict(size=8)
-                ))
-                
-                fig_crecimiento_semanal.update_layout(
-                    title=f"Crecimiento Acumulado de Ventas por Semana - {mes}",
-                    xaxis_title="Semana",
-                    yaxis_title="Cantidad Acumulada",
-                    height=400,
-                    hovermode='x unified',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
-                    yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray')
-                )
-                
-                st.plotly_chart(fig_crecimiento_semanal, use_container_width=True)
-                
-                # Gráfico de barras: Desempeño semanal vs promedio
-                promedio_semanal = df_crecimiento_semanal['TOTAL'].mean()
-                colores_barras_sem = ['#4caf50' if x >= promedio_semanal else '#ff6b6b' for x in df_crecimiento_semanal['TOTAL']]
+            # TAB 2: Visualización por Semana
+            with tab_semana:
+                df_crecimiento_semanal = get_crecimiento_ventas_semanal(asesor_seleccionado, periodo)
                 
-                fig_desempeño_sem = go.Figure(data=[
-                    go.Bar(
+                if not df_crecimiento_semanal.empty:
+                    # Gráfico de línea de crecimiento semanal acumulado
+                    fig_crecimiento_semanal = go.Figure()
+                    
+                    # Línea de total acumulado semanal
+                    fig_crecimiento_semanal.add_trace(go.Scatter(
+                        x=df_crecimiento_semanal['Semana'],
+                        y=df_crecimiento_semanal['Total Acumulado'],
+                        mode='lines+markers',
+                        name='Total Acumulado',
+                        line=dict(color='#1976d2', width=3),
+                        marker=dict(size=10)
+                    ))
+                    
+                    # Línea de instaladas acumuladas semanal
+                    fig_crecimiento_semanal.add_trace(go.Scatter(
                         x=df_crecimiento_semanal['Semana'],
-                        y=df_crecimiento_semanal['TOTAL'],
-                        marker=dict(color=colores_barras_sem),
-                        name='Ventas de la Semana',
-                        text=df_crecimiento_semanal['TOTAL'],
-                        textposition='auto'
+                        y=df_crecimiento_semanal['Instaladas Acumuladas'],
+                        mode='lines+markers',
+                        name='Instaladas Acumuladas',
+                        line=dict(color='#4caf50', width=2, dash='dash'),
+                        marker=dict(size=8)
+                    ))
+                    
+                    fig_crecimiento_semanal.update_layout(
+                        title=f"Crecimiento Acumulado de Ventas por Semana - {mes}",
+                        xaxis_title="Semana",
+                        yaxis_title="Cantidad Acumulada",
+                        height=400,
+                        hovermode='x unified',
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
+                        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray')
                     )
-                ])
-                
-                # Agregar línea de promedio
-                fig_desempeño_sem.add_hline(
-                    y=promedio_semanal,
-                    line_dash="dash",
-                    line_color="orange",
-                    annotation_text=f"Promedio: {promedio_semanal:.1f}",
-                    annotation_position="right"
-                )
-                
-                fig_desempeño_sem.update_layout(
-                    title=f"Desempeño Semanal vs Promedio - {mes}",
-                    xaxis_title="Semana",
-                    yaxis_title="Ventas de la Semana",
-                    height=400,
-                    hovermode='x unified',
-                    plot_bgcolor='rgba(0,0,0,0)',
-                    xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
-                    yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
-                    showlegend=False
-                )
-                
-                st.plotly_chart(fig_desempeño_sem, use_container_width=True)
-                
-                # Mostrar indicadores de crecimiento semanal
-                if len(df_crecimiento_semanal) > 1:
-                    inicio_sem = df_crecimiento_semanal['Total Acumulado'].iloc[0]
-                    fin_sem = df_crecimiento_semanal['Total Acumulado'].iloc[-1]
-                    crecimiento_total_sem = fin_sem - inicio_sem
-                    semanas_trabajadas = len(df_crecimiento_semanal)
-                    crecimiento_promedio_semanal = crecimiento_total_sem / semanas_trabajadas if semanas_trabajadas > 0 else 0
                     
-                    # Velocidad más reciente (última semana)
-                    velocidad_semana_actual = df_crecimiento_semanal['TOTAL'].iloc[-1]
+                    st.plotly_chart(fig_crecimiento_semanal, use_container_width=True)
                     
-                    # Contar semanas arriba y bajo promedio
-                    semanas_arriba = len(df_crecimiento_semanal[df_crecimiento_semanal['TOTAL'] >= promedio_semanal])
-                    semanas_bajo = len(df_crecimiento_semanal[df_crecimiento_semanal['TOTAL'] < promedio_semanal])
+                    # Gráfico de barras: Desempeño semanal vs promedio
+                    promedio_semanal = df_crecimiento_semanal['TOTAL'].mean()
+                    colores_barras_sem = ['#4caf50' if x >= promedio_semanal else '#ff6b6b' for x in df_crecimiento_semanal['TOTAL']]
                     
-                    col_sem1, col_sem2, col_sem3 = st.columns(3)
-                    with col_sem1:
-                        st.metric("Crecimiento Total", f"+{crecimiento_total_sem:.0f} ventas")
-                    with col_sem2:
-                        st.metric("Promedio Semanal", f"{promedio_semanal:.1f} ventas/semana")
-                    with col_sem3:
-                        st.metric("Semana Actual", f"{velocidad_semana_actual:.0f} ventas")
+                    fig_desempeño_sem = go.Figure(data=[
+                        go.Bar(
+                            x=df_crecimiento_semanal['Semana'],
+                            y=df_crecimiento_semanal['TOTAL'],
+                            marker=dict(color=colores_barras_sem),
+                            name='Ventas de la Semana',
+                            text=df_crecimiento_semanal['TOTAL'],
+                            textposition='auto'
+                        )
+                    ])
                     
-                    # Segunda fila de métricas
-                    col_sem4, col_sem5 = st.columns(2)
-                    with col_sem4:
-                        st.metric("🟢 Semanas Arriba del Promedio", f"{semanas_arriba}/{semanas_trabajadas}")
-                    with col_sem5:
-                        st.metric("🔴 Semanas Bajo el Promedio", f"{semanas_bajo}/{semanas_trabajadas}")
-            else:
-                st.info("No hay datos de crecimiento por semana para este mes")
-        
-        # FILA 3: RECOMENDACIONES PERSONALIZADAS
-        st.markdown("#### 💡 Recomendaciones Personalizadas")
-        
-        recomendaciones = get_recomendaciones_asesor(asesor_seleccionado, kpis, mes)
-        
-        for rec in recomendaciones:
-            if rec['tipo'] == 'crítica':
-                st.error(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
-            elif rec['tipo'] == 'alta':
-                st.warning(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
-            elif rec['tipo'] == 'media':
-                st.info(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
-            else:
-                st.success(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
-        
-        # FILA 4: HISTORIAL DETALLADO
-        st.markdown("#### 📋 Historial de Transacciones")
-        
-        df_historial = get_drive_history_by_asesor(asesor_seleccionado, mes)
-        
-        if not df_historial.empty:
-            # Seleccionar columnas importantes para mostrar
-            cols_mostrar = ['VENTA_NUM', 'FECHA', 'ESTADO', 'PAGO']
-            if 'OBSERVACION' in df_historial.columns:
-                cols_mostrar.append('OBSERVACION')
+                    # Agregar línea de promedio
+                    fig_desempeño_sem.add_hline(
+                        y=promedio_semanal,
+                        line_dash="dash",
+                        line_color="orange",
+                        annotation_text=f"Promedio: {promedio_semanal:.1f}",
+                        annotation_position="right"
+                    )
+                    
+                    fig_desempeño_sem.update_layout(
+                        title=f"Desempeño Semanal vs Promedio - {mes}",
+                        xaxis_title="Semana",
+                        yaxis_title="Ventas de la Semana",
+                        height=400,
+                        hovermode='x unified',
+                        plot_bgcolor='rgba(0,0,0,0)',
+                        xaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
+                        yaxis=dict(showgrid=True, gridwidth=1, gridcolor='lightgray'),
+                        showlegend=False
+                    )
+                    
+                    st.plotly_chart(fig_desempeño_sem, use_container_width=True)
+                    
+                    # Mostrar indicadores de crecimiento semanal
+                    if len(df_crecimiento_semanal) > 1:
+                        inicio_sem = df_crecimiento_semanal['Total Acumulado'].iloc[0]
+                        fin_sem = df_crecimiento_semanal['Total Acumulado'].iloc[-1]
+                        crecimiento_total_sem = fin_sem - inicio_sem
+                        semanas_trabajadas = len(df_crecimiento_semanal)
+                        crecimiento_promedio_semanal = crecimiento_total_sem / semanas_trabajadas if semanas_trabajadas > 0 else 0
+                        
+                        # Velocidad más reciente (última semana)
+                        velocidad_semana_actual = df_crecimiento_semanal['TOTAL'].iloc[-1]
+                        
+                        # Contar semanas arriba y bajo promedio
+                        semanas_arriba = len(df_crecimiento_semanal[df_crecimiento_semanal['TOTAL'] >= promedio_semanal])
+                        semanas_bajo = len(df_crecimiento_semanal[df_crecimiento_semanal['TOTAL'] < promedio_semanal])
+                        
+                        col_sem1, col_sem2, col_sem3 = st.columns(3)
+                        with col_sem1:
+                            st.metric("Crecimiento Total", f"+{crecimiento_total_sem:.0f} ventas")
+                        with col_sem2:
+                            st.metric("Promedio Semanal", f"{promedio_semanal:.1f} ventas/semana")
+                        with col_sem3:
+                            st.metric("Semana Actual", f"{velocidad_semana_actual:.0f} ventas")
+                        
+                        # Segunda fila de métricas
+                        col_sem4, col_sem5 = st.columns(2)
+                        with col_sem4:
+                            st.metric("🟢 Semanas Arriba del Promedio", f"{semanas_arriba}/{semanas_trabajadas}")
+                        with col_sem5:
+                            st.metric("🔴 Semanas Bajo el Promedio", f"{semanas_bajo}/{semanas_trabajadas}")
+                else:
+                    st.info("No hay datos de crecimiento por semana para este mes")
             
-            # Asegurarse de que solo las columnas existentes se muestren
-            cols_mostrar = [col for col in cols_mostrar if col in df_historial.columns]
+            # FILA 3: RECOMENDACIONES PERSONALIZADAS
+            st.markdown("#### 💡 Recomendaciones Personalizadas")
             
-            # Formatear la tabla
-            df_mostrar = df_historial[cols_mostrar].copy()
+            recomendaciones = get_recomendaciones_asesor(asesor_seleccionado, kpis, periodo)
             
-            # Aplicar colores según estado
-            def color_estado(estado):
-                if estado == 'INSTALADO':
-                    return '🟢 INSTALADO'
-                elif estado == 'CANCELADO':
-                    return '🔴 CANCELADO'
-                elif estado == 'PENDIENTE':
-                    return '🟡 PENDIENTE'
+            for rec in recomendaciones:
+                if rec['tipo'] == 'crítica':
+                    st.error(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
+                elif rec['tipo'] == 'alta':
+                    st.warning(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
+                elif rec['tipo'] == 'media':
+                    st.info(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
                 else:
-                    return estado
+                    st.success(f"**{rec['título']}**\n{rec['descripción']}\n\n✅ {rec['acción']}")
             
-            df_mostrar['ESTADO'] = df_mostrar['ESTADO'].apply(color_estado)
+            # FILA 4: HISTORIAL DETALLADO
+            st.markdown("#### 📋 Historial de Transacciones")
             
-            st.dataframe(
-                df_mostrar,
-                use_container_width=True,
-                hide_index=True,
-                height=300
-            )
+            df_historial = get_drive_history_by_asesor(asesor_seleccionado, periodo)
             
-            st.caption(f"Total de registros: {len(df_historial)}")
-        
-        # FILA 5: TENDENCIAS SEMANALES
-        st.markdown("#### 📆 Tendencias por Semana")
-        
-        tendencias = get_drive_tendencias(asesor_seleccionado, mes)
-        
-        if not tendencias.empty:
-            col_chart, col_table = st.columns([2, 1])
+            if not df_historial.empty:
+                # Seleccionar columnas importantes para mostrar
+                cols_mostrar = ['VENTA_NUM', 'FECHA', 'ESTADO', 'PAGO']
+                if 'OBSERVACION' in df_historial.columns:
+                    cols_mostrar.append('OBSERVACION')
+                
+                # Asegurarse de que solo las columnas existentes se muestren
+                cols_mostrar = [col for col in cols_mostrar if col in df_historial.columns]
+                
+                # Formatear la tabla
+                df_mostrar = df_historial[cols_mostrar].copy()
+                
+                # Aplicar colores según estado
+                def color_estado(estado):
+                    if estado == 'INSTALADO':
+                        return '🟢 INSTALADO'
+                    elif estado == 'CANCELADO':
+                        return '🔴 CANCELADO'
+                    elif estado == 'PENDIENTE':
+                        return '🟡 PENDIENTE'
+                    else:
+                        return estado
+                
+                df_mostrar['ESTADO'] = df_mostrar['ESTADO'].apply(color_estado)
+                
+                st.dataframe(
+                    df_mostrar,
+                    use_container_width=True,
+                    hide_index=True,
+                    height=300
+                )
+                
+                st.caption(f"Total de registros: {len(df_historial)}")
             
-            with col_chart:
-                st.bar_chart(tendencias, use_container_width=True)
+            # FILA 5: TENDENCIAS SEMANALES
+            st.markdown("#### 📆 Tendencias por Semana")
             
-            with col_table:
-                st.dataframe(tendencias, use_container_width=True)
+            tendencias = get_drive_tendencias(asesor_seleccionado, periodo)
+            
+            if not tendencias.empty:
+                col_chart, col_table = st.columns([2, 1])
+                
+                with col_chart:
+                    st.bar_chart(tendencias, use_container_width=True)
+                
+                with col_table:
+                    st.dataframe(tendencias, use_container_width=True)
+            else:
+                st.info("No hay datos de tendencias para este asesor")
+        
         else:
-            st.info("No hay datos de tendencias para este asesor")
-    
+            st.warning(f"No hay datos del DRIVE para {asesor_seleccionado} en {mes}")
+
     else:
-        st.warning(f"No hay datos del DRIVE para {asesor_seleccionado} en {mes}")
+        st.info(f"No hay asesores con registros en el DRIVE para {mes}")
 
-else:
-    st.info(f"No hay asesores con registros en el DRIVE para {mes}")
+
+# Tabla del equipo: KPIs y prioridad de todos los asesores del mes (ordenable por columna)
+tabla_kpis_equipo = get_tabla_equipo(periodo)
+if not tabla_kpis_equipo.empty:
+    with st.expander("👥 KPIs y alertas de todo el equipo"):
+        st.dataframe(
+            tabla_kpis_equipo.rename(columns={
+                'total_ventas': 'Ventas',
+                'instaladas': 'Instaladas',
+                'pendientes': 'Pendientes',
+                'canceladas': 'Canceladas',
+                'tasa_conversion': 'Conversión %',
+                'tasa_cancelacion': 'Cancelación %',
+                'tiempo_promedio_dias': 'Días entre ventas',
+                'velocidad_venta': 'Ventas/día',
+                'dias_activos': 'Días activos',
+                'estabilidad_ventas': 'Desv. diaria',
+                'alertas': 'Alertas',
+                'prioridad': 'Prioridad'
+            }),
+            use_container_width=True
+        )
+
+seccion_drive_asesor(periodo)
 
 st.markdown('<div class="section-divider"></div>', unsafe_allow_html=True)
 
@@ -3360,31 +2755,28 @@ st.markdown("### ⭐ Resumen Mensual Completo")
 
 st.markdown('<div style="margin: 20px 0;"></div>', unsafe_allow_html=True)
 
-# Obtener datos para cada mes
-meses_disponibles = ['Noviembre', 'Diciembre', 'Enero', 'Febrero']
+# Obtener datos para cada mes cerrado (todos salvo el más reciente)
+periodos_tabla_mensual = periodos_selector[:-1]
 datos_meses = []
 totales = {'Leads': 0, 'Contr': 0, 'Cober': 0}
 
-for mes_nombre in meses_disponibles:
-    leads, conversion = get_total_leads_and_conversion(mes_nombre)
-    con_cobertura = get_con_cobertura_count(mes_nombre)
-    cancelados = get_cancelados_mes(mes_nombre)
-    instaladas = get_instaladas_mes(mes_nombre)
-    no_pago = get_no_pago_mes(mes_nombre)
-    no_responde = get_no_responde_mes(mes_nombre)
-    no_especifica = get_no_especifica_mes(mes_nombre)
-    sin_cobertura = get_sin_cobertura_mes(mes_nombre)
+for periodo_mes in periodos_tabla_mensual:
+    # Todas las métricas del mes salen del resumen mensual (una sola pasada por hoja)
+    leads, conversion = get_total_leads_and_conversion(periodo_mes)
+    metricas_mes = get_metricas_mes(periodo_mes)
+    con_cobertura = metricas_mes['CON_COBERTURA']
     datos_meses.append({
-        'Mes': mes_nombre,
+        'Periodo': periodo_mes,
+        'Mes': etiqueta_periodo(periodo_mes),
         'Leads': leads,
         'Cober': con_cobertura,
         'Contr': conversion,
-        'Cancel': cancelados,
-        'Pago': instaladas,
-        'NoPago': no_pago,
-        'NoResp': no_responde,
-        'NoEsp': no_especifica,
-        'SinCob': sin_cobertura
+        'Cancel': metricas_mes['CANCELADAS'],
+        'Pago': metricas_mes['INSTALADAS'],
+        'NoPago': metricas_mes['NO_PAGO'],
+        'NoResp': metricas_mes['NO_RESPONDE'],
+        'NoEsp': metricas_mes['NO_ESPECIFICA'],
+        'SinCob': metricas_mes['SIN_COBERTURA']
     })
     totales['Leads'] += leads
     totales['Cober'] += con_cobertura
@@ -3419,7 +2811,7 @@ for dato in datos_meses:
     cober = dato['Cober']
     cob_pct = int(cober/leads*100) if leads > 0 else 0
     contr = dato['Contr']
-    conv_pct = get_conversion_mantra_mes(mes_nombre)
+    conv_pct = get_conversion_mantra_mes(dato['Periodo'])
     cancel = dato['Cancel']
     pago = dato['Pago']
     nopago = dato['NoPago']
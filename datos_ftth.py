@@ -0,0 +1,565 @@
+"""Capa de acceso a los datos del archivo REPORTE FTTH.xlsx
+
+Cada hoja del libro se convierte una sola vez en un snapshot columnar (Parquet)
+guardado junto al Excel. El snapshot se identifica por la huella del archivo
+(mtime, tamaño y hash SHA-1) y solo se reconstruye cuando el Excel cambia.
+Al cambiar el Excel solo se vuelven a leer las hojas cuyo contenido cambió
+(ver LibroXlsx.huella_hoja): si solo creció DRIVE, MANTRA no se relee."""
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from lector_xlsx import MOTOR_PREDETERMINADO, LibroXlsx
+
+RUTA_EXCEL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'REPORTE FTTH.xlsx')
+HOJAS = ['MANTRA', 'DRIVE', 'LISTA']
+
+# Columnas de MANTRA que usa el dashboard (Fecha y Numero se exportan en la
+# descarga de casos filtrados); el resto de la hoja no se materializa
+COLUMNAS_MANTRA = ['Mes', 'Fecha', 'Agente', 'Numero', 'NIVEL 1', 'NIVEL 2', 'NIVEL 3', 'Telefono', 'Numero Caso']
+CATEGORICAS_MANTRA = ['Mes', 'Agente', 'NIVEL 1', 'NIVEL 2', 'NIVEL 3']
+COLUMNAS_LECTURA = {'MANTRA': COLUMNAS_MANTRA}
+CATEGORICAS_LECTURA = {'MANTRA': CATEGORICAS_MANTRA}
+
+# Motor de lectura del Excel (ver lector_xlsx.MOTORES_PANDAS); si no está
+# instalado se usa el lector en streaming
+MOTOR_LECTURA = os.environ.get('FTTH_LECTOR', MOTOR_PREDETERMINADO).strip().lower()
+
+# Se incrementa cuando cambia el contenido de los snapshots, para invalidar
+# los generados por versiones anteriores aunque el Excel no haya cambiado
+FORMATO_SNAPSHOT = 7
+
+# Columnas object de tipos mezclados en los snapshots: los textos quedan en la
+# columna y cada otro tipo en una columna auxiliar '<columna>\x1f<tipo>' con
+# su propio dtype, para restituir los valores originales al leer
+SEPARADOR_TIPO = '\x1f'
+TIPOS_PARQUET = {'int': 'Int64', 'float': 'float64', 'bool': 'boolean', 'fecha': 'datetime64[ns]'}
+
+# Columnas de texto que se normalizan al cargar (sin espacios al inicio o al
+# final y como category): los helpers comparan códigos en lugar de textos
+COLUMNAS_CATEGORICAS = {
+    'MANTRA': ['Mes', 'Agente', 'NIVEL 1', 'NIVEL 2', 'NIVEL 3'],
+    'DRIVE': ['MES', 'ASESOR', 'CODIGO DE CARGA', 'ESTADO', 'PAGO', 'MOTIVO CANCELACIÓN'],
+    'LISTA': ['Mes', 'Asesor'],
+}
+
+# Columnas con nombres de asesor y la columna con su ID canónico (entero)
+COLUMNAS_ID_ASESOR = {
+    'MANTRA': {'Agente': 'ID_ASESOR'},
+    'DRIVE': {'ASESOR': 'ID_ASESOR', 'CODIGO DE CARGA': 'ID_CODIGO'},
+    'LISTA': {'Asesor': 'ID_ASESOR'},
+}
+
+# Columna de mes de cada hoja y columna con la fecha del registro (LISTA no
+# tiene fechas): con ellas se deduce al cargar el período de cada fila
+COLUMNA_MES = {'MANTRA': 'Mes', 'DRIVE': 'MES', 'LISTA': 'Mes'}
+COLUMNA_FECHA = {'MANTRA': 'Fecha', 'DRIVE': 'FECHA'}
+
+# Período canónico de cada fila: entero AAAAMM (202603 = Marzo 2026), 0 si la
+# fila no tiene mes. Filtros, agregados y claves de cache usan el período en
+# lugar del nombre del mes, así el mismo mes de dos años distintos no se mezcla.
+# Las hojas se guardan ordenadas por período para obtener las filas de un mes
+# como un rango contiguo (filas_periodo).
+COLUMNA_PERIODO = 'PERIODO'
+
+# Columnas que se agregan al cargar (no existen en el Excel): período, período
+# y día de la fecha de DRIVE e IDs de asesor
+COLUMNAS_DERIVADAS = {COLUMNA_PERIODO, 'PERIODO_FECHA', 'DIA'} | {
+    columna_id for columnas in COLUMNAS_ID_ASESOR.values() for columna_id in columnas.values()
+}
+
+NOMBRES_MESES = [
+    'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+    'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre',
+]
+NUMERO_MES = {nombre: numero for numero, nombre in enumerate(NOMBRES_MESES, 1)}
+
+
+def ruta_snapshot(excel_path=RUTA_EXCEL):
+    """Carpeta donde se guardan los snapshots del libro (junto al Excel)"""
+    return os.path.splitext(excel_path)[0] + '.snapshot'
+
+
+def hash_excel(excel_path=RUTA_EXCEL):
+    """Hash SHA-1 del contenido del libro"""
+    sha1 = hashlib.sha1()
+    with open(excel_path, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(bloque)
+    return sha1.hexdigest()
+
+
+def huella_excel(excel_path=RUTA_EXCEL, huella_previa=None):
+    """Obtiene la huella del libro: mtime, tamaño y hash del contenido.
+    Si mtime y tamaño coinciden con huella_previa se reutiliza su hash
+    para no releer el archivo en cada consulta."""
+    stat = os.stat(excel_path)
+    huella = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+    if huella_previa and all(huella_previa.get(k) == v for k, v in huella.items()):
+        huella['sha1'] = huella_previa['sha1']
+    else:
+        huella['sha1'] = hash_excel(excel_path)
+
+    return huella
+
+
+# Última huella vista de cada libro (por ruta): version_libro solo vuelve a
+# calcular el hash cuando cambian el mtime o el tamaño del archivo
+_huellas = {}
+
+
+def version_libro(excel_path=RUTA_EXCEL):
+    """Token de versión de los datos del libro: depende del contenido (hash
+    SHA-1) y del formato de los snapshots. El mtime y el tamaño solo deciden si
+    hay que recalcular el hash, así que tocar el archivo sin cambiarlo no
+    cambia la versión. Lanza OSError si el libro no existe."""
+    huella_previa = _huellas.get(excel_path)
+    if huella_previa is None:
+        # Al iniciar se reutiliza la huella registrada en los snapshots
+        huella_previa = leer_meta(os.path.join(ruta_snapshot(excel_path), f'{HOJAS[0]}.json'))
+    huella = _huellas[excel_path] = huella_excel(excel_path, huella_previa)
+    return f"{FORMATO_SNAPSHOT}-{huella['sha1']}"
+
+
+def leer_meta(path_meta):
+    try:
+        with open(path_meta, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def escribir_atomico(path, escribir):
+    """Escribe en un archivo temporal y lo renombra, para que otra sesión
+    nunca lea un snapshot a medio escribir"""
+    path_tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        escribir(path_tmp)
+        os.replace(path_tmp, path)
+    finally:
+        if os.path.exists(path_tmp):
+            os.remove(path_tmp)
+
+
+def _tipo_parquet(tipo):
+    """Columna auxiliar (ver TIPOS_PARQUET) de los valores de un tipo de Python;
+    None si se guardan como texto"""
+    if issubclass(tipo, bool):
+        return 'bool'
+    if issubclass(tipo, (int, np.integer)):
+        return 'int'
+    if issubclass(tipo, (float, np.floating)):
+        return 'float'
+    if issubclass(tipo, datetime):
+        return 'fecha'
+    return None
+
+
+def _preparar_para_parquet(df):
+    """Parquet exige un tipo por columna: en las columnas object con tipos
+    mezclados (p.ej. Fecha con textos y fechas, TLF con números y textos) los
+    textos quedan en la columna y los demás valores en columnas auxiliares de
+    su tipo (ver SEPARADOR_TIPO); los tipos sin columna propia, como texto"""
+    df = df.copy()
+    df.columns = [str(col) for col in df.columns]
+    auxiliares = {}
+    for col in df.columns[df.dtypes == object]:
+        valores = df[col].dropna()
+        tipos = valores.map(type)
+        if tipos.nunique() <= 1:
+            continue
+        texto = df[col].astype(object).where(df[col].notna(), None)
+        for tipo in tipos.unique():
+            nombre = _tipo_parquet(tipo)
+            filas = tipos.index[tipos == tipo]
+            if nombre is None:
+                texto[filas] = valores[filas].astype(str)
+                continue
+            auxiliar = auxiliares.setdefault(
+                f'{col}{SEPARADOR_TIPO}{nombre}', pd.Series(None, index=df.index, dtype=TIPOS_PARQUET[nombre])
+            )
+            tipados = valores[filas]
+            auxiliar[filas] = pd.to_datetime(tipados) if nombre == 'fecha' else tipados.astype(TIPOS_PARQUET[nombre])
+            texto[filas] = None
+        df[col] = texto
+    return pd.concat([df, pd.DataFrame(auxiliares, index=df.index)], axis=1) if auxiliares else df
+
+
+def _restaurar_de_parquet(df):
+    """Inversa de _preparar_para_parquet: vuelve a unir en cada columna los
+    valores de sus columnas auxiliares (con su tipo de Python original) y los
+    vacíos de las columnas object quedan como NaN, como al leer el Excel"""
+    auxiliares = [col for col in df.columns if SEPARADOR_TIPO in col]
+    for auxiliar in auxiliares:
+        col, nombre = auxiliar.split(SEPARADOR_TIPO)
+        valores = df[auxiliar].dropna()
+        if nombre == 'fecha':
+            valores = pd.Series(pd.DatetimeIndex(valores).to_pydatetime(), index=valores.index, dtype=object)
+        else:
+            valores = pd.Series(valores.tolist(), index=valores.index, dtype=object)
+        df[col] = df[col].astype(object)
+        df.loc[valores.index, col] = valores
+    df = df.drop(columns=auxiliares)
+    for col in df.columns[df.dtypes == object]:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+
+def guardar_snapshot(df, hoja, huella, excel_path=RUTA_EXCEL, contenido=None):
+    """Guarda la hoja como Parquet y registra la huella del libro del que proviene
+    (y la huella del contenido de la hoja, ver LibroXlsx.huella_hoja). Devuelve
+    la hoja tal como se leerá del snapshot, para que una carga en frío y una
+    desde los snapshots den el mismo resultado."""
+    carpeta = ruta_snapshot(excel_path)
+    os.makedirs(carpeta, exist_ok=True)
+
+    df_parquet = _preparar_para_parquet(df)
+    escribir_atomico(
+        os.path.join(carpeta, f'{hoja}.parquet'),
+        lambda path: df_parquet.to_parquet(path)
+    )
+
+    # La huella se escribe al final: marca el snapshot como completo
+    guardar_huella(hoja, huella, excel_path, contenido)
+
+    return _restaurar_de_parquet(df_parquet)
+
+
+def _meta_snapshot(huella, contenido=None):
+    meta = dict(huella, formato=FORMATO_SNAPSHOT)
+    if contenido is not None:
+        meta['contenido'] = contenido
+    return meta
+
+
+def guardar_huella(hoja, huella, excel_path=RUTA_EXCEL, contenido=None):
+    """Registra la huella del libro a la que corresponde el snapshot de la hoja"""
+    def escribir(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(_meta_snapshot(huella, contenido), f)
+    escribir_atomico(os.path.join(ruta_snapshot(excel_path), f'{hoja}.json'), escribir)
+
+
+def leer_snapshot(hoja, huella, excel_path=RUTA_EXCEL, meta=None):
+    """Lee el snapshot de la hoja si corresponde a la huella actual, sino None"""
+    carpeta = ruta_snapshot(excel_path)
+    if meta is None:
+        meta = leer_meta(os.path.join(carpeta, f'{hoja}.json'))
+
+    if meta is None or meta.get('sha1') != huella['sha1'] or meta.get('formato') != FORMATO_SNAPSHOT:
+        return None
+    return _leer_parquet(hoja, excel_path)
+
+
+def _leer_parquet(hoja, excel_path=RUTA_EXCEL):
+    try:
+        return _restaurar_de_parquet(pd.read_parquet(os.path.join(ruta_snapshot(excel_path), f'{hoja}.parquet')))
+    except Exception:
+        return None
+
+
+def snapshots_previos(metas, excel_path=RUTA_EXCEL):
+    """Snapshots de una versión anterior del libro que se pueden reutilizar si
+    su hoja no cambió: {hoja: (DataFrame, huella del contenido)}"""
+    previos = {}
+    for hoja, meta in metas.items():
+        if not meta or meta.get('formato') != FORMATO_SNAPSHOT or 'contenido' not in meta:
+            continue
+        df = _leer_parquet(hoja, excel_path)
+        if df is not None:
+            previos[hoja] = (df, meta['contenido'])
+    return previos
+
+
+def categoria_limpia(serie):
+    """Convierte la serie a category sin espacios al inicio o al final.
+    Si ya es category solo se recortan sus categorías (una vez por valor
+    distinto, no por fila) y se reasignan los códigos; los vacíos siguen vacíos."""
+    if not isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.where(serie.isna(), serie.astype(str)).astype('category')
+
+    codigos_nuevos, categorias = pd.factorize(serie.cat.categories.astype(str).str.strip())
+    codigos = serie.cat.codes.to_numpy()
+    codigos = np.where(codigos >= 0, codigos_nuevos[codigos], -1)
+    return pd.Series(
+        pd.Categorical.from_codes(codigos, categories=categorias),
+        index=serie.index, name=serie.name
+    )
+
+
+def nombre_canonico(nombre):
+    """Nombre canónico del asesor: la variante sin número (ST2_VTP -> ST_VTP),
+    así ST_VTP y ST2_VTP corresponden al mismo asesor"""
+    return re.sub(r'(\d+)(_VTP)$', r'\2', nombre)
+
+
+def indice_asesores(libro):
+    """Índice de nombres de asesor: cada escritura de Agente (MANTRA), ASESOR y
+    CODIGO DE CARGA (DRIVE) y Asesor (LISTA) con su nombre estandarizado con
+    _VTP, su nombre canónico y el ID entero del asesor canónico.
+    Se construye sobre las categorías (una vez por nombre distinto, no por fila)
+    y es determinístico: los IDs no dependen del orden de las filas."""
+    nombres = set()
+    for hoja, columnas in COLUMNAS_ID_ASESOR.items():
+        for col in columnas:
+            if hoja in libro and col in libro[hoja].columns:
+                nombres.update(libro[hoja][col].cat.categories)
+
+    indice = pd.DataFrame(index=pd.Index(sorted(nombres), name='NOMBRE', dtype=object))
+    indice['NOMBRE_VTP'] = [n if n.endswith('_VTP') else n + '_VTP' for n in indice.index]
+    indice['CANONICO'] = [nombre_canonico(n) for n in indice.index]
+    indice['ID_ASESOR'] = pd.factorize(indice['CANONICO'], sort=True)[0].astype(np.int32)
+    return indice
+
+
+def periodo_de(año, mes):
+    """Período AAAAMM del año y el número de mes (escalares o arrays)"""
+    return año * 100 + mes
+
+
+def nombre_periodo(periodo):
+    """Nombre del mes del período: 'Marzo' para 202603"""
+    return NOMBRES_MESES[periodo % 100 - 1]
+
+
+def etiqueta_periodo(periodo):
+    """Nombre del mes con su año: 'Marzo 2026' para 202603"""
+    return f"{nombre_periodo(periodo)} {periodo // 100}"
+
+
+def periodo_anterior(periodo):
+    """Período del mes anterior (202601 -> 202512)"""
+    año, mes = divmod(periodo, 100)
+    return periodo_de(año - 1, 12) if mes == 1 else periodo - 1
+
+
+def fechas_mixtas(serie):
+    """Convierte a datetime una columna con fechas y textos dd/mm/aaaa (como
+    Fecha de MANTRA). Se convierte cada valor distinto una sola vez; los
+    textos que no son fechas quedan como NaT."""
+    codigos, valores = pd.factorize(serie)
+    textos = pd.Series(valores, dtype=object).astype(str)
+    fechas = pd.to_datetime(textos, format='%d/%m/%Y', errors='coerce')
+    fechas = fechas.fillna(pd.to_datetime(textos.where(fechas.isna()), format='ISO8601', errors='coerce'))
+    return pd.Series(fechas.to_numpy()[codigos], index=serie.index).where(codigos >= 0)
+
+
+def _cambios_de_año(mes):
+    """Años transcurridos en cada fila respecto de la primera según el orden de
+    la hoja: un salto de más de 6 meses hacia atrás entre filas consecutivas con
+    mes (Diciembre -> Enero) suma un año; uno hacia adelante (Enero ->
+    Diciembre, hoja en orden descendente) lo resta"""
+    con_mes = mes > 0
+    salto = np.diff(mes[con_mes], prepend=mes[con_mes][:1])
+    desfase = np.zeros(len(mes), dtype=np.int64)
+    desfase[con_mes] = np.cumsum((salto < -6).astype(np.int64) - (salto > 6))
+    return desfase
+
+
+def periodos_filas(meses, fechas, referencia):
+    """Período AAAAMM de cada fila a partir de su mes (category con nombres de
+    meses) y su fecha (datetime o None). El año es el de la fecha, corregido si
+    cae en el año vecino: una venta de Diciembre con fecha 2 de enero es del
+    Diciembre anterior. Las filas sin mes reconocible tienen período 0.
+
+    Las filas sin fecha toman el año por el orden de la hoja (ver
+    _cambios_de_año), contado desde la fila con fecha anterior (o la siguiente).
+    Si no hay fechas, el año más reciente de la hoja es el de la última
+    ocurrencia de sus meses hasta el período `referencia`: en una hoja de
+    Enero 2025 a Febrero 2026, los dos Eneros quedan en años distintos."""
+    numeros = meses.cat.categories.map(NUMERO_MES).to_numpy(dtype=float)
+    numeros = np.nan_to_num(numeros).astype(np.int64)
+    codigos = meses.cat.codes.to_numpy()
+    mes = np.where(codigos >= 0, numeros[codigos], 0)
+    con_mes = mes > 0
+    if not con_mes.any():
+        return np.zeros(len(mes), dtype=np.int32)
+
+    desfase = _cambios_de_año(mes)
+    año = np.full(len(mes), np.nan)
+    if fechas is not None:
+        con_fecha = fechas.notna().to_numpy() & con_mes
+        año_fecha = fechas.dt.year.fillna(0).to_numpy(dtype=np.int64)
+        diferencia = fechas.dt.month.fillna(0).to_numpy(dtype=np.int64) - mes
+        año = np.where(con_fecha, año_fecha - (diferencia < -6) + (diferencia > 6), np.nan)
+
+    # Año de la primera fila según cada fila con fecha, extendido a las filas sin fecha
+    base = pd.Series(año - desfase).ffill().bfill().to_numpy()
+    if np.isnan(base).all():
+        año_referencia, mes_referencia = divmod(referencia, 100)
+        ultimo = desfase[con_mes].max()
+        mes_ultimo = mes[con_mes & (desfase == ultimo)].max()
+        base = (año_referencia if mes_ultimo <= mes_referencia else año_referencia - 1) - ultimo
+    año = np.where(np.isnan(año), base + desfase, año).astype(np.int64)
+    return np.where(con_mes, periodo_de(año, mes), 0).astype(np.int32)
+
+
+def ordenar_por_periodo(df):
+    """Ordena las filas por PERIODO con un orden estable: dentro de cada mes
+    se conserva el orden original y las etiquetas del índice no cambian"""
+    orden = np.argsort(df[COLUMNA_PERIODO].to_numpy(), kind='stable')
+    return df.take(orden)
+
+
+def columnas_excel(df):
+    """Filas de la hoja solo con sus columnas del Excel (sin COLUMNAS_DERIVADAS),
+    p.ej. para exportarlas"""
+    return df.drop(columns=[col for col in df.columns if col in COLUMNAS_DERIVADAS])
+
+
+def filas_periodo(df, periodo):
+    """Filas del período como vista del DataFrame (sin copiar los datos).
+    Requiere que df esté ordenado por PERIODO (ver ordenar_por_periodo): el
+    período se ubica con una búsqueda binaria sobre la columna entera."""
+    inicio, fin = np.searchsorted(df[COLUMNA_PERIODO].to_numpy(), [periodo, periodo + 1])
+    return df.iloc[inicio:fin]
+
+
+def _agregar_ids_asesor(libro, indice):
+    """Agrega a cada hoja la columna entera con el ID del asesor (-1 si vacío)"""
+    for hoja, columnas in COLUMNAS_ID_ASESOR.items():
+        if hoja not in libro:
+            continue
+        df = libro[hoja]
+        for col, col_id in columnas.items():
+            if col not in df.columns:
+                continue
+            ids = indice['ID_ASESOR'].reindex(df[col].cat.categories).to_numpy()
+            codigos = df[col].cat.codes.to_numpy()
+            df[col_id] = np.where(codigos >= 0, ids[codigos], -1).astype(np.int32)
+
+
+def normalizar_libro(libro):
+    """Normaliza las hojas una sola vez al cargar: textos recortados y como
+    category, FECHA de DRIVE como datetime con su día (DIA) y su período
+    (PERIODO_FECHA, puede diferir del mes de la venta), las metas de LISTA como
+    número, el ID entero del asesor en cada hoja (ver indice_asesores) y el
+    PERIODO de cada fila (ver periodos_filas). Las hojas quedan ordenadas por
+    período."""
+    libro = dict(libro)
+    for hoja, columnas in COLUMNAS_CATEGORICAS.items():
+        if hoja not in libro:
+            continue
+        df = libro[hoja].copy()
+        for col in columnas:
+            if col in df.columns:
+                df[col] = categoria_limpia(df[col])
+        libro[hoja] = df
+
+    if 'DRIVE' in libro:
+        df = libro['DRIVE']
+        df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
+        periodo_fecha = periodo_de(df['FECHA'].dt.year, df['FECHA'].dt.month)
+        df['PERIODO_FECHA'] = periodo_fecha.fillna(0).astype(np.int32)
+        df['DIA'] = df['FECHA'].dt.day
+
+    if 'LISTA' in libro:
+        df = libro['LISTA']
+        df['Meta'] = pd.to_numeric(df['Meta'], errors='coerce').fillna(0)
+
+    _agregar_ids_asesor(libro, indice_asesores(libro))
+
+    # Las filas sin fecha se ubican respecto del mes de la venta más reciente
+    ultima = libro['DRIVE']['FECHA'].max() if 'DRIVE' in libro else pd.NaT
+    if pd.isna(ultima):
+        ultima = pd.Timestamp.today()
+    referencia = periodo_de(ultima.year, ultima.month)
+    for hoja, columna in COLUMNA_MES.items():
+        if hoja not in libro or columna not in libro[hoja].columns:
+            continue
+        df = libro[hoja]
+        col_fecha = COLUMNA_FECHA.get(hoja)
+        fechas = None
+        if col_fecha in df.columns:
+            fechas = df[col_fecha] if hoja == 'DRIVE' else fechas_mixtas(df[col_fecha])
+        df[COLUMNA_PERIODO] = periodos_filas(df[columna], fechas, referencia)
+        libro[hoja] = ordenar_por_periodo(df)
+    return libro
+
+
+def solo_lectura(df):
+    """Marca como de solo lectura los arreglos del DataFrame: cualquier
+    escritura en su lugar (df.loc[...] = ..., fillna(inplace=True)) falla en vez
+    de modificar los datos compartidos entre sesiones. Devuelve el mismo df."""
+    for arreglo in df._mgr.arrays:
+        # Categorical guarda sus códigos en _codes; fechas y números en _ndarray
+        datos = getattr(arreglo, '_codes', getattr(arreglo, '_ndarray', arreglo))
+        if isinstance(datos, np.ndarray):
+            datos.flags.writeable = False
+    return df
+
+
+def leer_libro(excel_path=RUTA_EXCEL, hojas=HOJAS):
+    """Lee las hojas indicadas en una sola pasada sobre el Excel: el zip se
+    abre una vez y la tabla sharedStrings se decodifica una sola vez.
+    MANTRA se lee en streaming proyectando solo las columnas que se usan,
+    con Mes, Agente y los niveles construidos directamente como category.
+    Las hojas se devuelven normalizadas (ver normalizar_libro)."""
+    return actualizar_libro(excel_path, hojas)[0]
+
+
+def actualizar_libro(excel_path=RUTA_EXCEL, hojas=HOJAS, previos=None):
+    """Como leer_libro, pero reutiliza las hojas de `previos` ({hoja: (df,
+    huella del contenido)}, ver snapshots_previos) cuyo contenido no cambió:
+    solo se leen del Excel las hojas nuevas o modificadas.
+    Devuelve (libro normalizado, {hoja: huella del contenido})."""
+    previos = previos or {}
+    libro, contenidos = {}, {}
+    with LibroXlsx(excel_path) as libro_xlsx:
+        for hoja in hojas:
+            previo = previos.get(hoja)
+            if previo is not None and libro_xlsx.huella_hoja(hoja, previo[1]['cadenas']) == previo[1]:
+                libro[hoja], contenidos[hoja] = previo
+            else:
+                contenidos[hoja] = libro_xlsx.huella_hoja(hoja)
+
+        # Las hojas que cambiaron se leen juntas (una sola apertura del zip)
+        a_leer = [hoja for hoja in hojas if hoja not in libro]
+        libro.update(libro_xlsx.leer_hojas(a_leer, COLUMNAS_LECTURA, CATEGORICAS_LECTURA, motor=MOTOR_LECTURA))
+        libro = {hoja: libro[hoja] for hoja in hojas}
+
+    # La normalización es idempotente: las hojas reutilizadas ya están
+    # normalizadas, pero los IDs de asesor se recalculan sobre el libro completo
+    return normalizar_libro(libro), contenidos
+
+
+def cargar_libro(excel_path=RUTA_EXCEL, hojas=HOJAS):
+    """Carga las hojas del libro (dict {hoja: DataFrame}) desde sus snapshots.
+    Si el Excel cambió (o falta algún snapshot) se leen en una sola pasada las
+    hojas cuyo contenido cambió, se reutilizan las demás y se reconstruyen los
+    snapshots; si no se pueden escribir se usa la lectura directa. El dict incluye además el índice de asesores
+    en la clave 'ASESORES'.
+
+    Las hojas se devuelven de solo lectura (ver solo_lectura): se comparten
+    sin copiar entre todas las sesiones y quien necesite columnas nuevas debe
+    trabajar sobre una copia o un resultado derivado."""
+    carpeta = ruta_snapshot(excel_path)
+    metas = {hoja: leer_meta(os.path.join(carpeta, f'{hoja}.json')) for hoja in hojas}
+    huella = huella_excel(excel_path, next((m for m in metas.values() if m), None))
+
+    libro = {hoja: leer_snapshot(hoja, huella, excel_path, metas[hoja]) for hoja in hojas}
+    if all(df is not None for df in libro.values()):
+        # Si solo cambió el mtime (mismo contenido) se actualiza la huella guardada
+        for hoja in hojas:
+            contenido = metas[hoja].get('contenido')
+            if metas[hoja] != _meta_snapshot(huella, contenido):
+                try:
+                    guardar_huella(hoja, huella, excel_path, contenido)
+                except OSError:
+                    pass
+    else:
+        libro, contenidos = actualizar_libro(excel_path, hojas, snapshots_previos(metas, excel_path))
+        for hoja, df in libro.items():
+            try:
+                libro[hoja] = guardar_snapshot(df, hoja, huella, excel_path, contenidos[hoja])
+            except Exception:
+                pass
+
+    libro['ASESORES'] = indice_asesores(libro)
+    return {hoja: solo_lectura(df) for hoja, df in libro.items()}
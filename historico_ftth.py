@@ -0,0 +1,213 @@
+"""Histórico congelado de los meses cerrados de REPORTE FTTH.xlsx
+
+Los agregados de un mes cerrado (anterior al mes en curso, terminado hace
+más de DIAS_GRACIA días y sin ventas PENDIENTE en DRIVE) ya no cambian: la
+primera vez que se ve cerrado se guardan sus registros compactos (cantidad de
+filas por período, asesor, código de carga y estado) junto a los snapshots del
+libro, y desde entonces solo los meses abiertos se agregan en vivo. Los meses
+se identifican por su PERIODO (AAAAMM, ver datos_ftth): el mismo mes de otro
+año es otro período.
+
+Junto a cada período congelado se guarda la firma de sus filas en el Excel:
+si una corrección tardía cambia esas filas, el período se descarta del
+histórico y se vuelve a congelar con los datos nuevos. Si sus filas ya no
+están en el Excel se conserva lo congelado. Para descartar períodos a mano:
+python historico_ftth.py 202601 [202602 ...]"""
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from agregados_ftth import DIMENSIONES_DRIVE, DIMENSIONES_MANTRA, construir_cubo
+from datos_ftth import RUTA_EXCEL, escribir_atomico, leer_meta, periodo_de, ruta_snapshot
+
+# Dimensiones de cada cubo (la cantidad de filas de cada combinación se guarda
+# en REGISTROS). INSTALADAS_DIA alimenta los comparativos de instaladas por día
+# (sin fechas futuras). El ID_ASESOR no se guarda: depende de los nombres de la
+# carga actual y se vuelve a agregar al construir los cubos.
+DIMENSIONES_CUBOS = {
+    'MANTRA': DIMENSIONES_MANTRA,
+    'DRIVE': DIMENSIONES_DRIVE,
+    'INSTALADAS_DIA': ['PERIODO', 'DIA'],
+}
+DIMENSIONES_HISTORICO = {
+    tipo: [dim for dim in dimensiones if dim != 'ID_ASESOR']
+    for tipo, dimensiones in DIMENSIONES_CUBOS.items()
+}
+HOJA_CUBO = {'MANTRA': 'MANTRA', 'DRIVE': 'DRIVE', 'INSTALADAS_DIA': 'DRIVE'}
+
+# Columna de nombre con la que se agrega el ID entero del asesor a cada cubo
+COLUMNA_ASESOR_HISTORICO = {'MANTRA': 'Agente', 'DRIVE': 'ASESOR'}
+
+# Columnas de cada hoja de las que dependen los registros congelados (la firma
+# de un período se calcula sobre ellas)
+COLUMNAS_FIRMA = {
+    'MANTRA': DIMENSIONES_HISTORICO['MANTRA'],
+    'DRIVE': DIMENSIONES_HISTORICO['DRIVE'] + ['FECHA'],
+}
+
+# Días después del fin de mes en los que el período sigue abierto: las ventas
+# y los cambios de estado del mes se terminan de cargar los primeros días del
+# mes siguiente
+DIAS_GRACIA = 7
+
+# Estado de DRIVE de una venta que todavía puede cambiar
+ESTADO_PENDIENTE = 'PENDIENTE'
+
+
+def ruta_historico(excel_path=RUTA_EXCEL):
+    return os.path.join(ruta_snapshot(excel_path), 'historico')
+
+
+def periodos_cerrados(registros, hoy=None):
+    """Períodos de DRIVE que ya cerraron (lista ordenada de enteros AAAAMM):
+    terminaron hace más de DIAS_GRACIA días y no les queda ninguna venta
+    PENDIENTE. El mes en curso nunca está cerrado.
+    registros: filas de DRIVE (o registros de su cubo) con PERIODO y ESTADO."""
+    hoy = pd.Timestamp.today() if hoy is None else pd.Timestamp(hoy)
+    limite = hoy.normalize() - pd.Timedelta(days=DIAS_GRACIA)
+    periodos = registros['PERIODO'].to_numpy()
+    pendientes = periodos[(registros['ESTADO'] == ESTADO_PENDIENTE).to_numpy()]
+    terminados = periodos[(periodos > 0) & (periodos < periodo_de(limite.year, limite.month))]
+    return [int(periodo) for periodo in np.setdiff1d(terminados, pendientes)]
+
+
+def firmas_periodos(libro):
+    """Firma de las filas de cada período en el libro ({período: texto}):
+    cantidad de filas y suma de sus hashes por hoja, sin depender del orden"""
+    partes = {}
+    for hoja, columnas in COLUMNAS_FIRMA.items():
+        df = libro[hoja]
+        hashes = pd.util.hash_pandas_object(df[columnas], index=False)
+        grupos = hashes.groupby(df['PERIODO'].to_numpy()).agg(['size', 'sum'])
+        for periodo, filas, suma in zip(grupos.index, grupos['size'], grupos['sum']):
+            partes.setdefault(int(periodo), []).append(f'{hoja}:{filas}:{suma:016x}')
+    return {periodo: '|'.join(firma) for periodo, firma in partes.items() if periodo > 0}
+
+
+def registros_hoja(tipo, df, hoy=None):
+    """Registros compactos de las filas de df (cantidad por combinación de las
+    dimensiones del tipo), con textos como object para unir distintas cargas"""
+    if tipo == 'INSTALADAS_DIA':
+        hoy = pd.Timestamp.today() if hoy is None else pd.Timestamp(hoy)
+        df = df[(df['FECHA'] <= hoy) & (df['ESTADO'] == 'INSTALADO')]
+    registros = construir_cubo(df, DIMENSIONES_HISTORICO[tipo]).rename('REGISTROS').reset_index()
+    for col in registros.columns[registros.dtypes == 'category']:
+        registros[col] = registros[col].astype(object)
+    return registros
+
+
+def cargar_historico(excel_path=RUTA_EXCEL):
+    """Histórico guardado: ({período congelado: firma}, {tipo: registros}).
+    Si falta alguna tabla se descarta el histórico completo. Los históricos
+    anteriores a las firmas (lista de períodos) quedan sin firma: se vuelven a
+    congelar en la próxima carga."""
+    carpeta = ruta_historico(excel_path)
+    periodos = leer_meta(os.path.join(carpeta, 'periodos.json'))
+    if not periodos:
+        return {}, {}
+    try:
+        tablas = {
+            tipo: pd.read_parquet(os.path.join(carpeta, f'{tipo}.parquet'))
+            for tipo in DIMENSIONES_HISTORICO
+        }
+    except Exception:
+        return {}, {}
+    if isinstance(periodos, list):
+        return {int(periodo): None for periodo in periodos}, tablas
+    return {int(periodo): firma for periodo, firma in periodos.items()}, tablas
+
+
+def guardar_historico(periodos, tablas, excel_path=RUTA_EXCEL):
+    """Guarda el histórico: periodos es {período congelado: firma}"""
+    carpeta = ruta_historico(excel_path)
+    os.makedirs(carpeta, exist_ok=True)
+    for tipo, registros in tablas.items():
+        escribir_atomico(
+            os.path.join(carpeta, f'{tipo}.parquet'),
+            lambda path: registros.to_parquet(path, index=False)
+        )
+
+    # Los períodos se escriben al final: marcan el histórico como completo
+    def escribir(path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({str(periodo): firma for periodo, firma in sorted(periodos.items())}, f)
+    escribir_atomico(os.path.join(carpeta, 'periodos.json'), escribir)
+
+
+def _descartar(periodos, tablas, descartar):
+    """Histórico sin los períodos a descartar"""
+    periodos = {periodo: firma for periodo, firma in periodos.items() if periodo not in descartar}
+    tablas = {tipo: registros[~registros['PERIODO'].isin(descartar)] for tipo, registros in tablas.items()}
+    return periodos, tablas
+
+
+def invalidar_periodos(descartar, excel_path=RUTA_EXCEL):
+    """Descarta períodos del histórico: en la próxima carga se agregan en vivo
+    y se vuelven a congelar si siguen cerrados. Devuelve los descartados."""
+    periodos, tablas = cargar_historico(excel_path)
+    descartar = [int(periodo) for periodo in descartar if int(periodo) in periodos]
+    if descartar:
+        guardar_historico(*_descartar(periodos, tablas, descartar), excel_path)
+    return descartar
+
+
+def actualizar_historico(libro, excel_path=RUTA_EXCEL, hoy=None):
+    """Congela los períodos que cerraron desde la última carga y vuelve a
+    congelar los que cambiaron en el Excel (corrección tardía). Devuelve
+    ([períodos congelados], {tipo: registros})"""
+    periodos, tablas = cargar_historico(excel_path)
+    firmas = firmas_periodos(libro)
+    cambiados = [
+        periodo for periodo, firma in periodos.items()
+        if periodo in firmas and firmas[periodo] != firma
+    ]
+    if cambiados:
+        periodos, tablas = _descartar(periodos, tablas, cambiados)
+    nuevos = [periodo for periodo in periodos_cerrados(libro['DRIVE'], hoy) if periodo not in periodos]
+
+    if nuevos:
+        for tipo, hoja in HOJA_CUBO.items():
+            df = libro[hoja]
+            congelar = registros_hoja(tipo, df[df['PERIODO'].isin(nuevos)], hoy)
+            previos = tablas.get(tipo)
+            tablas[tipo] = pd.concat([previos, congelar], ignore_index=True) if previos is not None else congelar
+        periodos.update({periodo: firmas[periodo] for periodo in nuevos})
+    if nuevos or cambiados:
+        try:
+            guardar_historico(periodos, tablas, excel_path)
+        except OSError:
+            pass
+    return sorted(periodos), tablas
+
+
+def cubos_libro(libro, excel_path=RUTA_EXCEL, hoy=None):
+    """Cubos de MANTRA, DRIVE e INSTALADAS_DIA (Series con la cantidad de filas
+    por combinación de dimensiones): los meses congelados salen del histórico y
+    el resto se agrega en vivo. MANTRA y DRIVE incluyen el nivel ID_ASESOR
+    según el índice de asesores de la carga actual."""
+    congelados, tablas = actualizar_historico(libro, excel_path, hoy)
+
+    cubos = {}
+    for tipo, hoja in HOJA_CUBO.items():
+        df = libro[hoja]
+        vivo = registros_hoja(tipo, df[~df['PERIODO'].isin(congelados)], hoy)
+        historico = tablas.get(tipo)
+        if historico is not None:
+            historico = historico[historico['PERIODO'].isin(congelados)]
+            vivo = pd.concat([historico, vivo], ignore_index=True)
+
+        if tipo in COLUMNA_ASESOR_HISTORICO:
+            ids = libro['ASESORES']['ID_ASESOR'].reindex(vivo[COLUMNA_ASESOR_HISTORICO[tipo]].to_numpy())
+            vivo['ID_ASESOR'] = ids.fillna(-1).to_numpy(dtype=np.int32)
+        else:
+            vivo['DIA'] = vivo['DIA'].astype(df['DIA'].dtype)
+        cubos[tipo] = vivo.set_index(DIMENSIONES_CUBOS[tipo])['REGISTROS']
+    return cubos
+
+
+if __name__ == '__main__':
+    descartados = invalidar_periodos(sys.argv[1:])
+    print(f"Períodos descartados del histórico: {descartados or 'ninguno'}")
@@ -0,0 +1,375 @@
+"""Lector en streaming de hojas .xlsx
+
+Recorre el XML de cada hoja fila por fila (iterparse) sin construir el libro
+completo en memoria como hace openpyxl. Permite proyectar solo las columnas
+que se usan y construir columnas categóricas a medida que se leen las filas:
+el costo de memoria y de tiempo depende de las columnas usadas, no del ancho
+de la hoja. El resultado es equivalente al de pd.read_excel.
+
+Es el motor de lectura predeterminado ('streaming'); también se puede leer con
+pd.read_excel y otro engine instalado (ver MOTORES_PANDAS). Para comparar los
+motores disponibles: python benchmark_lectores.py"""
+import hashlib
+import importlib.util
+import logging
+import posixpath
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+NS_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PKG_REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+TAG_ROW = NS_MAIN + 'row'
+TAG_C = NS_MAIN + 'c'
+TAG_V = NS_MAIN + 'v'
+TAG_IS = NS_MAIN + 'is'
+TAG_T = NS_MAIN + 't'
+TAG_R = NS_MAIN + 'r'
+
+# Formatos de número integrados de Excel que representan fechas/horas
+FORMATOS_FECHA_INTEGRADOS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+
+# Valores de texto que pd.read_excel interpreta como vacíos
+VALORES_NA = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+# Marca de celda con contenido en una columna no proyectada
+CELDA_OCUPADA = object()
+
+# Motores de lectura: 'streaming' es el lector de este módulo; los demás usan
+# pd.read_excel con ese engine si su paquete está instalado
+MOTOR_PREDETERMINADO = 'streaming'
+MOTORES_PANDAS = {'calamine': 'python_calamine', 'openpyxl': 'openpyxl'}
+
+logger = logging.getLogger(__name__)
+
+_RE_FORMATO_FECHA = re.compile(r'[dmyhs]', re.IGNORECASE)
+_RE_FORMATO_LITERAL = re.compile(r'"[^"]*"|\[[^\]]*\]|\\.')
+
+
+def _indice_columna(ref, _cache={}):
+    """Convierte la referencia de celda ('AB12') al índice de columna (27)"""
+    letras = ref.rstrip('0123456789')
+    indice = _cache.get(letras)
+    if indice is None:
+        indice = -1
+        for letra in letras:
+            indice = (indice + 1) * 26 + ord(letra) - 65
+        _cache[letras] = indice
+    return indice
+
+
+def _texto(elem):
+    """Texto de un <si> o <is>, concatenando las partes con formato (<r>)
+    e ignorando las guías fonéticas"""
+    partes = []
+    for hijo in elem:
+        if hijo.tag == TAG_T:
+            partes.append(hijo.text or '')
+        elif hijo.tag == TAG_R:
+            t = hijo.find(TAG_T)
+            if t is not None:
+                partes.append(t.text or '')
+    return ''.join(partes)
+
+
+class LibroXlsx:
+    """Libro .xlsx abierto una sola vez: el zip, la tabla sharedStrings y los
+    estilos de fecha se leen una vez y se comparten entre todas las hojas"""
+
+    def __init__(self, excel_path):
+        self.excel_path = excel_path
+        self.zip = zipfile.ZipFile(excel_path)
+        self.rutas_hojas, self.fecha_1904 = self._leer_workbook()
+        self.shared_strings = self._leer_shared_strings()
+        self.estilos_fecha = self._leer_estilos_fecha()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+
+    @property
+    def hojas(self):
+        return list(self.rutas_hojas)
+
+    def huella_hoja(self, hoja, cadenas=None):
+        """Huella del contenido de la hoja sin descomprimirla: CRC-32 y tamaño
+        de su XML (del directorio del zip), hash de las primeras `cadenas`
+        entradas de sharedStrings (por defecto todas) y estilos de fecha.
+
+        Excel agrega al final de sharedStrings los textos nuevos de otras hojas:
+        una hoja cuyo XML no cambió tiene el mismo contenido si la tabla que
+        tenía al guardarse es un prefijo de la actual. Por eso se compara contra
+        huella_hoja(hoja, huella_previa['cadenas'])."""
+        cadenas = len(self.shared_strings) if cadenas is None else cadenas
+        info = self.zip.getinfo(self.rutas_hojas[hoja])
+        sha1 = hashlib.sha1('\x00'.join(self.shared_strings[:cadenas]).encode('utf-8'))
+        return {
+            'crc': info.CRC,
+            'tamaño': info.file_size,
+            'cadenas': cadenas,
+            'sha1_cadenas': sha1.hexdigest() if cadenas <= len(self.shared_strings) else None,
+            'estilos_fecha': sorted(self.estilos_fecha, key=int),
+            'fecha_1904': self.fecha_1904,
+        }
+
+    def _leer_workbook(self):
+        rels = ET.fromstring(self.zip.read('xl/_rels/workbook.xml.rels'))
+        destinos = {}
+        for rel in rels.iter(NS_PKG_REL + 'Relationship'):
+            destino = rel.get('Target')
+            if destino.startswith('/'):
+                destino = destino.lstrip('/')
+            else:
+                destino = posixpath.normpath(posixpath.join('xl', destino))
+            destinos[rel.get('Id')] = destino
+
+        workbook = ET.fromstring(self.zip.read('xl/workbook.xml'))
+        rutas = {
+            hoja.get('name'): destinos[hoja.get(NS_REL + 'id')]
+            for hoja in workbook.iter(NS_MAIN + 'sheet')
+        }
+        propiedades = workbook.find(NS_MAIN + 'workbookPr')
+        fecha_1904 = propiedades is not None and propiedades.get('date1904') in ('1', 'true')
+        return rutas, fecha_1904
+
+    def _leer_shared_strings(self):
+        try:
+            contenido = self.zip.open('xl/sharedStrings.xml')
+        except KeyError:
+            return []
+        with contenido:
+            return [_texto(si) for si in ET.parse(contenido).getroot()]
+
+    def _leer_estilos_fecha(self):
+        """Índices de estilo (atributo s de la celda) con formato de fecha"""
+        try:
+            estilos = ET.fromstring(self.zip.read('xl/styles.xml'))
+        except KeyError:
+            return set()
+
+        formatos_fecha = set(FORMATOS_FECHA_INTEGRADOS)
+        num_fmts = estilos.find(NS_MAIN + 'numFmts')
+        if num_fmts is not None:
+            for fmt in num_fmts:
+                codigo = _RE_FORMATO_LITERAL.sub('', fmt.get('formatCode', ''))
+                if _RE_FORMATO_FECHA.search(codigo):
+                    formatos_fecha.add(int(fmt.get('numFmtId')))
+
+        cell_xfs = estilos.find(NS_MAIN + 'cellXfs')
+        if cell_xfs is None:
+            return set()
+        return {
+            str(i) for i, xf in enumerate(cell_xfs)
+            if int(xf.get('numFmtId', 0)) in formatos_fecha
+        }
+
+    def _valor_fecha(self, serial):
+        base = datetime(1904, 1, 1) if self.fecha_1904 else datetime(1899, 12, 30)
+        # Excel considera 1900 bisiesto: los seriales < 60 se corren un día
+        if not self.fecha_1904 and serial < 60:
+            serial += 1
+        return base + timedelta(days=serial)
+
+    def _valor_celda(self, c):
+        """Valor de la celda con la misma conversión que pd.read_excel
+        (openpyxl): números enteros como int, fechas como datetime"""
+        tipo = c.get('t')
+        if tipo == 'inlineStr':
+            is_ = c.find(TAG_IS)
+            return _texto(is_) if is_ is not None else ''
+
+        v = c.find(TAG_V)
+        if v is None or v.text is None:
+            return ''
+        texto = v.text
+
+        if tipo == 's':
+            return self.shared_strings[int(texto)]
+        if tipo in ('str', 'inlineStr'):
+            return texto
+        if tipo == 'b':
+            return texto == '1'
+        if tipo == 'e':
+            return np.nan
+        if tipo == 'd':
+            return pd.Timestamp(texto).to_pydatetime()
+
+        numero = float(texto)
+        if c.get('s') in self.estilos_fecha:
+            return self._valor_fecha(numero)
+        entero = int(numero)
+        return entero if entero == numero else numero
+
+    def iterar_filas(self, hoja, indices=None):
+        """Recorre la hoja fila por fila devolviendo listas de valores
+        (celdas vacías como ''), sin recortar filas vacías.
+        Si se indican indices, a partir de la segunda fila solo se convierten
+        esas columnas; las demás celdas con contenido se devuelven como
+        CELDA_OCUPADA (solo sirven para saber que la fila no está vacía)."""
+        with self.zip.open(self.rutas_hojas[hoja]) as contenido:
+            fila_esperada = 1
+            for _, elem in ET.iterparse(contenido, events=('end',)):
+                if elem.tag != TAG_ROW:
+                    continue
+
+                numero_fila = int(elem.get('r', fila_esperada))
+                # Las filas sin celdas no se escriben en el XML
+                for _ in range(fila_esperada, numero_fila):
+                    yield []
+                fila_esperada = numero_fila + 1
+
+                # El encabezado siempre se convierte completo
+                convertir_todo = indices is None or numero_fila == 1
+                fila = []
+                siguiente = 0
+                for c in elem:
+                    ref = c.get('r')
+                    indice = _indice_columna(ref) if ref else siguiente
+                    if indice > len(fila):
+                        fila.extend([''] * (indice - len(fila)))
+                    if convertir_todo or indice in indices:
+                        fila.append(self._valor_celda(c))
+                    else:
+                        fila.append(CELDA_OCUPADA if len(c) else '')
+                    siguiente = indice + 1
+                yield fila
+
+                elem.clear()
+
+    def leer_hoja(self, hoja, columnas=None, categoricas=()):
+        """Lee la hoja como DataFrame (encabezado en la primera fila).
+
+        columnas: nombres de columnas a conservar (None = todas). Las columnas
+            que no existen en la hoja se ignoran.
+        categoricas: columnas proyectadas que se construyen como category a
+            medida que se leen las filas (códigos enteros, sin listas de objetos)."""
+        if columnas is None:
+            filas = self.iterar_filas(hoja)
+            return self._leer_hoja_completa(next(filas, []), filas)
+
+        # Los índices proyectados se resuelven al leer el encabezado: el set se
+        # completa antes de que el generador convierta la segunda fila
+        indices_proyectados = set()
+        filas = self.iterar_filas(hoja, indices_proyectados)
+        encabezado = next(filas, [])
+        indices = [i for i, nombre in enumerate(encabezado) if nombre in columnas]
+        indices_proyectados.update(indices)
+        indices_cat = [i for i in indices if encabezado[i] in categoricas]
+        indices_obj = [i for i in indices if encabezado[i] not in categoricas]
+
+        codigos = {i: [] for i in indices_cat}
+        categorias = {i: {} for i in indices_cat}
+        datos = []
+        ultima_con_datos = -1
+
+        for n, fila in enumerate(filas):
+            if any(valor != '' for valor in fila):
+                ultima_con_datos = n
+            ancho = len(fila)
+
+            for i in indices_cat:
+                valor = fila[i] if i < ancho else ''
+                if valor != valor or valor in VALORES_NA:
+                    codigos[i].append(-1)
+                    continue
+                codigo = categorias[i].get(valor)
+                if codigo is None:
+                    codigo = categorias[i][valor] = len(categorias[i])
+                codigos[i].append(codigo)
+            datos.append([fila[i] if i < ancho else '' for i in indices_obj])
+
+        # Igual que pandas, se descartan las filas vacías al final de la hoja
+        total_filas = ultima_con_datos + 1
+        df = TextParser(
+            [[encabezado[i] for i in indices_obj]] + datos[:total_filas],
+            header=0,
+            skip_blank_lines=False,
+        ).read() if indices_obj else pd.DataFrame(index=pd.RangeIndex(total_filas))
+
+        for i in indices_cat:
+            df[encabezado[i]] = pd.Categorical.from_codes(
+                np.asarray(codigos[i][:total_filas], dtype=np.int32),
+                categories=pd.Index(list(categorias[i]), dtype=object)
+            )
+
+        return df[[encabezado[i] for i in indices]]
+
+    def leer_hojas(self, hojas, columnas=None, categoricas=None, motor=MOTOR_PREDETERMINADO):
+        """Lee varias hojas ({hoja: DataFrame}, en el orden recibido).
+
+        motor: 'streaming' o uno de MOTORES_PANDAS. Si el motor no está
+        instalado o falla se usa el lector en streaming."""
+        columnas = columnas or {}
+        categoricas = categoricas or {}
+        if motor != MOTOR_PREDETERMINADO and motor not in motores_disponibles():
+            logger.warning('El motor de lectura %r no está instalado, se usa el lector en streaming', motor)
+        elif motor != MOTOR_PREDETERMINADO:
+            try:
+                return {
+                    hoja: leer_hoja_pandas(self.excel_path, hoja, columnas.get(hoja), categoricas.get(hoja, ()), motor)
+                    for hoja in hojas
+                }
+            except Exception:
+                logger.warning('No se pudo leer con el motor %r, se usa el lector en streaming', motor, exc_info=True)
+
+        return {hoja: self.leer_hoja(hoja, columnas.get(hoja), categoricas.get(hoja, ())) for hoja in hojas}
+
+    def _leer_hoja_completa(self, encabezado, filas):
+        """Todas las columnas, con el mismo tratamiento que pd.read_excel"""
+        datos = [encabezado]
+        ultima_con_datos = 0
+        for fila in filas:
+            while fila and fila[-1] == '':
+                fila.pop()
+            if fila:
+                ultima_con_datos = len(datos)
+            datos.append(fila)
+        datos = datos[:ultima_con_datos + 1]
+
+        ancho_max = max(len(fila) for fila in datos)
+        datos = [fila + [''] * (ancho_max - len(fila)) for fila in datos]
+        return TextParser(datos, header=0, skip_blank_lines=False).read()
+
+
+def motores_disponibles():
+    """Motores de lectura que se pueden usar en este entorno"""
+    return [MOTOR_PREDETERMINADO] + [
+        motor for motor, paquete in MOTORES_PANDAS.items()
+        if importlib.util.find_spec(paquete) is not None
+    ]
+
+
+def leer_hoja_pandas(excel_path, hoja, columnas=None, categoricas=(), motor='openpyxl'):
+    """Lee la hoja con pd.read_excel(engine=motor) con el mismo resultado que
+    LibroXlsx.leer_hoja: solo las columnas indicadas (en el orden de la hoja)
+    y las categóricas como category con las categorías en orden de aparición"""
+    if motor not in MOTORES_PANDAS:
+        raise ValueError(f"Motor de lectura desconocido: {motor!r}")
+    usecols = (lambda col: col in columnas) if columnas is not None else None
+    df = pd.read_excel(excel_path, sheet_name=hoja, engine=motor, usecols=usecols)
+    for col in categoricas:
+        if col in df.columns:
+            df[col] = pd.Categorical(df[col], categories=pd.unique(df[col].dropna()))
+    return df
+
+
+def leer_hojas(excel_path, hojas, columnas=None, categoricas=None, motor=MOTOR_PREDETERMINADO):
+    """Lee varias hojas abriendo el libro una sola vez (ver LibroXlsx.leer_hojas).
+    columnas y categoricas son dicts {hoja: lista de columnas} opcionales."""
+    with LibroXlsx(excel_path) as libro:
+        return libro.leer_hojas(hojas, columnas, categoricas, motor)
@@ -0,0 +1,90 @@
+"""Recomendaciones por asesor a partir de sus KPIs de DRIVE
+
+Las reglas se evalúan como máscaras sobre la tabla de KPIs de todo el equipo
+(agregados_ftth.kpis_asesores): una operación por regla para todos los
+asesores del mes, en lugar de recalcular cada asesor al seleccionarlo. La
+vista de un asesor es una búsqueda en el resultado."""
+import operator
+
+import numpy as np
+import pandas as pd
+
+# Reglas en orden de presentación: (kpi, comparación, umbral, tipo, título,
+# descripción (con {} en el lugar del valor del kpi), acción)
+REGLAS_RECOMENDACION = [
+    ('tasa_conversion', operator.lt, 50, 'crítica', '⚠️ Tasa de Conversión Baja',
+     "Su tasa de conversión es {}%. Objetivo: aumentar a 80%+",
+     'Enfoque en filtrar mejor los leads antes de hacer seguimiento. Calidad > Cantidad'),
+    ('tasa_cancelacion', operator.gt, 30, 'crítica', '⚠️ Tasa de Cancelación Alta',
+     "El {}% de sus ventas se cancelan",
+     'Investigar causas de cancelación. ¿Falta de seguimiento? ¿Expectativas no cumplidas?'),
+    ('velocidad_venta', operator.lt, 1, 'alta', '📈 Aumentar Velocidad de Venta',
+     "Actualmente {} ventas/día. Potencial: 2+ ventas/día",
+     'Dedique más tiempo a llamadas y seguimiento. Cree rutinas diarias'),
+    ('estabilidad_ventas', operator.gt, 2, 'media', '📊 Variabilidad en Ventas',
+     "Sus ventas varían mucho por día (desv. std: {})",
+     'Implemente una estrategia consistente diaria. Objetivos claros por día'),
+    ('pendientes', operator.gt, 5, 'media', '⏳ Muchas Ventas Pendientes',
+     "Tiene {} ventas en estado PENDIENTE",
+     'Prioricel el seguimiento de pendientes para convertirlas en instaladas'),
+]
+
+# Recomendación de los asesores sin alertas
+RECOMENDACION_EXITO = {
+    'tipo': 'éxito',
+    'título': '✅ Desempeño Sólido',
+    'descripción': "Sus métricas se ven bien. Continúe con esta tendencia",
+    'acción': 'Mantenga la consistencia y búsque formas de optimizar aún más',
+}
+
+# Gravedad de cada tipo (menor = más grave) para ordenar la tabla del equipo
+GRAVEDAD = {'crítica': 0, 'alta': 1, 'media': 2, 'éxito': 3}
+
+COLUMNAS_RECOMENDACION = ['ASESOR', 'tipo', 'título', 'descripción', 'acción']
+
+
+def alertas_asesores(kpis):
+    """Máscara asesor × regla (columnas = kpi de cada regla, en orden) con las
+    reglas que cumple cada asesor"""
+    return pd.DataFrame(
+        {n: comparar(kpis[kpi], umbral) for n, (kpi, comparar, umbral, *_) in enumerate(REGLAS_RECOMENDACION)},
+        index=kpis.index,
+    )
+
+
+def recomendaciones_asesores(kpis):
+    """Recomendaciones de todos los asesores (una fila por recomendación, en el
+    orden de las reglas); los asesores sin alertas reciben RECOMENDACION_EXITO"""
+    alertas = alertas_asesores(kpis)
+    partes = []
+    for n, (kpi, _, _, tipo, titulo, descripcion, accion) in enumerate(REGLAS_RECOMENDACION):
+        valores = kpis.loc[alertas[n], kpi]
+        antes, despues = descripcion.split('{}')
+        partes.append(pd.DataFrame({
+            'ASESOR': valores.index,
+            'REGLA': n,
+            'tipo': tipo,
+            'título': titulo,
+            'descripción': antes + valores.astype(str).to_numpy(dtype=object) + despues,
+            'acción': accion,
+        }))
+
+    sin_alertas = kpis.index[~alertas.any(axis=1).to_numpy()]
+    partes.append(pd.DataFrame(dict(RECOMENDACION_EXITO, ASESOR=sin_alertas, REGLA=len(REGLAS_RECOMENDACION))))
+
+    recomendaciones = pd.concat(partes, ignore_index=True)
+    return recomendaciones.sort_values(['ASESOR', 'REGLA'], kind='stable')[COLUMNAS_RECOMENDACION]
+
+
+def tabla_equipo(kpis, recomendaciones):
+    """KPIs de todos los asesores con la cantidad de alertas y la prioridad (el
+    tipo de recomendación más grave), de mayor a menor prioridad"""
+    gravedad = recomendaciones['tipo'].map(GRAVEDAD)
+    por_asesor = gravedad.groupby(recomendaciones['ASESOR'])
+    tabla = kpis.drop(columns=['fecha_primera_venta', 'fecha_ultima_venta']).copy()
+    tabla['alertas'] = (recomendaciones['tipo'] != 'éxito').groupby(recomendaciones['ASESOR']).sum().reindex(tabla.index, fill_value=0)
+    minima = por_asesor.min().reindex(tabla.index, fill_value=GRAVEDAD['éxito'])
+    tabla['prioridad'] = np.array(list(GRAVEDAD))[minima.to_numpy()]
+    tabla['_gravedad'] = minima
+    tabla = tabla.sort_values(['_gravedad', 'alertas', 'tasa_conversion'], ascending=[True, False, True], kind='stable')
+    return tabla.drop(columns='_gravedad')
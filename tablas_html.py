@@ -0,0 +1,57 @@
+"""Generación vectorizada de las tablas HTML del dashboard
+
+Cada plantilla de fila se separa una sola vez en texto fijo y campos; las
+filas se arman concatenando cada campo con la columna completa (arrays de
+texto de numpy) en una sola pasada, en lugar de recorrer el DataFrame con
+iterrows y acumular el HTML con += fila por fila. Las reglas de color se
+asignan con np.select sobre la columna completa."""
+import string
+
+import numpy as np
+
+VERDE = '#10b981'
+NARANJA = '#f59e0b'
+ROJO = '#ef4444'
+GRIS = '#64748b'
+
+
+def _texto(valores):
+    """Columna como array de textos (dtype object, para concatenar con +)"""
+    return np.asarray(valores).astype(str).astype(object)
+
+
+def filas_html(plantilla, **columnas):
+    """HTML de todas las filas: la plantilla tiene campos {nombre} (sin formato)
+    que se rellenan con la columna del mismo nombre (arrays o Series del mismo
+    largo, ya convertidos al valor que se muestra) o con un valor fijo"""
+    largo = next(len(valores) for valores in columnas.values() if np.ndim(valores))
+    html = np.full(largo, '', dtype=object)
+    for literal, campo, _, _ in string.Formatter().parse(plantilla):
+        if literal:
+            html = html + literal
+        if campo is not None:
+            valores = columnas[campo]
+            html = html + (str(valores) if np.ndim(valores) == 0 else _texto(valores))
+    return ''.join(html)
+
+
+def enteros(valores):
+    """Columna truncada a enteros (como int() sobre cada valor)"""
+    return np.asarray(valores).astype(np.int64)
+
+
+def alternar(posiciones, par, impar):
+    """Color de fondo alternado según la paridad de la posición"""
+    return np.where(np.asarray(posiciones) % 2 == 0, par, impar)
+
+
+def por_cumplimiento(cumplimiento, alto, medio, bajo):
+    """Opción de cada fila según el cumplimiento: ≥70, ≥50 o menos"""
+    cumplimiento = np.asarray(cumplimiento)
+    return np.select([cumplimiento >= 70, cumplimiento >= 50], [alto, medio], bajo)
+
+
+def color_conversion(conversion):
+    """Verde si la conversión es ≥10%, naranja si es 9% y rojo si es menor"""
+    conversion = np.asarray(conversion)
+    return np.select([conversion >= 10, conversion == 9], [VERDE, NARANJA], ROJO)
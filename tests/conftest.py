@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Los módulos del dashboard están en la raíz del repositorio (sin paquete)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
@@ -0,0 +1,53 @@
+"""El almacén SQLite devuelve lo mismo que las hojas en memoria (REPORTE FTTH.xlsx del repositorio)"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import almacen_sqlite
+from conftest import RAIZ
+from datos_ftth import cargar_libro, filas_periodo
+
+EXCEL_PATH = os.path.join(RAIZ, 'REPORTE FTTH.xlsx')
+pytestmark = pytest.mark.skipif(not os.path.exists(EXCEL_PATH), reason='falta REPORTE FTTH.xlsx')
+
+
+@pytest.fixture(scope='module')
+def libro():
+    return cargar_libro(EXCEL_PATH)
+
+
+@pytest.fixture(scope='module')
+def almacen():
+    return almacen_sqlite.importar_libro(EXCEL_PATH)
+
+
+def valores_con_tipo(serie):
+    return [(type(valor), 'NaN' if valor != valor else valor) for valor in serie]
+
+
+@pytest.mark.parametrize('hoja', ['MANTRA', 'DRIVE', 'LISTA'])
+def test_filas_iguales_a_la_hoja_en_memoria(libro, almacen, hoja):
+    for periodo in np.unique(libro[hoja]['PERIODO'].to_numpy()):
+        esperado = filas_periodo(libro[hoja], periodo)
+        filas = almacen_sqlite.filas(almacen, hoja, {'PERIODO': int(periodo)})
+        pd.testing.assert_frame_equal(filas, esperado)
+        for col in esperado.columns[esperado.dtypes == object]:
+            assert valores_con_tipo(filas[col]) == valores_con_tipo(esperado[col]), (hoja, periodo, col)
+
+
+def test_filtros_de_varias_columnas(libro, almacen):
+    df = libro['DRIVE']
+    periodo = int(df['PERIODO'].max())
+    asesor = filas_periodo(df, periodo)['ASESOR'].dropna().iloc[0]
+    esperado = filas_periodo(df, periodo)
+    esperado = esperado[esperado['ASESOR'] == asesor]
+    filas = almacen_sqlite.filas(almacen, 'DRIVE', {'PERIODO': periodo, 'ASESOR': asesor})
+    pd.testing.assert_frame_equal(filas, esperado)
+
+
+def test_valores_e_indice_de_asesores(libro, almacen):
+    periodos = almacen_sqlite.valores(almacen, 'DRIVE', 'PERIODO_FECHA')
+    assert periodos == np.unique(libro['DRIVE']['PERIODO_FECHA'].to_numpy()).tolist()
+    pd.testing.assert_frame_equal(almacen_sqlite.indice_asesores(almacen), libro['ASESORES'])
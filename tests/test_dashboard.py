@@ -0,0 +1,20 @@
+"""Prueba de humo del dashboard con el libro REPORTE FTTH.xlsx del repositorio"""
+import os
+import runpy
+
+import pytest
+
+from conftest import RAIZ
+
+DASHBOARD = os.path.join(RAIZ, 'dashboard.py')
+pytestmark = pytest.mark.skipif(
+    not os.path.exists(os.path.join(RAIZ, 'REPORTE FTTH.xlsx')), reason='falta REPORTE FTTH.xlsx'
+)
+
+
+def test_precalentar_despues_de_ejecutar_el_script():
+    # El vigilante precalienta con las globales de una ejecución completa del
+    # script (modo bare de Streamlit): ninguna variable del script debe tapar
+    # una función que use el precalentamiento
+    globales = runpy.run_path(DASHBOARD, run_name='dashboard')
+    globales['precalentar_caches']()
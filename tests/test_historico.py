@@ -0,0 +1,113 @@
+"""Cierre de períodos y congelado del histórico (historico_ftth) con libros sintéticos"""
+import json
+import os
+
+import pandas as pd
+
+import historico_ftth
+from historico_ftth import actualizar_historico, cubos_libro, invalidar_periodos, periodos_cerrados
+
+
+def libro_sintetico(ventas):
+    """Libro mínimo con las columnas que usa el histórico.
+    ventas: lista de (fecha 'AAAA-MM-DD', período AAAAMM, estado)"""
+    drive = pd.DataFrame(ventas, columns=['FECHA', 'PERIODO', 'ESTADO'])
+    drive['FECHA'] = pd.to_datetime(drive['FECHA'])
+    drive['DIA'] = drive['FECHA'].dt.day
+    drive['ASESOR'] = 'ANA'
+    drive['CODIGO DE CARGA'] = 'C1'
+    drive['PAGO'] = 'SI'
+    drive['MOTIVO CANCELACIÓN'] = None
+    drive['ID_ASESOR'] = 0
+    mantra = pd.DataFrame({
+        'PERIODO': drive['PERIODO'], 'Agente': 'ANA', 'ID_ASESOR': 0,
+        'NIVEL 1': 'Contactado', 'NIVEL 2': 'Con Cobertura', 'NIVEL 3': 'Contrato OK',
+    })
+    asesores = pd.DataFrame({'ID_ASESOR': [0]}, index=pd.Index(['ANA'], name='NOMBRE'))
+    return {'MANTRA': mantra, 'DRIVE': drive, 'ASESORES': asesores}
+
+
+def instaladas(cubos, periodo):
+    cubo = cubos['DRIVE']
+    return int(cubo.xs((periodo, 'INSTALADO'), level=['PERIODO', 'ESTADO']).sum())
+
+
+def test_mes_en_curso_y_meses_posteriores_no_cierran():
+    libro = libro_sintetico([
+        ('2025-12-10', 202512, 'INSTALADO'),
+        ('2026-01-03', 202601, 'INSTALADO'),
+        ('2026-01-04', 202602, 'INSTALADO'),
+    ])
+    # El 5 de enero diciembre sigue en el período de gracia
+    assert periodos_cerrados(libro['DRIVE'], hoy='2026-01-05') == []
+    assert periodos_cerrados(libro['DRIVE'], hoy='2026-01-08') == [202512]
+    assert periodos_cerrados(libro['DRIVE'], hoy='2026-03-20') == [202512, 202601, 202602]
+
+
+def test_periodo_con_pendientes_sigue_abierto():
+    libro = libro_sintetico([
+        ('2025-11-10', 202511, 'INSTALADO'),
+        ('2025-12-10', 202512, 'PENDIENTE'),
+        ('2025-12-11', 202512, 'INSTALADO'),
+    ])
+    assert periodos_cerrados(libro['DRIVE'], hoy='2026-02-01') == [202511]
+
+
+def test_cambio_de_mes_congela_solo_periodos_cerrados(tmp_path):
+    excel_path = str(tmp_path / 'REPORTE.xlsx')
+    ventas = [('2025-12-10', 202512, 'INSTALADO'), ('2026-01-03', 202601, 'INSTALADO')]
+
+    congelados, _ = actualizar_historico(libro_sintetico(ventas), excel_path, hoy='2026-01-05')
+    assert congelados == []
+
+    ventas.append(('2026-01-20', 202601, 'INSTALADO'))
+    congelados, _ = actualizar_historico(libro_sintetico(ventas), excel_path, hoy='2026-01-21')
+    assert congelados == [202512]
+
+    # Enero sigue en vivo: sus ventas nuevas aparecen en los cubos
+    ventas.append(('2026-01-25', 202601, 'INSTALADO'))
+    cubos = cubos_libro(libro_sintetico(ventas), excel_path, hoy='2026-01-26')
+    assert instaladas(cubos, 202512) == 1
+    assert instaladas(cubos, 202601) == 3
+
+
+def test_correccion_tardia_vuelve_a_congelar_el_periodo(tmp_path):
+    excel_path = str(tmp_path / 'REPORTE.xlsx')
+    ventas = [
+        ('2025-12-10', 202512, 'INSTALADO'),
+        ('2025-12-11', 202512, 'CANCELADO'),
+        ('2026-01-03', 202601, 'INSTALADO'),
+    ]
+    cubos = cubos_libro(libro_sintetico(ventas), excel_path, hoy='2026-02-15')
+    assert instaladas(cubos, 202512) == 1
+
+    ventas[1] = ('2025-12-11', 202512, 'INSTALADO')
+    ventas.append(('2025-12-30', 202512, 'INSTALADO'))
+    cubos = cubos_libro(libro_sintetico(ventas), excel_path, hoy='2026-02-16')
+    assert instaladas(cubos, 202512) == 3
+    assert int(cubos['INSTALADAS_DIA'].xs(202512, level='PERIODO').sum()) == 3
+
+    # Si las filas del período ya no están en el Excel se conserva lo congelado
+    sin_diciembre = [venta for venta in ventas if venta[1] != 202512]
+    cubos = cubos_libro(libro_sintetico(sin_diciembre), excel_path, hoy='2026-02-17')
+    assert instaladas(cubos, 202512) == 3
+
+
+def test_invalidar_periodos_y_historico_sin_firmas(tmp_path):
+    excel_path = str(tmp_path / 'REPORTE.xlsx')
+    ventas = [('2025-12-10', 202512, 'INSTALADO'), ('2026-01-03', 202601, 'INSTALADO')]
+    actualizar_historico(libro_sintetico(ventas), excel_path, hoy='2026-02-15')
+
+    assert invalidar_periodos([202601, 202603], excel_path) == [202601]
+    congelados, tablas = historico_ftth.cargar_historico(excel_path)
+    assert list(congelados) == [202512]
+    assert set(tablas['DRIVE']['PERIODO']) == {202512}
+
+    # Un histórico con el formato anterior (lista de períodos) no tiene firmas:
+    # se vuelve a congelar en la próxima carga
+    ruta_periodos = os.path.join(historico_ftth.ruta_historico(excel_path), 'periodos.json')
+    with open(ruta_periodos, 'w', encoding='utf-8') as f:
+        json.dump([202512], f)
+    congelados, _ = actualizar_historico(libro_sintetico(ventas), excel_path, hoy='2026-02-15')
+    assert congelados == [202512, 202601]
+    assert all(historico_ftth.cargar_historico(excel_path)[0].values())
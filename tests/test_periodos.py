@@ -0,0 +1,38 @@
+"""Período AAAAMM de las filas según su mes, su fecha y el orden de la hoja (datos_ftth.periodos_filas)"""
+import pandas as pd
+
+from datos_ftth import NOMBRES_MESES, periodos_filas
+
+
+def periodos(meses, fechas=None, referencia=202602):
+    fechas = pd.to_datetime(pd.Series(fechas)) if fechas is not None else None
+    return periodos_filas(pd.Series(meses, dtype='category'), fechas, referencia).tolist()
+
+
+def test_mismo_mes_en_dos_años_sin_fechas():
+    meses = NOMBRES_MESES + ['Enero', 'Febrero']
+    esperado = [202500 + numero for numero in range(1, 13)] + [202601, 202602]
+    assert periodos(meses) == esperado
+
+
+def test_año_mas_reciente_hasta_la_referencia():
+    assert periodos(['Noviembre', 'Diciembre'], referencia=202603) == [202511, 202512]
+    assert periodos(['Noviembre', 'Diciembre', 'Enero', 'Febrero', 'Marzo'], referencia=202603) == [
+        202511, 202512, 202601, 202602, 202603
+    ]
+
+
+def test_hoja_en_orden_descendente():
+    assert periodos(['Febrero', 'Enero', 'Diciembre', 'Noviembre']) == [202602, 202601, 202512, 202511]
+
+
+def test_filas_sin_fecha_toman_el_año_de_la_fila_con_fecha_anterior():
+    meses = ['Diciembre', 'Enero', 'Enero', 'Diciembre', 'Enero']
+    fechas = ['2024-12-20', None, '2025-01-02', None, None]
+    assert periodos(meses, fechas) == [202412, 202501, 202501, 202412, 202501]
+
+
+def test_fecha_del_año_vecino_y_filas_sin_mes():
+    meses = ['Diciembre', None, 'Enero']
+    fechas = ['2026-01-02', None, '2025-12-30']
+    assert periodos(meses, fechas) == [202512, 0, 202601]
@@ -0,0 +1,63 @@
+"""Los snapshots Parquet devuelven las hojas tal como se leyeron del Excel (datos_ftth)"""
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import RAIZ
+from datos_ftth import SEPARADOR_TIPO, _leer_parquet, _preparar_para_parquet, cargar_libro, ruta_snapshot
+
+EXCEL_REPOSITORIO = os.path.join(RAIZ, 'REPORTE FTTH.xlsx')
+
+
+def ida_y_vuelta(df, tmp_path):
+    excel_path = str(tmp_path / 'REPORTE.xlsx')
+    os.makedirs(ruta_snapshot(excel_path))
+    _preparar_para_parquet(df).to_parquet(os.path.join(ruta_snapshot(excel_path), 'DRIVE.parquet'))
+    return _leer_parquet('DRIVE', excel_path)
+
+
+def valores_con_tipo(serie):
+    return [(type(valor), 'NaN' if valor != valor else valor) for valor in serie]
+
+
+def test_columnas_de_tipos_mezclados(tmp_path):
+    df = pd.DataFrame({
+        'FECHA DE INST': [datetime(2026, 1, 5, 10, 30), 'PENDIENTE', np.nan, datetime(2026, 2, 1)],
+        'TLF': [940938849, '9409-38849', np.nan, 2.5],
+        'OBSERVACION': ['OK', np.nan, True, 'REVISAR'],
+        'ESTADO': ['INSTALADO', np.nan, 'CANCELADO', 'INSTALADO'],
+        'CANT': [1, 2, 3, 4],
+    }, index=[3, 5, 7, 9])
+    leido = ida_y_vuelta(df, tmp_path)
+
+    assert list(leido.columns) == list(df.columns)
+    assert leido.index.tolist() == df.index.tolist()
+    assert (leido.dtypes == df.dtypes).all()
+    for col in df.columns:
+        assert valores_con_tipo(leido[col]) == valores_con_tipo(df[col]), col
+
+
+def test_tipos_sin_columna_propia_se_guardan_como_texto(tmp_path):
+    df = pd.DataFrame({'NOTA': ['a', datetime(2026, 1, 5).date(), np.nan]})
+    leido = ida_y_vuelta(df, tmp_path)
+    assert valores_con_tipo(leido['NOTA']) == [(str, 'a'), (str, '2026-01-05'), (float, 'NaN')]
+
+
+@pytest.mark.skipif(not os.path.exists(EXCEL_REPOSITORIO), reason='falta REPORTE FTTH.xlsx')
+def test_carga_en_frio_igual_a_carga_desde_snapshots(tmp_path):
+    excel_path = str(tmp_path / 'REPORTE FTTH.xlsx')
+    shutil.copy(EXCEL_REPOSITORIO, excel_path)
+    en_frio = cargar_libro(excel_path)
+    assert os.path.exists(os.path.join(ruta_snapshot(excel_path), 'MANTRA.parquet'))
+    desde_snapshots = cargar_libro(excel_path)
+
+    assert list(en_frio) == list(desde_snapshots)
+    for hoja, df in en_frio.items():
+        pd.testing.assert_frame_equal(df, desde_snapshots[hoja])
+        for col in df.columns[df.dtypes == object]:
+            assert valores_con_tipo(df[col]) == valores_con_tipo(desde_snapshots[hoja][col]), (hoja, col)
+        assert not any(SEPARADOR_TIPO in str(col) for col in df.columns)
@@ -0,0 +1,54 @@
+"""Reintentos del vigilante del libro (vigilante_ftth) con versiones simuladas"""
+import time
+
+import vigilante_ftth
+from vigilante_ftth import VigilanteLibro
+
+
+def esperar(condicion, limite=5):
+    fin = time.monotonic() + limite
+    while not condicion():
+        assert time.monotonic() < fin, 'tiempo de espera agotado'
+        time.sleep(0.01)
+
+
+def test_reintenta_el_precalentamiento_fallido(monkeypatch):
+    version = {'actual': 'v1'}
+    monkeypatch.setattr(vigilante_ftth, 'version_libro', lambda excel_path: version['actual'])
+    intentos = []
+
+    def precalentar():
+        intentos.append(vigilante.version_actual())
+        if len(intentos) < 3:
+            raise OSError('archivo bloqueado')
+
+    vigilante = VigilanteLibro(precalentar, 'libro.xlsx', intervalo=0.01)
+    assert vigilante.version == 'v1' and vigilante.ultimo_error() is None
+    vigilante.iniciar()
+
+    version['actual'] = 'v2'
+    esperar(lambda: vigilante.ultimo_error() is not None)
+    error = vigilante.ultimo_error()
+    assert error['version'] == 'v2' and 'archivo bloqueado' in error['error']
+    assert vigilante.version == 'v1'
+
+    # Se reintenta sin que el archivo cambie y al lograrlo se publica la versión
+    esperar(lambda: vigilante.version == 'v2')
+    assert intentos == ['v2', 'v2', 'v2']
+    assert vigilante.ultimo_error() is None
+
+
+def test_volver_a_la_version_publicada_descarta_el_error(monkeypatch):
+    version = {'actual': 'v1'}
+    monkeypatch.setattr(vigilante_ftth, 'version_libro', lambda excel_path: version['actual'])
+
+    def precalentar():
+        raise ValueError('hoja DRIVE vacía')
+
+    vigilante = VigilanteLibro(precalentar, 'libro.xlsx', intervalo=0.01).iniciar()
+    version['actual'] = 'v2'
+    esperar(lambda: vigilante.ultimo_error() is not None)
+
+    version['actual'] = 'v1'
+    esperar(lambda: vigilante.ultimo_error() is None)
+    assert vigilante.version == 'v1'
@@ -0,0 +1,110 @@
+"""Vigilante en segundo plano del archivo REPORTE FTTH.xlsx
+
+Un hilo revisa periódicamente la versión del libro (datos_ftth.version_libro:
+un os.stat por revisión mientras el archivo no cambie). Cuando el Excel se
+reemplaza, el hilo recalcula los datos de la versión nueva fuera de las
+consultas de los usuarios y recién al terminar la publica: hasta ese momento
+las sesiones siguen usando la versión anterior con sus caches completos.
+
+Si el precalentamiento falla se conserva la versión publicada y se reintenta
+con espera creciente (de intervalo a ESPERA_MAXIMA_REINTENTO segundos); el
+último error queda disponible en ultimo_error() para mostrarlo en la interfaz."""
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from datos_ftth import RUTA_EXCEL, version_libro
+
+logger = logging.getLogger(__name__)
+
+# Espera máxima entre reintentos de una versión que no se pudo precalentar
+ESPERA_MAXIMA_REINTENTO = 600
+
+
+class VigilanteLibro:
+    """Vigila el libro y publica su versión una vez precalentados los caches.
+
+    precalentar: función sin argumentos que recalcula los caches; se ejecuta en
+        el hilo del vigilante, donde version_actual() ya devuelve la versión nueva.
+    intervalo: segundos entre revisiones del archivo."""
+
+    def __init__(self, precalentar, excel_path=RUTA_EXCEL, intervalo=5):
+        self.precalentar = precalentar
+        self.excel_path = excel_path
+        self.intervalo = intervalo
+        self.version = self._leer_version()
+        self.error = None
+        self._local = threading.local()
+        self._hilo = threading.Thread(target=self._vigilar, name='vigilante-ftth', daemon=True)
+
+    def iniciar(self):
+        self._hilo.start()
+        return self
+
+    def version_actual(self):
+        """Versión de los datos que deben usar las consultas: la que se está
+        precalentando (solo en el hilo del vigilante) o la publicada"""
+        return getattr(self._local, 'version', None) or self.version
+
+    def ultimo_error(self):
+        """Falla del precalentamiento de la versión nueva del libro mientras no
+        se publique: dict con version, error, hora, intentos y reintento (hora
+        del próximo intento); None si no hay ninguna"""
+        return self.error
+
+    def _leer_version(self):
+        try:
+            return version_libro(self.excel_path)
+        except OSError:
+            return None
+
+    def _vigilar(self):
+        anterior = self.version
+        while True:
+            time.sleep(self.intervalo)
+            version = self._leer_version()
+
+            # Se espera a que la versión se repita en dos revisiones seguidas
+            # para no leer un archivo que todavía se está copiando
+            estable = version == anterior
+            anterior = version
+            if not estable or version is None:
+                continue
+            if version == self.version:
+                # El archivo volvió a la versión publicada
+                self.error = None
+                continue
+
+            error = self.error
+            if error is not None and error['version'] == version and datetime.now() < error['reintento']:
+                continue
+
+            self._local.version = version
+            try:
+                self.precalentar()
+            except Exception as e:
+                # Se conserva la versión publicada y se reintenta más tarde
+                # (o antes, si el archivo vuelve a cambiar)
+                intentos = error['intentos'] + 1 if error is not None and error['version'] == version else 1
+                espera = min(self.intervalo * 2 ** intentos, ESPERA_MAXIMA_REINTENTO)
+                ahora = datetime.now()
+                self.error = {
+                    'version': version,
+                    'error': f'{type(e).__name__}: {e}',
+                    'hora': ahora,
+                    'intentos': intentos,
+                    'reintento': ahora + timedelta(seconds=espera),
+                }
+                logger.exception(
+                    'No se pudo precalentar la versión %s del libro (intento %d, se reintenta en %d s)',
+                    version, intentos, espera
+                )
+                continue
+            finally:
+                self._local.version = None
+
+            # Asignar el atributo es atómico: las consultas pasan de una versión
+            # a la otra sin ver nunca caches a medio construir
+            self.version = version
+            self.error = None